@@ -1,92 +1,252 @@
-import ccxt.async_support as ccxt
-import pandas as pd
-from app.core.config import settings
-
-class BinanceAgent:
-    def __init__(self, api_key: str = None, secret_key: str = None, market_type: str = 'future'):
-        self.exchange = ccxt.binance({
-            'apiKey': api_key or settings.BINANCE_API_KEY,
-            'secret': secret_key or settings.BINANCE_SECRET_KEY,
-            'options': {
-                'defaultType': market_type,
-            },
-            'timeout': 10000, # 10 seconds timeout
-        })
-        if settings.BINANCE_TESTNET:
-            self.exchange.set_sandbox_mode(True)
-
-    async def load_markets(self):
-        """Load market data to ensure precision info is available"""
-        await self.exchange.load_markets()
-
-    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1h', limit: int = 100):
-        """
-        Fetch OHLCV data for a symbol.
-        """
-        try:
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
-        except Exception as e:
-            print(f"Error fetching OHLCV: {e}")
-            raise e
-
-    async def get_balance(self):
-        """
-        Fetch account balance.
-        """
-        try:
-            balance = await self.exchange.fetch_balance()
-            return balance
-        except Exception as e:
-            print(f"Error fetching balance: {e}")
-            return None
-
-    def adjust_quantity(self, symbol: str, amount: float):
-        """
-        Adjust quantity to meet exchange precision requirements.
-        """
-        return self.exchange.amount_to_precision(symbol, amount)
-
-    async def get_open_position(self, symbol: str):
-        """
-        Get the current open position for a symbol from the exchange.
-        Returns None if no position or error.
-        """
-        try:
-            # For futures, fetch_positions is usually used
-            positions = await self.exchange.fetch_positions([symbol])
-            for pos in positions:
-                if pos['symbol'] == symbol and float(pos['contracts']) > 0:
-                    return pos
-            return None
-        except Exception as e:
-            print(f"Error fetching position for {symbol}: {e}")
-            return None
-
-    async def create_order(self, symbol: str, type: str, side: str, amount: float, price: float = None):
-        """
-        Create an order on Binance.
-        """
-        try:
-            # Ensure markets are loaded for precision
-            if not self.exchange.markets:
-                await self.load_markets()
-
-            # Adjust amount precision
-            adjusted_amount = self.adjust_quantity(symbol, amount)
-            
-            print(f"DEBUG: Creating order - Symbol: {symbol}, Side: {side}, Amount: {amount} -> {adjusted_amount}")
-
-            if type == 'limit':
-                order = await self.exchange.create_order(symbol, type, side, adjusted_amount, price)
-            else:
-                order = await self.exchange.create_order(symbol, type, side, adjusted_amount)
-            return order
-        except Exception as e:
-            print(f"Error creating order: {e}")
-            raise e
-
-    async def close(self):
-        await self.exchange.close()
+import numpy as np
+from app.core.config import settings
+from app.core.candles import Candles
+from app.core.startup import lazy_import
+from app.agents.mock_exchange import get_mock_exchange
+from app.agents.market_stream import MarketDataStream
+from app.core.microstructure import MicrostructureBook
+from app.core.telemetry import instrument, EXCHANGE_LATENCY, EXCHANGE_ERRORS, EXCHANGE_WEIGHT_USED, EXCHANGE_WEIGHT_REMAINING
+
+CANDLE_DTYPE = np.float32 if settings.CANDLE_FLOAT32 else np.float64
+
+class BinanceAgent:
+    def __init__(self, api_key: str = None, secret_key: str = None, market_type: str = 'future', exchange=None,
+                 env_keys: bool = True):
+        self.microstructure = {}  # symbol -> MicrostructureBook, while the feed runs
+        self.market_stream = None
+        self.weight_used = None  # (used request weight, ms) from the last response that reported it
+        if exchange is not None or settings.EXCHANGE_BACKEND == "mock":
+            # Injected or in-process simulated exchange (offline load testing)
+            self.exchange = exchange or get_mock_exchange(market_type, api_key)
+            return
+
+        self.exchange = lazy_import("ccxt.async_support").binance({
+            # Only the configured (default) account falls back to the keys from the environment
+            'apiKey': api_key or (settings.BINANCE_API_KEY if env_keys else None),
+            'secret': secret_key or (settings.BINANCE_SECRET_KEY if env_keys else None),
+            'options': {
+                'defaultType': market_type,
+            },
+            'timeout': 10000, # 10 seconds timeout
+        })
+        if settings.BINANCE_TESTNET:
+            self.exchange.set_sandbox_mode(True)
+
+    def _record_rate_limit(self):
+        """Update the rate-limit gauges from the last response's used-weight header"""
+        headers = getattr(self.exchange, 'last_response_headers', None) or {}
+        used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('x-mbx-used-weight-1m')
+        if used is not None:
+            self.weight_used = (float(used), self.exchange.milliseconds())
+            EXCHANGE_WEIGHT_USED.set(float(used))
+            EXCHANGE_WEIGHT_REMAINING.set(settings.BINANCE_WEIGHT_LIMIT - float(used))
+
+    def restore_rate_limit(self, used: float, at: int):
+        """Carry over the weight used before a restart, if the exchange's 1-minute window hasn't rolled since"""
+        if at // 60000 == self.exchange.milliseconds() // 60000:
+            self.weight_used = (used, at)
+            EXCHANGE_WEIGHT_USED.set(used)
+            EXCHANGE_WEIGHT_REMAINING.set(settings.BINANCE_WEIGHT_LIMIT - used)
+
+    async def load_markets(self):
+        """Load market data to ensure precision info is available"""
+        with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="load_markets"):
+            await self.exchange.load_markets()
+
+    def restore_markets(self, markets: dict, currencies: dict = None):
+        """Use markets loaded earlier (warm restart cache) instead of fetching them again"""
+        self.exchange.set_markets(markets, currencies)
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1h', limit: int = 100, since: int = None):
+        """
+        Fetch OHLCV data for a symbol (as Candles).
+        `since` (ms timestamp) pins the window start, e.g. to resume a backtest on the same candles.
+        """
+        try:
+            with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_ohlcv"):
+                ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+            self._record_rate_limit()
+            return Candles.from_ohlcv(ohlcv, dtype=CANDLE_DTYPE)
+        except Exception as e:
+            print(f"Error fetching OHLCV: {e}")
+            raise e
+
+    async def fetch_ohlcv_history(self, symbol: str, timeframe: str = '1h', total: int = 1000, page_size: int = 1000):
+        """
+        Fetch the most recent `total` candles, paging forward from the start of the range
+        (a single request is capped by the exchange).
+        """
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        since = self.exchange.milliseconds() - total * tf_ms
+        rows = []
+        try:
+            while len(rows) < total:
+                with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_ohlcv"):
+                    batch = await self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=min(page_size, total - len(rows)))
+                self._record_rate_limit()
+                if not batch:
+                    break
+                rows.extend(batch)
+                since = batch[-1][0] + tf_ms
+            return Candles.from_ohlcv(rows, dtype=CANDLE_DTYPE)
+        except Exception as e:
+            print(f"Error fetching OHLCV history: {e}")
+            raise e
+
+    async def fetch_server_time(self) -> int:
+        """Exchange server time (ms), used to align ticks to candle closes"""
+        with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_time"):
+            server_time = await self.exchange.fetch_time()
+        self._record_rate_limit()
+        return server_time
+
+    async def fetch_price(self, symbol: str) -> float:
+        """Last traded price (lighter than fetching candles, for position monitoring)"""
+        with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_ticker"):
+            ticker = await self.exchange.fetch_ticker(symbol)
+        self._record_rate_limit()
+        return float(ticker['last'])
+
+    async def fetch_tickers(self) -> dict:
+        """24h tickers of every symbol of the market type, in one request"""
+        with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_tickers"):
+            tickers = await self.exchange.fetch_tickers()
+        self._record_rate_limit()
+        return tickers
+
+    def start_microstructure(self, symbols: list):
+        """Start the optional depth/aggTrade feed; memory per symbol is fixed by the MICROSTRUCTURE_* buffer sizes"""
+        self.microstructure = {symbol: MicrostructureBook(symbol) for symbol in symbols}
+        self.market_stream = MarketDataStream(self, self.microstructure)
+        self.market_stream.start()
+
+    async def stop_microstructure(self):
+        if self.market_stream:
+            await self.market_stream.stop()
+            self.market_stream = None
+        self.microstructure = {}
+
+    def microstructure_features(self, symbol: str):
+        """Rolling order book / trade flow features, or None (feed off, not warmed up or stale)"""
+        book = self.microstructure.get(symbol)
+        return book.features() if book else None
+
+    async def get_balance(self):
+        """
+        Fetch account balance.
+        """
+        try:
+            with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_balance"):
+                balance = await self.exchange.fetch_balance()
+            self._record_rate_limit()
+            return balance
+        except Exception as e:
+            print(f"Error fetching balance: {e}")
+            return None
+
+    def adjust_quantity(self, symbol: str, amount: float):
+        """
+        Adjust quantity to meet exchange precision requirements.
+        """
+        return self.exchange.amount_to_precision(symbol, amount)
+
+    async def get_open_position(self, symbol: str):
+        """
+        Get the current open position for a symbol from the exchange.
+        Returns None if no position or error.
+        """
+        try:
+            # For futures, fetch_positions is usually used
+            with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_positions"):
+                positions = await self.exchange.fetch_positions([symbol])
+            self._record_rate_limit()
+            for pos in positions:
+                if pos['symbol'] == symbol and float(pos['contracts']) > 0:
+                    return pos
+            return None
+        except Exception as e:
+            print(f"Error fetching position for {symbol}: {e}")
+            return None
+
+    async def fetch_net_positions(self) -> dict:
+        """
+        Signed net position size for every symbol with an open position, in one request
+        ({'BTC/USDT': 0.01, 'ETH/USDT': -0.5}). Raises on failure so callers never mistake
+        an error for flat positions.
+        """
+        with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_positions"):
+            positions = await self.exchange.fetch_positions()
+        self._record_rate_limit()
+        net = {}
+        for pos in positions:
+            amount = float(pos['info'].get('positionAmt', 0) or 0)
+            if amount:
+                # Linear futures come back as 'BTC/USDT:USDT'; trades are stored as 'BTC/USDT'
+                net[pos['symbol'].split(':')[0]] = amount
+        return net
+
+    async def fetch_fills(self, symbol: str, since: int = None, limit: int = 500) -> list:
+        """Account fills (my trades) for a symbol since a ms timestamp"""
+        with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="fetch_my_trades"):
+            fills = await self.exchange.fetch_my_trades(symbol, since=since, limit=limit)
+        self._record_rate_limit()
+        return fills
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float, price: float = None,
+                           stop_loss: float = None, take_profit: float = None):
+        """
+        Create an order on Binance.
+        With stop_loss/take_profit the entry is followed by reduce-only exit orders resting on the
+        exchange, returned under order['brackets'] as {'stop_loss': order, 'take_profit': order}.
+        """
+        try:
+            # Ensure markets are loaded for precision
+            if not self.exchange.markets:
+                await self.load_markets()
+
+            # Adjust amount precision
+            adjusted_amount = self.adjust_quantity(symbol, amount)
+            
+            print(f"DEBUG: Creating order - Symbol: {symbol}, Side: {side}, Amount: {amount} -> {adjusted_amount}")
+
+            with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="create_order"):
+                if type == 'limit':
+                    order = await self.exchange.create_order(symbol, type, side, adjusted_amount, price)
+                else:
+                    order = await self.exchange.create_order(symbol, type, side, adjusted_amount)
+            self._record_rate_limit()
+            if stop_loss or take_profit:
+                order['brackets'] = await self.place_brackets(symbol, side, adjusted_amount, stop_loss, take_profit)
+            return order
+        except Exception as e:
+            print(f"Error creating order: {e}")
+            raise e
+
+    async def place_brackets(self, symbol: str, entry_side: str, amount, stop_loss: float = None, take_profit: float = None):
+        """
+        Place reduce-only STOP_MARKET / TAKE_PROFIT_MARKET exits for an entry (futures).
+        A failed leg is left out of the result so the caller can keep enforcing it locally.
+        """
+        exit_side = 'sell' if entry_side == 'buy' else 'buy'
+        brackets = {}
+        for key, order_type, trigger in [('stop_loss', 'STOP_MARKET', stop_loss), ('take_profit', 'TAKE_PROFIT_MARKET', take_profit)]:
+            if not trigger:
+                continue
+            try:
+                params = {'stopPrice': self.exchange.price_to_precision(symbol, trigger), 'reduceOnly': True, 'workingType': 'MARK_PRICE'}
+                with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="create_order"):
+                    brackets[key] = await self.exchange.create_order(symbol, order_type, exit_side, amount, None, params)
+                self._record_rate_limit()
+            except Exception as e:
+                print(f"Error placing {key} order for {symbol}: {e}")
+        return brackets
+
+    async def cancel_order(self, order_id: str, symbol: str):
+        """Cancel an open order (e.g. the remaining leg of a bracket)"""
+        with instrument(EXCHANGE_LATENCY, EXCHANGE_ERRORS, method="cancel_order"):
+            result = await self.exchange.cancel_order(order_id, symbol)
+        self._record_rate_limit()
+        return result
+
+    async def close(self):
+        await self.exchange.close()
@@ -0,0 +1,135 @@
+import ast
+import json
+import re
+from dataclasses import dataclass, asdict
+from typing import Optional
+from app.core.telemetry import LLM_PARSE_RESULTS
+
+ACTIONS = ("BUY", "SELL", "HOLD")
+
+# JSON schema requested from the model (Gemini structured output / OpenAPI subset)
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": list(ACTIONS)},
+        "confidence": {"type": "number"},
+        "entry_price": {"type": "number", "nullable": True},
+        "stop_loss": {"type": "number", "nullable": True},
+        "take_profit": {"type": "number", "nullable": True},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["action", "confidence", "reasoning"]
+}
+
+# Near-miss spellings seen in (Spanish) model output
+_ACTION_ALIASES = {
+    "LONG": "BUY", "COMPRA": "BUY", "COMPRAR": "BUY",
+    "SHORT": "SELL", "VENTA": "SELL", "VENDER": "SELL",
+    "WAIT": "HOLD", "NEUTRAL": "HOLD", "NONE": "HOLD", "MANTENER": "HOLD", "ESPERAR": "HOLD", "NO_TRADE": "HOLD"
+}
+_KEY_ALIASES = {
+    "decision": "action", "signal": "action", "accion": "action", "acción": "action",
+    "confianza": "confidence", "entry": "entry_price", "precio_entrada": "entry_price",
+    "sl": "stop_loss", "stoploss": "stop_loss", "tp": "take_profit", "takeprofit": "take_profit",
+    "razonamiento": "reasoning", "reason": "reasoning", "explanation": "reasoning"
+}
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_LINE_COMMENT = re.compile(r'//[^\n]*')
+_NUMBER = re.compile(r'-?(?:\d+(?:\.\d+)?|\.\d+)')
+
+@dataclass
+class TradeDecision:
+    action: str
+    confidence: float
+    entry_price: Optional[float] = None
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    reasoning: str = ""
+
+    @property
+    def is_trade(self) -> bool:
+        return self.action in ("BUY", "SELL")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def _extract_object(text: str) -> str:
+    """The outermost {...} in the text (drops markdown fences and surrounding prose)"""
+    start, end = text.find('{'), text.rfind('}')
+    return text[start:end + 1] if start != -1 and end > start else text
+
+def _loads_lenient(text: str):
+    """json.loads, then cheap fixes for common near-misses. Returns (object, repaired)"""
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+    fixed = _TRAILING_COMMA.sub(r'\1', _LINE_COMMENT.sub('', text))
+    try:
+        return json.loads(fixed), True
+    except ValueError:
+        pass
+    # Python-literal style: single quotes, None/True/False
+    try:
+        return ast.literal_eval(fixed), True
+    except (ValueError, SyntaxError):
+        return None, True
+
+def _to_float(value):
+    """Numbers given as strings: "62,400.5", "$60000", "85%" """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value).replace(',', ''))
+    return float(match.group()) if match else None
+
+def parse_decision(text: str) -> Optional[TradeDecision]:
+    """
+    Validate a model response into a TradeDecision, repairing near-misses locally
+    (fences/prose, trailing commas, single quotes, aliased keys and actions, percent
+    confidences, numeric strings, swapped SL/TP). Returns None if nothing usable remains.
+    """
+    if not text:
+        LLM_PARSE_RESULTS.inc(outcome="empty")
+        return None
+    raw, repaired = _loads_lenient(_extract_object(text))
+    if not isinstance(raw, dict):
+        LLM_PARSE_RESULTS.inc(outcome="failed")
+        return None
+
+    data = {}
+    for key, value in raw.items():
+        norm = str(key).strip().lower()
+        target = _KEY_ALIASES.get(norm, norm)
+        if target != key:
+            repaired = True
+        data[target] = value
+
+    action = str(data.get("action") or "").strip().upper()
+    if action not in ACTIONS:
+        action = _ACTION_ALIASES.get(action.replace(" ", "_"))
+        if action is None:
+            LLM_PARSE_RESULTS.inc(outcome="failed")
+            return None
+        repaired = True
+
+    confidence = _to_float(data.get("confidence"))
+    if confidence is None:
+        confidence, repaired = 0.0, True
+    elif confidence > 2:
+        confidence, repaired = confidence / 100, True  # "85" or "85%"
+    elif confidence > 1:
+        repaired = True  # Slightly over the scale (e.g. 1.5): clamped, not read as a percentage
+    confidence = min(max(confidence, 0.0), 1.0)
+
+    entry_price, stop_loss, take_profit = (_to_float(data.get(k)) for k in ("entry_price", "stop_loss", "take_profit"))
+    if any(not isinstance(data.get(k), (int, float, type(None))) for k in ("entry_price", "stop_loss", "take_profit")):
+        repaired = True
+    # A stop on the profit side and a target on the loss side are swapped
+    if stop_loss and take_profit and ((action == "BUY" and stop_loss > take_profit) or (action == "SELL" and stop_loss < take_profit)):
+        stop_loss, take_profit, repaired = take_profit, stop_loss, True
+
+    LLM_PARSE_RESULTS.inc(outcome="repaired" if repaired else "ok")
+    return TradeDecision(action=action, confidence=confidence, entry_price=entry_price, stop_loss=stop_loss,
+                         take_profit=take_profit, reasoning=str(data.get("reasoning") or ""))
@@ -1,121 +1,324 @@
-import google.generativeai as genai
-from app.core.config import settings
-import pandas as pd
-
-class GeminiAgent:
-    def __init__(self, api_key: str = None, model_name: str = "gemini-2.5-flash"):
-        key = api_key or settings.GEMINI_API_KEY
-        if not key:
-            print("Warning: GEMINI_API_KEY not found.")
-        else:
-            genai.configure(api_key=key)
-            
-        # Using available model from list_models.py
-        self.model = genai.GenerativeModel(model_name)
-
-    def list_available_models(self):
-        """List available Gemini models"""
-        try:
-            # Check if configured (simple check: try to list models)
-            models = genai.list_models()
-            return [m.name.replace('models/', '') for m in models if 'generateContent' in m.supported_generation_methods]
-        except Exception as e:
-            print(f"Error listing models (likely API key missing/invalid): {e}")
-            # Return default models if API call fails
-            return ["gemini-2.5-flash", "gemini-pro", "gemini-1.5-pro", "gemini-1.5-flash"]
-
-    def _get_timeframe_instructions(self, tf: str) -> str:
-        """
-        Returns specific instructions based on the timeframe volatility.
-        """
-        # Normalize timeframe string
-        tf = tf.lower()
-        
-        # Low Timeframes (Scalping/Intraday)
-        if tf in ['1m', '3m', '5m', '15m']:
-            return """
-            *** AJUSTE DE VOLATILIDAD (BAJA TEMPORALIDAD) ***
-            - Estás analizando una temporalidad RÁPIDA ({tf}). La volatilidad es ALTA y el RUIDO es frecuente.
-            - PRIORIDAD: Preservación de capital sobre ganancias.
-            - Stop Loss: DEBE ser ajustado y técnico (ej. último swing high/low reciente).
-            - Confirmación: Exige cierre de vela para validar rupturas. Cuidado con los "fakeouts".
-            - Si la señal no es PERFECTA, la decisión debe ser HOLD.
-            """
-        
-        # Mid/High Timeframes (Swing/Position)
-        elif tf in ['1h', '4h', '1d', '1w']:
-            return """
-            *** ENFOQUE ESTRUCTURAL (MEDIA/ALTA TEMPORALIDAD) ***
-            - Estás analizando una temporalidad LENTA ({tf}). La tendencia tiene mayor peso.
-            - Stop Loss: Puede ser más holgado para dar "aire" al precio.
-            - Enfócate en niveles clave de Soporte/Resistencia mayores.
-            """
-            
-        return ""
-
-    async def analyze_market(self, symbol: str, data_dict: dict, base_tf: str, strategy: str = "IA Driven"):
-        """
-        Analyze market data using Gemini with Multi-Timeframe context and specific Strategy.
-        """
-        # Prepare data string
-        data_str = ""
-        for tf, df in data_dict.items():
-            data_str += f"\n--- Timeframe: {tf} (Last 15 candles) ---\n"
-            data_str += df.tail(15).to_string() + "\n"
-            
-        # Strategy Definitions
-        strategies = {
-            "IA Driven": "Realiza un análisis técnico integral combinando múltiples indicadores, acción del precio y estructura de mercado.",
-            "RSI Divergence": "Céntrate EXCLUSIVAMENTE en buscar Divergencias de RSI (Regular y Oculta) en zonas de sobrecompra/sobreventa.",
-            "MACD Crossover": "Busca cruces de líneas MACD y cruces de línea cero, confirmados por volumen.",
-            "Bollinger Bands Breakout": "Busca rupturas de las Bandas de Bollinger con confirmación de volumen (Squeeze & Break).",
-            "EMA Golden Cross": "Analiza cruces de medias móviles (EMA 50/200 o 20/50) para determinar tendencia.",
-            "Fibonacci Retracement": "Identifica niveles de retroceso de Fibonacci (0.382, 0.5, 0.618) en la tendencia principal.",
-            "Ichimoku Cloud": "Utiliza la Nube de Ichimoku (Kumo) para determinar tendencia, soporte/resistencia y señales de entrada.",
-            "Price Action (S/R)": "Opera puramente basado en Soportes, Resistencias, Líneas de Tendencia y Patrones de Velas.",
-            "Volume Spread Analysis (VSA)": "Analiza la relación entre el spread de la vela y el volumen para detectar manipulación institucional.",
-            "Elliott Wave Theory": "Identifica en qué onda de Elliott se encuentra el mercado (Impulso 1-5 o Corrección A-B-C).",
-            "Wyckoff Method": "Identifica fases de Acumulación o Distribución según la metodología Wyckoff.",
-            "Smart Money Concepts (SMC)": "Busca Order Blocks, Fair Value Gaps (FVG) y Liquidez (Buy/Sell Side Liquidity)."
-        }
-        
-        selected_instruction = strategies.get(strategy, strategies["IA Driven"])
-        
-        prompt = f"""
-        Actúa como un experto analista de trading de criptomonedas institucional. 
-        Realiza un análisis técnico para {symbol} utilizando la estrategia: **{strategy}**.
-        
-        Instrucción de Estrategia:
-        {selected_instruction}
-        
-        Contexto Multi-Timeframe:
-        1. Identificar la TENDENCIA MACRO usando las temporalidades mayores.
-        2. Buscar patrones de entrada precisos en la temporalidad base ({base_tf}).
-        
-        {self._get_timeframe_instructions(base_tf)}
-        
-        Datos de Mercado:
-        {data_str}
-        
-        Reglas de Gestión:
-        - Solo opera si la estrategia da una señal CLARA.
-        - Define Stop Loss y Take Profit lógicos.
-        - Calcula un nivel de confianza (0.0 - 1.0).
-        
-        Proporciona tu decisión EXCLUSIVAMENTE en formato JSON con estas claves:
-        {{
-            "action": "BUY" | "SELL" | "HOLD",
-            "confidence": float,
-            "entry_price": float (precio actual aproximado),
-            "stop_loss": float,
-            "take_profit": float,
-            "reasoning": "Explicación concisa en español enfocada en {strategy}"
-        }}
-        """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            print(f"Error analyzing market: {e}")
-            return None
+import asyncio
+from app.core.config import settings
+from app.core.startup import lazy_import
+from app.agents.mock_llm import MockGenerativeModel, list_mock_models
+from app.core.telemetry import instrument, LLM_LATENCY, LLM_ERRORS, LLM_CANCELLED, LLM_TOKENS, LLM_COST
+from app.agents.decision import TradeDecision, DECISION_SCHEMA, parse_decision
+from app.core.microstructure import format_features
+
+# Approximate list prices, USD per 1M tokens (input, output), for the per-decision cost cap and usage metering
+MODEL_PRICING = {
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-1.5-pro": (1.25, 5.0),
+    "gemini-1.5-flash": (0.075, 0.30),
+}
+DEFAULT_PRICING = (1.25, 10.0)  # Unknown models are assumed expensive
+EXPECTED_OUTPUT_TOKENS = 300
+CONTEXT_CANDLES = 15
+
+def token_cost(name: str, prompt_tokens: int, output_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICING.get(name, DEFAULT_PRICING)
+    return (prompt_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+def summarize_usage(calls: list) -> dict:
+    """Totals of one analysis from its per-call usage entries; None if no call completed"""
+    if not calls:
+        return None
+    return {
+        "model": ",".join(dict.fromkeys(c["model"] for c in calls)),
+        "calls": len(calls),
+        "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+        "output_tokens": sum(c["output_tokens"] for c in calls),
+        "cost_usd": sum(c["cost_usd"] for c in calls)
+    }
+
+class GeminiAgent:
+    """
+    Market analysis with one model, or with several models/replicas queried concurrently:
+    - "first_valid": return the first response that parses to a valid decision, cancel the rest
+    - "vote": wait for `quorum` valid decisions and combine them by confidence-weighted vote
+    `max_cost` (USD per decision, estimated) caps how many of the models are actually queried.
+    `economy` analyses query only LLM_BUDGET_FALLBACK_MODEL, with a shorter prompt context.
+    """
+    POLICIES = ("first_valid", "vote")
+
+    def __init__(self, api_key: str = None, model_name="gemini-2.5-flash", policy: str = "first_valid",
+                 quorum: int = None, max_cost: float = None):
+        self.model_names = [model_name] if isinstance(model_name, str) else list(model_name)
+        self.model_name = ",".join(self.model_names)
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown LLM policy '{policy}', expected one of {self.POLICIES}")
+        self.policy = policy
+        self.quorum = quorum
+        self.max_cost = settings.LLM_MAX_COST_PER_DECISION if max_cost is None else max_cost
+
+        if settings.LLM_BACKEND != "mock":
+            key = api_key or settings.GEMINI_API_KEY
+            if not key:
+                print("Warning: GEMINI_API_KEY not found.")
+            else:
+                lazy_import("google.generativeai").configure(api_key=key)
+
+        self.models = [self._create_model(name) for name in self.model_names]
+        self.model = self.models[0]
+        self.fallback_model = None
+        self.generation_config = None
+        if settings.LLM_STRUCTURED_OUTPUT and settings.LLM_BACKEND != "mock":
+            self.generation_config = lazy_import("google.generativeai").GenerationConfig(response_mime_type="application/json", response_schema=DECISION_SCHEMA)
+
+    def _create_model(self, name: str):
+        if settings.LLM_BACKEND == "mock":
+            # Offline stand-in for load testing (no Google API calls)
+            mock_args = dict(latency_ms=settings.MOCK_LLM_LATENCY_MS, jitter_ms=settings.MOCK_LLM_JITTER_MS)
+            if settings.MOCK_LLM_SCRIPT:
+                return MockGenerativeModel.from_file(name, settings.MOCK_LLM_SCRIPT, **mock_args)
+            return MockGenerativeModel(name, **mock_args)
+        # Using available model from list_models.py
+        return lazy_import("google.generativeai").GenerativeModel(name)
+
+    def list_available_models(self):
+        """List available Gemini models"""
+        if settings.LLM_BACKEND == "mock":
+            return list_mock_models()
+        try:
+            # Check if configured (simple check: try to list models)
+            models = lazy_import("google.generativeai").list_models()
+            return [m.name.replace('models/', '') for m in models if 'generateContent' in m.supported_generation_methods]
+        except Exception as e:
+            print(f"Error listing models (likely API key missing/invalid): {e}")
+            # Return default models if API call fails
+            return ["gemini-2.5-flash", "gemini-pro", "gemini-1.5-pro", "gemini-1.5-flash"]
+
+    def _get_timeframe_instructions(self, tf: str) -> str:
+        """
+        Returns specific instructions based on the timeframe volatility.
+        """
+        # Normalize timeframe string
+        tf = tf.lower()
+        
+        # Low Timeframes (Scalping/Intraday)
+        if tf in ['1m', '3m', '5m', '15m']:
+            return """
+            *** AJUSTE DE VOLATILIDAD (BAJA TEMPORALIDAD) ***
+            - Estás analizando una temporalidad RÁPIDA ({tf}). La volatilidad es ALTA y el RUIDO es frecuente.
+            - PRIORIDAD: Preservación de capital sobre ganancias.
+            - Stop Loss: DEBE ser ajustado y técnico (ej. último swing high/low reciente).
+            - Confirmación: Exige cierre de vela para validar rupturas. Cuidado con los "fakeouts".
+            - Si la señal no es PERFECTA, la decisión debe ser HOLD.
+            """
+        
+        # Mid/High Timeframes (Swing/Position)
+        elif tf in ['1h', '4h', '1d', '1w']:
+            return """
+            *** ENFOQUE ESTRUCTURAL (MEDIA/ALTA TEMPORALIDAD) ***
+            - Estás analizando una temporalidad LENTA ({tf}). La tendencia tiene mayor peso.
+            - Stop Loss: Puede ser más holgado para dar "aire" al precio.
+            - Enfócate en niveles clave de Soporte/Resistencia mayores.
+            """
+            
+        return ""
+
+    def build_prompt(self, symbol: str, data_dict: dict, base_tf: str, strategy: str = "IA Driven",
+                     context_candles: int = CONTEXT_CANDLES, microstructure: dict = None) -> str:
+        """
+        Build the Multi-Timeframe analysis prompt for the selected Strategy.
+        `microstructure` (MicrostructureBook.features()) adds order book and trade flow context.
+        """
+        # Prepare data string
+        data_str = ""
+        for tf, df in data_dict.items():
+            data_str += f"\n--- Timeframe: {tf} (Last {context_candles} candles) ---\n"
+            data_str += df.tail(context_candles).to_string() + "\n"
+        if microstructure:
+            # Order flow and liquidity context (what VSA / SMC ask about and OHLCV can't show)
+            data_str += "\n--- Microestructura en tiempo real (usar para confirmar flujo y liquidez) ---\n"
+            data_str += format_features(microstructure) + "\n"
+            
+        # Strategy Definitions
+        strategies = {
+            "IA Driven": "Realiza un análisis técnico integral combinando múltiples indicadores, acción del precio y estructura de mercado.",
+            "RSI Divergence": "Céntrate EXCLUSIVAMENTE en buscar Divergencias de RSI (Regular y Oculta) en zonas de sobrecompra/sobreventa.",
+            "MACD Crossover": "Busca cruces de líneas MACD y cruces de línea cero, confirmados por volumen.",
+            "Bollinger Bands Breakout": "Busca rupturas de las Bandas de Bollinger con confirmación de volumen (Squeeze & Break).",
+            "EMA Golden Cross": "Analiza cruces de medias móviles (EMA 50/200 o 20/50) para determinar tendencia.",
+            "Fibonacci Retracement": "Identifica niveles de retroceso de Fibonacci (0.382, 0.5, 0.618) en la tendencia principal.",
+            "Ichimoku Cloud": "Utiliza la Nube de Ichimoku (Kumo) para determinar tendencia, soporte/resistencia y señales de entrada.",
+            "Price Action (S/R)": "Opera puramente basado en Soportes, Resistencias, Líneas de Tendencia y Patrones de Velas.",
+            "Volume Spread Analysis (VSA)": "Analiza la relación entre el spread de la vela y el volumen para detectar manipulación institucional.",
+            "Elliott Wave Theory": "Identifica en qué onda de Elliott se encuentra el mercado (Impulso 1-5 o Corrección A-B-C).",
+            "Wyckoff Method": "Identifica fases de Acumulación o Distribución según la metodología Wyckoff.",
+            "Smart Money Concepts (SMC)": "Busca Order Blocks, Fair Value Gaps (FVG) y Liquidez (Buy/Sell Side Liquidity)."
+        }
+        
+        selected_instruction = strategies.get(strategy, strategies["IA Driven"])
+        
+        prompt = f"""
+        Actúa como un experto analista de trading de criptomonedas institucional. 
+        Realiza un análisis técnico para {symbol} utilizando la estrategia: **{strategy}**.
+        
+        Instrucción de Estrategia:
+        {selected_instruction}
+        
+        Contexto Multi-Timeframe:
+        1. Identificar la TENDENCIA MACRO usando las temporalidades mayores.
+        2. Buscar patrones de entrada precisos en la temporalidad base ({base_tf}).
+        
+        {self._get_timeframe_instructions(base_tf)}
+        
+        Datos de Mercado:
+        {data_str}
+        
+        Reglas de Gestión:
+        - Solo opera si la estrategia da una señal CLARA.
+        - Define Stop Loss y Take Profit lógicos.
+        - Calcula un nivel de confianza (0.0 - 1.0).
+        
+        Proporciona tu decisión EXCLUSIVAMENTE en formato JSON con estas claves:
+        {{
+            "action": "BUY" | "SELL" | "HOLD",
+            "confidence": float,
+            "entry_price": float (precio actual aproximado),
+            "stop_loss": float,
+            "take_profit": float,
+            "reasoning": "Explicación concisa en español enfocada en {strategy}"
+        }}
+        """
+        return prompt
+
+    async def analyze_market(self, symbol: str, data_dict: dict, base_tf: str, strategy: str = "IA Driven",
+                             usage: list = None, economy: bool = False, microstructure: dict = None):
+        """
+        Analyze market data using Gemini with Multi-Timeframe context and specific Strategy.
+        Returns a validated TradeDecision, or None. Each completed model call appends its
+        token usage to `usage`, if given (see summarize_usage).
+        """
+        if economy:
+            prompt = self.build_prompt(symbol, data_dict, base_tf, strategy, settings.LLM_BUDGET_CONTEXT_CANDLES, microstructure)
+            models = [(settings.LLM_BUDGET_FALLBACK_MODEL, self._fallback())]
+        else:
+            prompt = self.build_prompt(symbol, data_dict, base_tf, strategy, microstructure=microstructure)
+            models = self._models_within_budget(prompt)
+        usage = [] if usage is None else usage
+        if len(models) == 1:
+            return parse_decision(await self._generate(*models[0], prompt, usage))
+        if self.policy == "vote":
+            return await self._vote(models, prompt, usage)
+        return await self._first_valid(models, prompt, usage)
+
+    def _fallback(self):
+        if self.fallback_model is None:
+            self.fallback_model = self._create_model(settings.LLM_BUDGET_FALLBACK_MODEL)
+        return self.fallback_model
+
+    async def _generate(self, name: str, model, prompt: str, usage: list):
+        try:
+            # Async call so concurrent analyses (parallel backtests) don't block the event loop
+            with instrument(LLM_LATENCY, LLM_ERRORS, model=name):
+                if self.generation_config:
+                    response = await model.generate_content_async(prompt, generation_config=self.generation_config)
+                else:
+                    response = await model.generate_content_async(prompt)
+            usage.append(self._usage(name, prompt, response))
+            return response.text
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error analyzing market ({name}): {e}")
+            return None
+
+    @staticmethod
+    def _usage(name: str, prompt: str, response) -> dict:
+        """Token counts reported by the API (estimated from text length when missing) and their cost"""
+        metadata = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(metadata, "prompt_token_count", None) or len(prompt) // 4
+        output_tokens = getattr(metadata, "candidates_token_count", None)
+        if output_tokens is None:
+            try:
+                output_tokens = len(response.text or "") // 4
+            except Exception:  # Blocked/empty candidates raise on .text
+                output_tokens = 0
+        cost = token_cost(name, prompt_tokens, output_tokens)
+        LLM_TOKENS.inc(prompt_tokens, model=name, kind="prompt")
+        LLM_TOKENS.inc(output_tokens, model=name, kind="output")
+        LLM_COST.inc(cost, model=name)
+        return {"model": name, "prompt_tokens": prompt_tokens, "output_tokens": output_tokens, "cost_usd": cost}
+
+    def estimate_cost(self, name: str, prompt: str) -> float:
+        return token_cost(name, len(prompt) // 4, EXPECTED_OUTPUT_TOKENS)
+
+    def _models_within_budget(self, prompt: str) -> list:
+        """(name, model) pairs in configured order while the estimated total stays under max_cost (at least one)"""
+        selected, total = [], 0.0
+        for name, model in zip(self.model_names, self.models):
+            cost = self.estimate_cost(name, prompt)
+            if selected and self.max_cost and total + cost > self.max_cost:
+                break
+            selected.append((name, model))
+            total += cost
+        return selected
+
+    async def _first_valid(self, models: list, prompt: str, usage: list):
+        tasks = [asyncio.create_task(self._generate(name, model, prompt, usage)) for name, model in models]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                decision = parse_decision(await next_done)
+                if decision:
+                    return decision
+            return None
+        finally:
+            self._cancel(tasks)
+
+    async def _vote(self, models: list, prompt: str, usage: list):
+        quorum = min(self.quorum or len(models), len(models))
+        tasks = [asyncio.create_task(self._generate(name, model, prompt, usage)) for name, model in models]
+        decisions = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                decision = parse_decision(await next_done)
+                if decision:
+                    decisions.append(decision)
+                    if len(decisions) >= quorum:
+                        break
+        finally:
+            self._cancel(tasks)
+        if not decisions:
+            return None
+        return self.combine_votes(decisions)
+
+    @staticmethod
+    def combine_votes(decisions: list) -> TradeDecision:
+        """
+        Confidence-weighted vote. The combined confidence is the winners' confidence sum over
+        all voters, so disagreement lowers it; price levels are the winners' medians.
+        """
+        scores = {}
+        for d in decisions:
+            scores[d.action] = scores.get(d.action, 0.0) + d.confidence
+        action = max(scores, key=scores.get)
+        winners = [d for d in decisions if d.action == action]
+
+        def median(key):
+            values = sorted(getattr(d, key) for d in winners if getattr(d, key) is not None)
+            if not values:
+                return None
+            mid = len(values) // 2
+            return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+        best = max(winners, key=lambda d: d.confidence)
+        tally = ", ".join(f"{a} {sum(1 for d in decisions if d.action == a)}" for a in scores)
+        return TradeDecision(
+            action=action,
+            confidence=round(scores[action] / len(decisions), 4),
+            entry_price=median('entry_price'),
+            stop_loss=median('stop_loss'),
+            take_profit=median('take_profit'),
+            reasoning=f"{best.reasoning} [Ensemble: {tally}]"
+        )
+
+    def _cancel(self, tasks: list):
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+                LLM_CANCELLED.inc()
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from app.core.clock import clock
+from app.core.config import settings
+from app.core.startup import lazy_import
+
+STREAM_URLS = {  # (market type, testnet) -> combined stream endpoint
+    ("future", False): "wss://fstream.binance.com/stream?streams=",
+    ("future", True): "wss://stream.binancefuture.com/stream?streams=",
+    ("spot", False): "wss://stream.binance.com:9443/stream?streams=",
+    ("spot", True): "wss://testnet.binance.vision/stream?streams=",
+}
+LOCAL_POLL_SECONDS = 1.0  # Simulated seconds between batches from in-process exchanges
+
+def stream_id(symbol: str) -> str:
+    """BTC/USDT -> btcusdt (stream names use the lowercase market id)"""
+    return symbol.split(':')[0].replace('/', '').lower()
+
+class MarketDataStream:
+    """
+    Partial depth (top MICROSTRUCTURE_DEPTH_LEVELS, 100ms) and aggregated trades for a set of
+    symbols over one combined websocket, applied to their MicrostructureBook. Reconnects with
+    backoff; the books go stale (features() returns None) while the stream is down.
+    """
+    def __init__(self, binance, books: dict):
+        self.binance = binance
+        self.books = {stream_id(symbol): book for symbol, book in books.items()}
+        self.connected = False
+        self._task = None
+
+    @property
+    def streams(self) -> list:
+        levels = settings.MICROSTRUCTURE_DEPTH_LEVELS
+        return [f"{sid}@{kind}" for sid in self.books for kind in (f"depth{levels}@100ms", "aggTrade")]
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.connected = False
+
+    def _dispatch(self, message: dict):
+        """Apply one combined-stream message ({"stream": ..., "data": ...})"""
+        name, data = message.get('stream', ''), message.get('data') or {}
+        book = self.books.get(name.split('@')[0])
+        if book is None:
+            return
+        if '@depth' in name:
+            # Futures payloads use b/a and carry event time; spot partial depth uses bids/asks
+            book.on_depth(data.get('E') or clock.milliseconds(), data.get('b') or data.get('bids') or [], data.get('a') or data.get('asks') or [])
+        elif name.endswith('@aggTrade'):
+            book.on_trade(data['T'], float(data['p']), float(data['q']), data['m'])
+
+    async def _run(self):
+        exchange = self.binance.exchange
+        if hasattr(exchange, 'market_stream_messages'):
+            return await self._run_local(exchange)
+
+        aiohttp = lazy_import("aiohttp")
+        url = STREAM_URLS[(exchange.options.get('defaultType', 'future'), settings.BINANCE_TESTNET)] + "/".join(self.streams)
+        backoff = 1
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(url, heartbeat=60) as ws:
+                        self.connected = True
+                        backoff = 1
+                        async for msg in ws:
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            self._dispatch(json.loads(msg.data))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Market data stream error: {e}")
+            finally:
+                self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _run_local(self, exchange):
+        """In-process exchanges (mock backend) synthesize the same messages on demand"""
+        self.connected = True
+        try:
+            while True:
+                for message in exchange.market_stream_messages(self.streams):
+                    self._dispatch(message)
+                await clock.sleep(LOCAL_POLL_SECONDS)
+        finally:
+            self.connected = False
@@ -0,0 +1,385 @@
+import asyncio
+import math
+import os
+import zlib
+import numpy as np
+from app.core.clock import clock
+from app.core.config import settings
+
+DEFAULT_SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'XRP/USDT']
+_BASE_PRICES = {'BTC': 60000.0, 'ETH': 3000.0, 'BNB': 550.0, 'SOL': 150.0, 'XRP': 0.6}
+_TF_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000}
+SAMPLES_PER_CANDLE = 16
+
+def _rows(columns: list) -> list:
+    """ccxt OHLCV layout: [[ms_int, open, high, low, close, volume], ...]"""
+    rows = np.column_stack(columns).tolist()
+    for row in rows:
+        row[0] = int(row[0])
+    return rows
+
+class SyntheticCandles:
+    """
+    Deterministic price path (a sum of seeded sine waves) that can be evaluated at any timestamp,
+    so any timeframe and range costs O(limit) without storing history.
+    """
+    def __init__(self, symbol: str):
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        self.base_price = _BASE_PRICES.get(symbol.split('/')[0], float(rng.uniform(1, 100)))
+        # (amplitude, period in minutes) from weekly swings down to tick noise
+        self.waves = [(0.08, 60 * 24 * 7), (0.03, 60 * 24), (0.01, 240), (0.003, 17), (0.002, 3.1)]
+        self.phases = rng.uniform(0, 2 * np.pi, len(self.waves))
+        self.base_volume = float(rng.uniform(50, 500))
+
+    def price_at(self, ms):
+        minutes = np.asarray(ms, dtype=np.float64) / 60000.0
+        x = sum(a * np.sin(2 * np.pi * minutes / p + phi) for (a, p), phi in zip(self.waves, self.phases))
+        return self.base_price * np.exp(x)
+
+    def ohlcv(self, tf_ms: int, starts: np.ndarray, now_ms: int) -> list:
+        ends = np.minimum(starts + tf_ms, now_ms)
+        offsets = np.linspace(0.0, 1.0, SAMPLES_PER_CANDLE)
+        samples = self.price_at(starts[:, None] + (ends - starts)[:, None] * offsets)
+        volume = self.base_volume * (tf_ms / 60000.0) * (1 + np.abs(np.sin(starts / 3.7e6)))
+        return _rows([starts, samples[:, 0], samples.max(axis=1), samples.min(axis=1), samples[:, -1], volume])
+
+class RecordedCandles:
+    """
+    Replays recorded base candles (CSV: timestamp,open,high,low,close,volume) shifted so that
+    the recording continues from 'now'. Higher timeframes are aggregated from the base candles.
+    """
+    def __init__(self, path: str, origin_ms: int):
+        import pandas as pd
+        df = pd.read_csv(path)
+        self.ts = df['timestamp'].to_numpy(dtype=np.int64)
+        self.o, self.h, self.l, self.c, self.v = (df[k].to_numpy(dtype=np.float64) for k in ['open', 'high', 'low', 'close', 'volume'])
+        # Keep some recorded history before the replay point
+        replay_index = min(1000, len(self.ts) // 2)
+        self.ts = self.ts + (origin_ms - self.ts[replay_index])
+
+    def price_at(self, ms):
+        idx = np.clip(np.searchsorted(self.ts, ms, side='right') - 1, 0, len(self.ts) - 1)
+        return self.c[idx]
+
+    def ohlcv(self, tf_ms: int, starts: np.ndarray, now_ms: int) -> list:
+        lo = np.searchsorted(self.ts, starts[0], side='left')
+        hi = np.searchsorted(self.ts, min(starts[-1] + tf_ms, now_ms + 1), side='left')
+        if hi <= lo:
+            return []
+        bucket = (self.ts[lo:hi] - starts[0]) // tf_ms
+        first = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        last = np.r_[first[1:], hi - lo] - 1
+        return _rows([
+            starts[0] + bucket[first] * tf_ms,
+            self.o[lo:hi][first],
+            np.maximum.reduceat(self.h[lo:hi], first),
+            np.minimum.reduceat(self.l[lo:hi], first),
+            self.c[lo:hi][last],
+            np.add.reduceat(self.v[lo:hi], first)
+        ])
+
+class MockExchange:
+    """
+    In-process stand-in for a ccxt async exchange (the subset used by BinanceAgent).
+    Replays recorded or synthetic candles on the shared `clock`, fills market orders at the
+    current price, matches resting limit/stop/take-profit orders lazily and tracks net positions.
+    """
+    def __init__(self, market_type: str = 'future', candles_dir: str = None, balance: float = 10000.0,
+                 fee_rate: float = 0.0004, latency_ms: float = 0.0):
+        self.options = {'defaultType': market_type}
+        self.markets = {}
+        self.candles_dir = candles_dir
+        self.fee_rate = fee_rate
+        self.latency_ms = latency_ms
+        self._origin_ms = clock.milliseconds()
+        self._sources = {}
+        self._cash = balance
+        self._positions = {}  # symbol -> {'qty': signed float, 'entry_price': float}
+        self._orders = {}
+        self._fills = []
+        self._listeners = []
+        self._next_id = 1
+        self._stream_cursors = {}  # Market stream name -> time of the last batch
+        self._rng = np.random.default_rng(0)
+
+    # --- Helpers ---
+    @staticmethod
+    def parse_timeframe(timeframe: str) -> int:
+        return int(timeframe[:-1]) * _TF_SECONDS[timeframe[-1]]
+
+    def milliseconds(self) -> int:
+        return clock.milliseconds()
+
+    def set_sandbox_mode(self, enabled: bool):
+        pass
+
+    def amount_to_precision(self, symbol: str, amount: float) -> str:
+        return f"{math.floor(float(amount) * 1000) / 1000:.3f}"
+
+    def price_to_precision(self, symbol: str, price: float) -> str:
+        return f"{float(price):.4f}"
+
+    async def _latency(self):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def _source(self, symbol: str):
+        if symbol not in self._sources:
+            path = os.path.join(self.candles_dir, symbol.replace('/', '_') + '.csv') if self.candles_dir else None
+            self._sources[symbol] = RecordedCandles(path, self._origin_ms) if path and os.path.exists(path) else SyntheticCandles(symbol)
+        return self._sources[symbol]
+
+    def _price(self, symbol: str) -> float:
+        return float(self._source(symbol).price_at(clock.milliseconds()))
+
+    # --- Market data ---
+    async def load_markets(self, reload: bool = False):
+        await self._latency()
+        symbols = DEFAULT_SYMBOLS
+        if self.candles_dir and os.path.isdir(self.candles_dir):
+            symbols = [f[:-4].replace('_', '/') for f in sorted(os.listdir(self.candles_dir)) if f.endswith('.csv')] or symbols
+        self.markets = {
+            s: {'symbol': s, 'base': s.split('/')[0], 'quote': s.split('/')[1], 'active': True,
+                'type': 'swap' if self.options['defaultType'] == 'future' else 'spot',
+                'precision': {'amount': 0.001, 'price': 0.0001}, 'limits': {'amount': {'min': 0.001}}}
+            for s in symbols
+        }
+        return self.markets
+
+    def set_markets(self, markets: dict, currencies: dict = None):
+        self.markets = markets
+        return self.markets
+
+    async def fetch_time(self) -> int:
+        await self._latency()
+        return clock.milliseconds()
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: int = None, limit: int = None, params: dict = None):
+        await self._latency()
+        tf_ms = self.parse_timeframe(timeframe) * 1000
+        now = clock.milliseconds()
+        limit = limit or 500
+        if since is None:
+            start = (now // tf_ms - (limit - 1)) * tf_ms
+        else:
+            start = -(-since // tf_ms) * tf_ms
+        starts = np.arange(start, min(start + limit * tf_ms, now + 1), tf_ms, dtype=np.int64)
+        if starts.size == 0:
+            return []
+        self._match_orders(symbol)
+        return self._source(symbol).ohlcv(tf_ms, starts, now)
+
+    async def fetch_ticker(self, symbol: str, params: dict = None):
+        await self._latency()
+        self._match_orders(symbol)
+        now = clock.milliseconds()
+        price = self._price(symbol)
+        day_ago = float(self._source(symbol).price_at(now - 86400000))
+        day = self._source(symbol).ohlcv(86400000, np.array([now - 86400000]), now)
+        spread = price * 0.0001
+        return {'symbol': symbol, 'timestamp': now, 'last': price, 'close': price, 'bid': price - spread,
+                'ask': price + spread, 'open': day_ago, 'percentage': (price / day_ago - 1) * 100,
+                'quoteVolume': day[0][5] * price if day else 0.0}
+
+    async def fetch_tickers(self, symbols: list = None, params: dict = None):
+        if not self.markets:
+            await self.load_markets()
+        return {s: await self.fetch_ticker(s) for s in (symbols or list(self.markets))}
+
+    # --- Market streams ---
+    def market_stream_messages(self, streams: list) -> list:
+        """
+        Combined-stream messages (Binance payload shapes) for `<id>@depth<N>@100ms` and `<id>@aggTrade`
+        since the last call: trades along the price path (aggressive sells on down-ticks) and a book
+        around the current price, with an occasional outsized level.
+        """
+        now = clock.milliseconds()
+        ids = {s.replace('/', '').lower(): s for s in (self.markets or DEFAULT_SYMBOLS)}
+        messages = []
+        for name in streams:
+            sid, kind = name.split('@', 1)
+            if sid not in ids:
+                continue
+            source, price = self._source(ids[sid]), self._price(ids[sid])
+            base_qty = 2000.0 / price  # ~2000 USDT per trade/level
+            if kind.startswith('depth'):
+                levels = int(kind[len('depth'):].split('@')[0])
+                tick = price * 0.0001
+                bid_qty = self._rng.exponential(base_qty, levels)
+                ask_qty = self._rng.exponential(base_qty, levels)
+                if self._rng.random() < 0.2:
+                    (bid_qty if self._rng.random() < 0.5 else ask_qty)[self._rng.integers(levels)] *= 10
+                bids = [[f"{price - tick * (k + 0.5):.4f}", f"{q:.3f}"] for k, q in enumerate(bid_qty)]
+                asks = [[f"{price + tick * (k + 0.5):.4f}", f"{q:.3f}"] for k, q in enumerate(ask_qty)]
+                messages.append({'stream': name, 'data': {'e': 'depthUpdate', 'E': now, 'b': bids, 'a': asks}})
+            elif kind == 'aggTrade':
+                since = self._stream_cursors.get(name, now - 1000)
+                self._stream_cursors[name] = now
+                count = int(min(50, max(1, (now - since) // 200)))  # ~5 trades per second
+                times = np.linspace(since, now, count + 1)[1:].astype(np.int64)
+                prices = source.price_at(times)
+                down = prices < source.price_at(times - 200)
+                for t, p, q, m in zip(times, prices, self._rng.exponential(base_qty, count), down):
+                    messages.append({'stream': name, 'data': {'e': 'aggTrade', 'T': int(t), 'p': f"{p:.4f}", 'q': f"{q:.3f}", 'm': bool(m)}})
+        return messages
+
+    # --- Account ---
+    async def fetch_balance(self, params: dict = None):
+        await self._latency()
+        unrealized = sum((self._price(s) - p['entry_price']) * p['qty'] for s, p in self._positions.items())
+        used = sum(abs(p['qty']) * p['entry_price'] for p in self._positions.values())
+        total = self._cash + unrealized
+        usdt = {'free': total - used, 'used': used, 'total': total}
+        return {'USDT': usdt, 'free': {'USDT': usdt['free']}, 'used': {'USDT': used}, 'total': {'USDT': total}}
+
+    async def fetch_positions(self, symbols: list = None, params: dict = None):
+        await self._latency()
+        result = []
+        for symbol in (symbols or list(self._positions)):
+            self._match_orders(symbol)
+            pos = self._positions.get(symbol)
+            if not pos or pos['qty'] == 0:
+                continue
+            mark = self._price(symbol)
+            result.append({
+                'symbol': symbol, 'contracts': abs(pos['qty']), 'contractSize': 1,
+                'side': 'long' if pos['qty'] > 0 else 'short', 'entryPrice': pos['entry_price'], 'markPrice': mark,
+                'unrealizedPnl': (mark - pos['entry_price']) * pos['qty'],
+                'info': {'symbol': symbol.replace('/', ''), 'positionAmt': str(pos['qty']), 'entryPrice': str(pos['entry_price'])}
+            })
+        return result
+
+    async def set_leverage(self, leverage: int, symbol: str = None, params: dict = None):
+        return {'leverage': leverage, 'symbol': symbol}
+
+    # --- Orders ---
+    async def create_order(self, symbol: str, type: str, side: str, amount, price: float = None, params: dict = None):
+        await self._latency()
+        params = params or {}
+        order = {
+            'id': str(self._next_id), 'clientOrderId': params.get('newClientOrderId'), 'symbol': symbol,
+            'type': type.lower(), 'side': side.lower(), 'amount': float(amount), 'price': price,
+            'stopPrice': float(params['stopPrice']) if params.get('stopPrice') is not None else None,
+            'reduceOnly': bool(params.get('reduceOnly')),
+            'status': 'open', 'filled': 0.0, 'average': None, 'timestamp': clock.milliseconds(), 'info': {}
+        }
+        self._next_id += 1
+        self._orders[order['id']] = order
+        if order['type'] == 'market':
+            self._fill(order, self._price(symbol))
+        else:
+            self._match_orders(symbol)
+        return dict(order)
+
+    async def cancel_order(self, id: str, symbol: str = None, params: dict = None):
+        order = self._orders.get(str(id))
+        if order and order['status'] == 'open':
+            order['status'] = 'canceled'
+            self._emit_order_update(order)
+        return dict(order) if order else None
+
+    async def fetch_order(self, id: str, symbol: str = None, params: dict = None):
+        order = self._orders.get(str(id))
+        return dict(order) if order else None
+
+    async def fetch_open_orders(self, symbol: str = None, since: int = None, limit: int = None, params: dict = None):
+        return [dict(o) for o in self._orders.values() if o['status'] == 'open' and (symbol is None or o['symbol'] == symbol)]
+
+    async def fetch_my_trades(self, symbol: str = None, since: int = None, limit: int = None, params: dict = None):
+        fills = [f for f in self._fills if (symbol is None or f['symbol'] == symbol) and (since is None or f['timestamp'] >= since)]
+        return fills[-limit:] if limit else fills
+
+    def _match_orders(self, symbol: str):
+        """Trigger resting orders whose condition is met at the current price"""
+        price = self._price(symbol)
+        for order in [o for o in self._orders.values() if o['symbol'] == symbol and o['status'] == 'open']:
+            buy = order['side'] == 'buy'
+            if order['type'] == 'limit':
+                hit = price <= order['price'] if buy else price >= order['price']
+                fill_price = order['price']
+            elif order['type'] in ('stop_market', 'stop'):
+                hit = price >= order['stopPrice'] if buy else price <= order['stopPrice']
+                fill_price = price
+            elif order['type'] in ('take_profit_market', 'take_profit'):
+                hit = price <= order['stopPrice'] if buy else price >= order['stopPrice']
+                fill_price = price
+            else:
+                hit = False
+            if hit:
+                self._fill(order, fill_price)
+
+    def _fill(self, order: dict, price: float):
+        symbol = order['symbol']
+        pos = self._positions.setdefault(symbol, {'qty': 0.0, 'entry_price': 0.0})
+        qty = order['amount']
+        if order['reduceOnly']:
+            # Reduce-only never flips or opens a position
+            opposite = (pos['qty'] > 0 and order['side'] == 'sell') or (pos['qty'] < 0 and order['side'] == 'buy')
+            qty = min(qty, abs(pos['qty'])) if opposite else 0.0
+            if qty == 0:
+                order['status'] = 'canceled'
+                self._emit_order_update(order)
+                return
+        signed = qty if order['side'] == 'buy' else -qty
+
+        realized = 0.0
+        if pos['qty'] == 0 or (pos['qty'] > 0) == (signed > 0):
+            new_qty = pos['qty'] + signed
+            pos['entry_price'] = (pos['entry_price'] * pos['qty'] + price * signed) / new_qty
+            pos['qty'] = new_qty
+        else:
+            closed = min(abs(signed), abs(pos['qty']))
+            realized = (price - pos['entry_price']) * closed * (1 if pos['qty'] > 0 else -1)
+            pos['qty'] += signed
+            if abs(pos['qty']) < 1e-12:
+                pos['qty'] = 0.0
+            elif (pos['qty'] > 0) == (signed > 0):
+                pos['entry_price'] = price  # Flipped through zero
+
+        fee = price * qty * self.fee_rate
+        self._cash += realized - fee
+        order.update({'status': 'closed', 'filled': qty, 'average': price})
+        self._fills.append({
+            'id': str(len(self._fills) + 1), 'order': order['id'], 'symbol': symbol, 'side': order['side'],
+            'price': price, 'amount': qty, 'cost': price * qty, 'timestamp': clock.milliseconds(),
+            'fee': {'cost': fee, 'currency': 'USDT'}, 'info': {'realizedPnl': str(realized)}
+        })
+        self._emit_order_update(order, realized, fee)
+
+    # --- User data stream ---
+    def subscribe_user_stream(self, callback):
+        """Register a callback for raw ORDER_TRADE_UPDATE messages (Binance futures payload shape)"""
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+
+    def _emit_order_update(self, order: dict, realized: float = 0.0, fee: float = 0.0):
+        if not self._listeners:
+            return
+        now = clock.milliseconds()
+        message = {
+            'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now,
+            'o': {
+                's': order['symbol'].replace('/', ''), 'c': order['clientOrderId'], 'S': order['side'].upper(),
+                'o': order['type'].upper(), 'X': {'closed': 'FILLED'}.get(order['status'], order['status'].upper()),
+                'i': int(order['id']), 'ap': str(order['average'] or 0), 'z': str(order['filled']),
+                'sp': str(order['stopPrice'] or 0), 'R': order['reduceOnly'], 'rp': str(realized), 'n': str(fee), 'T': now
+            }
+        }
+        for callback in list(self._listeners):
+            callback(message)
+
+    async def close(self):
+        pass
+
+_shared = {}
+
+def get_mock_exchange(market_type: str = 'future', api_key: str = None) -> MockExchange:
+    """
+    One simulator per market type and API key (account), shared by every agent in the process
+    using it (same positions/orders). Prices are the same for all accounts.
+    """
+    key = (market_type, api_key)
+    if key not in _shared:
+        _shared[key] = MockExchange(market_type, candles_dir=settings.MOCK_CANDLES_DIR,
+                                    latency_ms=settings.MOCK_EXCHANGE_LATENCY_MS)
+    return _shared[key]
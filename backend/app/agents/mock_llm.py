@@ -0,0 +1,90 @@
+import json
+import random
+import re
+import zlib
+from app.core.clock import clock
+
+_DATA_ROW = re.compile(r'^\s*\d+\s+\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\s+(.+)$')
+
+class MockUsage:
+    def __init__(self, prompt: str, text: str):
+        # Rough 4-characters-per-token estimate
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+class MockResponse:
+    def __init__(self, prompt: str, text: str):
+        self.text = text
+        self.usage_metadata = MockUsage(prompt, text)
+
+class MockGenerativeModel:
+    """
+    Offline stand-in for genai.GenerativeModel.
+    Replies either from a script (cycled) or with a deterministic momentum rule on the base
+    timeframe candles found in the prompt, after a configurable (clock-scaled) latency.
+    """
+    def __init__(self, model_name: str = "mock", latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 script: list = None, fail_rate: float = 0.0, seed: int = None):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.script = script
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_file(cls, model_name: str, path: str, **kwargs):
+        with open(path) as f:
+            return cls(model_name, script=json.load(f), **kwargs)
+
+    async def generate_content_async(self, prompt: str, **kwargs) -> MockResponse:
+        delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+        if delay:
+            await clock.sleep(delay / 1000)
+        return self.generate_content(prompt)
+
+    def generate_content(self, prompt: str, **kwargs) -> MockResponse:
+        self.calls += 1
+        if self.fail_rate and self._rng.random() < self.fail_rate:
+            return MockResponse(prompt, "Lo siento, no puedo completar el análisis en este momento.")
+        if self.script:
+            reply = self.script[(self.calls - 1) % len(self.script)]
+            return MockResponse(prompt, reply if isinstance(reply, str) else json.dumps(reply))
+        return MockResponse(prompt, "```json\n" + json.dumps(self._decide(prompt)) + "\n```")
+
+    def _decide(self, prompt: str) -> dict:
+        closes = self._base_closes(prompt)
+        if len(closes) < 2:
+            return {"action": "HOLD", "confidence": 0.5, "entry_price": None, "stop_loss": None,
+                    "take_profit": None, "reasoning": "Datos insuficientes (mock)."}
+
+        change = closes[-1] / closes[0] - 1
+        price = closes[-1]
+        # Deterministic per prompt, so replays are reproducible
+        confidence = 0.6 + (zlib.crc32(prompt.encode()) % 36) / 100
+        if change > 0.003:
+            action, sl, tp = "BUY", price * 0.98, price * 1.04
+        elif change < -0.003:
+            action, sl, tp = "SELL", price * 1.02, price * 0.96
+        else:
+            action, sl, tp = "HOLD", None, None
+        return {"action": action, "confidence": round(confidence, 2), "entry_price": price, "stop_loss": sl,
+                "take_profit": tp, "reasoning": f"Momentum {change * 100:.2f}% en la temporalidad base (mock)."}
+
+    @staticmethod
+    def _base_closes(prompt: str) -> list:
+        """Close column of the first timeframe table in the prompt"""
+        closes = []
+        for line in prompt.splitlines():
+            if '--- Timeframe:' in line and closes:
+                break
+            match = _DATA_ROW.match(line)
+            if match:
+                cols = match.group(1).split()
+                closes.append(float(cols[3]))
+        return closes
+
+def list_mock_models() -> list:
+    return ["mock-fast", "mock-slow"]
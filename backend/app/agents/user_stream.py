@@ -0,0 +1,115 @@
+import asyncio
+import json
+from app.core.config import settings
+from app.core.startup import lazy_import
+
+FUTURES_WS_URL = "wss://fstream.binance.com/ws/"
+FUTURES_TESTNET_WS_URL = "wss://stream.binancefuture.com/ws/"
+KEEPALIVE_SECONDS = 30 * 60  # Listen keys expire after 60 minutes without a keepalive
+
+def parse_order_update(message: dict):
+    """Normalize a futures ORDER_TRADE_UPDATE message; None for any other event"""
+    if message.get('e') != 'ORDER_TRADE_UPDATE':
+        return None
+    o = message['o']
+    return {
+        "order_id": str(o['i']),
+        "client_order_id": o.get('c'),
+        "symbol": o['s'],  # Exchange id, e.g. BTCUSDT
+        "side": o['S'],
+        "type": o['o'],
+        "status": o['X'],  # NEW, PARTIALLY_FILLED, FILLED, CANCELED, EXPIRED
+        "avg_price": float(o.get('ap') or 0),
+        "filled": float(o.get('z') or 0),
+        "realized_pnl": float(o.get('rp') or 0),
+        "commission": float(o.get('n') or 0),
+        "time": o.get('T') or message.get('E')
+    }
+
+class UserDataStream:
+    """
+    Binance futures user data stream: pushes order updates to `on_order_update(update)` as they
+    happen, so fills don't have to be discovered by polling. Reconnects with backoff;
+    `connected` is False while the stream is down (callers fall back to polling then).
+    """
+    def __init__(self, binance, on_order_update):
+        self.binance = binance
+        self.on_order_update = on_order_update
+        self.connected = False
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.connected = False
+
+    async def _dispatch(self, message: dict):
+        update = parse_order_update(message)
+        if update is None:
+            return
+        try:
+            await self.on_order_update(update)
+        except Exception as e:
+            print(f"Error handling order update {update['order_id']}: {e}")
+
+    async def _run(self):
+        exchange = self.binance.exchange
+        if hasattr(exchange, 'subscribe_user_stream'):
+            return await self._run_local(exchange)
+
+        aiohttp = lazy_import("aiohttp")
+        backoff = 1
+        while True:
+            try:
+                listen_key = (await exchange.fapiPrivatePostListenKey())['listenKey']
+                url = (FUTURES_TESTNET_WS_URL if settings.BINANCE_TESTNET else FUTURES_WS_URL) + listen_key
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(url, heartbeat=60) as ws:
+                        self.connected = True
+                        backoff = 1
+                        keepalive = asyncio.create_task(self._keepalive(exchange))
+                        try:
+                            async for msg in ws:
+                                if msg.type != aiohttp.WSMsgType.TEXT:
+                                    break
+                                message = json.loads(msg.data)
+                                if message.get('e') == 'listenKeyExpired':
+                                    break
+                                await self._dispatch(message)
+                        finally:
+                            keepalive.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"User data stream error: {e}")
+            finally:
+                self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _keepalive(self, exchange):
+        while True:
+            await asyncio.sleep(KEEPALIVE_SECONDS)
+            try:
+                await exchange.fapiPrivatePutListenKey()
+            except Exception as e:
+                print(f"Failed to keep user data stream alive: {e}")
+
+    async def _run_local(self, exchange):
+        """In-process exchanges (mock backend) push the same messages through a callback"""
+        queue = asyncio.Queue()
+        unsubscribe = exchange.subscribe_user_stream(queue.put_nowait)
+        self.connected = True
+        try:
+            while True:
+                await self._dispatch(await queue.get())
+        finally:
+            self.connected = False
+            unsubscribe()
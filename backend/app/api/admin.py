@@ -0,0 +1,61 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.profiler import cpu_profiler, memory_tracker
+
+# Only mounted when ENABLE_PROFILING is set (see app.main)
+router = APIRouter()
+
+@router.post("/profile/cpu", response_class=PlainTextResponse)
+async def profile_cpu(seconds: float = Query(10, gt=0, le=300), interval_ms: float = Query(5, ge=1, le=1000)):
+    """
+    Sample the running process for `seconds` and return collapsed stacks
+    (pipe into flamegraph.pl or open in speedscope).
+    """
+    if cpu_profiler.running:
+        raise HTTPException(status_code=409, detail="A CPU profile is already running")
+    cpu_profiler.interval = interval_ms / 1000
+    cpu_profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        output = cpu_profiler.stop()
+    return PlainTextResponse(output)
+
+@router.post("/profile/cpu/start")
+async def start_cpu_profile(interval_ms: float = Query(5, ge=1, le=1000)):
+    """Start an open-ended CPU profile; collect it with /profile/cpu/stop"""
+    if cpu_profiler.running:
+        raise HTTPException(status_code=409, detail="A CPU profile is already running")
+    cpu_profiler.interval = interval_ms / 1000
+    cpu_profiler.start()
+    return {"status": "started", "interval_ms": interval_ms}
+
+@router.post("/profile/cpu/stop", response_class=PlainTextResponse)
+async def stop_cpu_profile():
+    if not cpu_profiler.running:
+        raise HTTPException(status_code=409, detail="No CPU profile is running")
+    return PlainTextResponse(cpu_profiler.stop())
+
+@router.post("/profile/memory/start")
+async def start_memory_tracking(frames: int = Query(10, ge=1, le=50)):
+    """Start tracemalloc and take the baseline snapshot"""
+    if memory_tracker.running:
+        raise HTTPException(status_code=409, detail="Memory tracking is already running")
+    memory_tracker.start(frames)
+    return {"status": "started", "frames": frames}
+
+@router.get("/profile/memory/diff")
+def memory_diff(limit: int = Query(25, ge=1, le=500), group_by: str = Query("lineno", pattern="^(lineno|traceback|filename)$")):
+    """Allocation growth since the baseline, largest first"""
+    if not memory_tracker.running:
+        raise HTTPException(status_code=409, detail="Memory tracking is not running")
+    return memory_tracker.diff(limit, group_by)
+
+@router.post("/profile/memory/stop")
+async def stop_memory_tracking():
+    """Stop tracemalloc (it slows allocations while active)"""
+    if not memory_tracker.running:
+        raise HTTPException(status_code=409, detail="Memory tracking is not running")
+    memory_tracker.stop()
+    return {"status": "stopped"}
@@ -1,113 +1,159 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.database import Trade, GeminiDecision, Configuration
-from typing import List, Optional
-from pydantic import BaseModel
-from datetime import datetime
-from fastapi import APIRouter
-
-router = APIRouter()
-
-class TradeResponse(BaseModel):
-    id: int
-    symbol: str
-    action: str
-    amount: Optional[float] = None
-    entry_price: float
-    entry_time: datetime
-    exit_price: Optional[float] = None
-    exit_time: Optional[datetime] = None
-    profit_loss: Optional[float] = None
-    status: str
-    confidence: Optional[float] = None
-    stop_loss: Optional[float] = None
-    take_profit: Optional[float] = None
-    is_simulation: bool = False
-    
-    class Config:
-        from_attributes = True
-
-class DecisionResponse(BaseModel):
-    id: int
-    timestamp: datetime
-    symbol: str
-    action: str
-    confidence: float
-    entry_price: Optional[float] = None
-    stop_loss: Optional[float] = None
-    take_profit: Optional[float] = None
-    reasoning: str
-    executed: bool
-    
-    class Config:
-        from_attributes = True
-
-@router.get("/trades", response_model=List[TradeResponse])
-def get_trades(limit: int = 50, db: Session = Depends(get_db)):
-    """Get recent trades"""
-    trades = db.query(Trade).order_by(Trade.entry_time.desc()).limit(limit).all()
-    
-    # Manually map fields from relationship
-    result = []
-    for t in trades:
-        trade_dict = t.__dict__
-        if t.gemini_decision:
-            trade_dict['confidence'] = t.gemini_decision.confidence
-            trade_dict['stop_loss'] = t.gemini_decision.stop_loss
-            trade_dict['take_profit'] = t.gemini_decision.take_profit
-        result.append(trade_dict)
-        
-    return result
-
-@router.get("/decisions", response_model=List[DecisionResponse])
-def get_decisions(limit: int = 50, db: Session = Depends(get_db)):
-    """Get recent Gemini decisions"""
-    decisions = db.query(GeminiDecision).order_by(GeminiDecision.timestamp.desc()).limit(limit).all()
-    return decisions
-
-@router.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    """Get trading statistics"""
-    # Calculate Stats
-    total_trades = db.query(Trade).count()
-    
-    # Open Trades & Invested
-    open_trades_list = db.query(Trade).filter(Trade.status == 'OPEN').all()
-    open_trades = len(open_trades_list)
-    total_invested = sum(t.amount for t in open_trades_list) if open_trades_list else 0.0
-    
-    closed_trades = db.query(Trade).filter(Trade.status == 'CLOSED').count()
-    
-    # Calculate P/L and Win Rate
-    closed_trades_list = db.query(Trade).filter(Trade.status == 'CLOSED', Trade.profit_loss.isnot(None)).all()
-    total_pl = sum(t.profit_loss for t in closed_trades_list) if closed_trades_list else 0
-    
-    wins = sum(1 for t in closed_trades_list if t.profit_loss > 0)
-    win_rate_pct = (wins / closed_trades) * 100 if closed_trades > 0 else 0.0
-    
-    # Calculate Allocation Stats
-    configs = db.query(Configuration).all()
-    config_map = {c.config_key: c.config_value for c in configs}
-    
-    max_pos = int(config_map.get('max_open_positions', 1))
-    inv_amount = float(config_map.get('investment_amount', 100.0))
-    
-    total_allocation = float(max_pos) * float(inv_amount)
-    
-    # Pending Allocation: Target (Total) - Current Invested
-    # User requested: "suma del valor de las posiciones menos el valor total" (interpreted as Remaining Allocation)
-    pending_allocation = total_allocation - total_invested
-    
-    return {
-        "total_trades": total_trades,
-        "open_trades": open_trades,
-        "closed_trades": closed_trades,
-        "total_profit_loss": total_pl,
-        "total_invested": total_invested,
-        "win_rate_pct": win_rate_pct,
-        "trades_won": wins,
-        "trades_total_closed": closed_trades,
-        "total_allocation": total_allocation,
-        "pending_allocation": pending_allocation
-    }
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.models.database import Trade, GeminiDecision
+from app.core.config_service import config_service
+from app.core.performance import live_metrics
+from app.core import export
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+from fastapi import APIRouter
+
+router = APIRouter()
+
+class TradeResponse(BaseModel):
+    id: int
+    symbol: str
+    action: str
+    amount: Optional[float] = None
+    entry_price: float
+    entry_time: datetime
+    exit_price: Optional[float] = None
+    exit_time: Optional[datetime] = None
+    profit_loss: Optional[float] = None
+    status: str
+    confidence: Optional[float] = None
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    is_simulation: bool = False
+    account: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class DecisionResponse(BaseModel):
+    id: int
+    timestamp: datetime
+    symbol: str
+    action: str
+    confidence: float
+    entry_price: Optional[float] = None
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    reasoning: str
+    executed: bool
+    
+    class Config:
+        from_attributes = True
+
+@router.get("/trades", response_model=List[TradeResponse])
+def get_trades(limit: int = 50, db: Session = Depends(get_db)):
+    """Get recent trades"""
+    trades = db.query(Trade).order_by(Trade.entry_time.desc()).limit(limit).all()
+    
+    # Manually map fields from relationship
+    result = []
+    for t in trades:
+        trade_dict = t.__dict__
+        if t.gemini_decision:
+            trade_dict['confidence'] = t.gemini_decision.confidence
+            trade_dict['stop_loss'] = t.gemini_decision.stop_loss
+            trade_dict['take_profit'] = t.gemini_decision.take_profit
+        result.append(trade_dict)
+        
+    return result
+
+@router.get("/decisions", response_model=List[DecisionResponse])
+def get_decisions(limit: int = 50, db: Session = Depends(get_db)):
+    """Get recent Gemini decisions"""
+    decisions = db.query(GeminiDecision).order_by(GeminiDecision.timestamp.desc()).limit(limit).all()
+    return decisions
+
+@router.get("/stats")
+def get_stats(db: Session = Depends(get_db)):
+    """Get trading statistics"""
+    # Calculate Stats
+    total_trades = db.query(Trade).count()
+    
+    # Open Trades & Invested
+    open_trades_list = db.query(Trade).filter(Trade.status == 'OPEN').all()
+    open_trades = len(open_trades_list)
+    total_invested = sum(t.amount for t in open_trades_list) if open_trades_list else 0.0
+    
+    closed_trades = db.query(Trade).filter(Trade.status == 'CLOSED').count()
+    
+    # Calculate P/L and Win Rate
+    closed_trades_list = db.query(Trade).filter(Trade.status == 'CLOSED', Trade.profit_loss.isnot(None)).all()
+    total_pl = sum(t.profit_loss for t in closed_trades_list) if closed_trades_list else 0
+    
+    wins = sum(1 for t in closed_trades_list if t.profit_loss > 0)
+    win_rate_pct = (wins / closed_trades) * 100 if closed_trades > 0 else 0.0
+    
+    # Calculate Allocation Stats
+    max_pos = config_service.get('max_open_positions', 1)
+    inv_amount = config_service.get('investment_amount', 100.0)
+    
+    total_allocation = float(max_pos) * float(inv_amount)
+    
+    # Pending Allocation: Target (Total) - Current Invested
+    # User requested: "suma del valor de las posiciones menos el valor total" (interpreted as Remaining Allocation)
+    pending_allocation = total_allocation - total_invested
+    
+    return {
+        "total_trades": total_trades,
+        "open_trades": open_trades,
+        "closed_trades": closed_trades,
+        "total_profit_loss": total_pl,
+        "total_invested": total_invested,
+        "win_rate_pct": win_rate_pct,
+        "trades_won": wins,
+        "trades_total_closed": closed_trades,
+        "total_allocation": total_allocation,
+        "pending_allocation": pending_allocation
+    }
+
+@router.get("/performance")
+def get_performance(paper_trading: Optional[bool] = None, symbol: Optional[str] = None,
+                    initial_capital: Optional[float] = None, db: Session = Depends(get_db)):
+    """
+    Performance metrics of closed live trades, computed like backtest metrics
+    (drawdown, Sharpe/Sortino, profit factor, hold time, per-strategy breakdown).
+    """
+    query = db.query(Trade.entry_time, Trade.exit_time, Trade.profit_loss, Trade.strategy).filter(
+        Trade.status == 'CLOSED',
+        Trade.profit_loss.isnot(None),
+        Trade.exit_time.isnot(None)
+    )
+    if paper_trading is not None:
+        query = query.filter(Trade.is_simulation == paper_trading)
+    if symbol:
+        query = query.filter(Trade.symbol == symbol)
+    rows = query.order_by(Trade.exit_time).all()
+
+    if initial_capital is None:
+        # Default capital base: the configured total allocation
+        initial_capital = config_service.get('max_open_positions', 1) * config_service.get('investment_amount', 100.0)
+
+    return live_metrics(rows, initial_capital)
+
+@router.get("/export/{dataset}")
+def export_history(dataset: str, format: str = "csv", symbol: Optional[str] = None,
+                   start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Stream a whole table (trades, decisions or logs) as CSV, Arrow IPC stream or Parquet.
+    `start`/`end` filter on entry time (trades) or timestamp; `symbol` doesn't apply to logs.
+    """
+    if dataset not in export.DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset, expected one of: {', '.join(export.DATASETS)}")
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format, expected one of: {', '.join(export.FORMATS)}")
+    if format != "csv" and export.pa is None:
+        raise HTTPException(status_code=400, detail="Arrow/Parquet export requires pyarrow")
+    media_type, extension = export.FORMATS[format]
+    return StreamingResponse(
+        export.stream_export(dataset, format, symbol, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
@@ -1,282 +1,444 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.core.orchestrator import TradingOrchestrator
-from app.agents.binance_agent import BinanceAgent
-from app.agents.gemini_agent import GeminiAgent
-from app.core.database import get_db
-from app.models.database import Configuration, SystemLog, Trade, GeminiDecision
-from app.core.backtest_engine import BacktestEngine
-import uuid
-
-router = APIRouter()
-
-# Global Orchestrator Instance
-orchestrator = TradingOrchestrator()
-
-class LogResponse(BaseModel):
-    id: int
-    timestamp: str
-    level: str
-    message: str
-    component: str
-    
-    class Config:
-        from_attributes = True
-
-class StartRequest(BaseModel):
-    symbol: str
-    market_type: str = "future"
-    timeframe: str
-    investment_amount: float
-    leverage: int
-    binance_api_key: Optional[str] = None
-    binance_secret_key: Optional[str] = None
-    gemini_api_key: Optional[str] = None
-    paper_trading: bool = True
-    max_open_positions: int = 1
-    strategy: str = "IA Driven"
-    check_interval: int = 60
-
-class ConfigRequest(BaseModel):
-    binance_api_key: Optional[str] = None
-    binance_secret_key: Optional[str] = None
-    gemini_api_key: Optional[str] = None
-    symbol: Optional[str] = None
-    timeframe: Optional[str] = None
-    investment_amount: Optional[float] = None
-    leverage: Optional[int] = None
-    paper_trading: Optional[bool] = None
-    max_open_positions: Optional[int] = None
-    strategy: Optional[str] = None
-    check_interval: Optional[int] = None
-
-class BacktestRequest(BaseModel):
-    symbol: str = "BTC/USDT"
-    timeframe: str = "1h"
-    strategy: str = "IA Driven"
-    model: str = "gemini-2.5-flash"
-    days: int = 7
-    initial_capital: float = 1000.0
-
-@router.get("/models")
-def get_models(db: Session = Depends(get_db)):
-    """List available Gemini models"""
-    # Try to get API key from config if not provided in env
-    configs = db.query(Configuration).all()
-    config_map = {c.config_key: c.config_value for c in configs}
-    api_key = config_map.get('gemini_api_key')
-    
-    agent = GeminiAgent(api_key=api_key)
-    return agent.list_available_models()
-
-@router.post("/start")
-async def start_trading(request: StartRequest, background_tasks: BackgroundTasks = None):
-    if orchestrator.is_running:
-        return {"status": "already_running"}
-    
-    print(f"DEBUG: Start Request Keys - Binance: {request.binance_api_key}, Gemini: {request.gemini_api_key}")
-
-    # Fallback: Try to load keys from DB if not provided in request
-    binance_key = request.binance_api_key
-    binance_secret = request.binance_secret_key
-    gemini_key = request.gemini_api_key
-    
-    if not (binance_key and binance_secret and gemini_key):
-        db = next(get_db())
-        configs = db.query(Configuration).all()
-        config_map = {c.config_key: c.config_value for c in configs}
-        
-        if not binance_key:
-            binance_key = config_map.get('binance_api_key')
-        if not binance_secret:
-            binance_secret = config_map.get('binance_secret_key')
-        if not gemini_key:
-            gemini_key = config_map.get('gemini_api_key')
-            
-    # Start the orchestrator
-    background_tasks.add_task(
-        orchestrator.start_trading_loop,
-        symbol=request.symbol,
-        market_type=request.market_type,
-        timeframe=request.timeframe,
-        investment_amount=request.investment_amount,
-        leverage=request.leverage,
-        binance_api_key=binance_key,
-        binance_secret_key=binance_secret,
-        gemini_api_key=gemini_key,
-        paper_trading=request.paper_trading,
-        max_open_positions=request.max_open_positions,
-        strategy=request.strategy,
-        check_interval=request.check_interval
-    )
-
-    return {"status": "started"}
-
-@router.get("/config")
-def get_config(db: Session = Depends(get_db)):
-    """Get current configuration"""
-    configs = db.query(Configuration).all()
-    return {c.config_key: c.config_value for c in configs}
-
-@router.post("/config")
-def save_config(config: ConfigRequest, db: Session = Depends(get_db)):
-    """Save configuration"""
-    data = config.dict(exclude_unset=True)
-    for key, value in data.items():
-        if value is not None:
-            # Update or create
-            db_config = db.query(Configuration).filter(Configuration.config_key == key).first()
-            if db_config:
-                db_config.config_value = str(value)
-            else:
-                db_config = Configuration(config_key=key, config_value=str(value))
-                db.add(db_config)
-    db.commit()
-    return {"status": "saved"}
-
-# In-memory storage for backtest results (for simplicity)
-backtest_results = {}
-
-async def run_backtest_task(backtest_id: str, request: BacktestRequest, binance_key: str, gemini_key: str):
-    try:
-        backtest_results[backtest_id] = {"status": "running", "progress": 0, "logs": []}
-        
-        # Initialize Agents
-        binance = BinanceAgent(api_key=binance_key) # Read-only for backtest usually
-        await binance.load_markets()
-        gemini = GeminiAgent(api_key=gemini_key, model_name=request.model)
-        
-        engine = BacktestEngine(binance, gemini)
-        
-        async def on_progress(msg):
-            if backtest_id in backtest_results:
-                if "logs" not in backtest_results[backtest_id]:
-                    backtest_results[backtest_id]["logs"] = []
-                backtest_results[backtest_id]["logs"].append(msg)
-                # Keep only last 50 logs
-                if len(backtest_results[backtest_id]["logs"]) > 50:
-                    backtest_results[backtest_id]["logs"].pop(0)
-
-        # Run Backtest
-        results = await engine.run(
-            symbol=request.symbol,
-            timeframe=request.timeframe,
-            strategy=request.strategy,
-            initial_capital=request.initial_capital,
-            days=request.days,
-            on_progress=on_progress
-        )
-        
-        if isinstance(results, dict) and "error" in results:
-            backtest_results[backtest_id]["status"] = "failed"
-            backtest_results[backtest_id]["error"] = results["error"]
-        else:
-            backtest_results[backtest_id]["status"] = "completed"
-            backtest_results[backtest_id]["results"] = results
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        backtest_results[backtest_id]["status"] = "failed"
-        backtest_results[backtest_id]["error"] = str(e)
-
-@router.post("/backtest")
-async def start_backtest(request: BacktestRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    # Get API keys
-    configs = db.query(Configuration).all()
-    config_map = {c.config_key: c.config_value for c in configs}
-    binance_key = config_map.get('binance_api_key')
-    gemini_key = config_map.get('gemini_api_key')
-    
-    if not binance_key or not gemini_key:
-        raise HTTPException(status_code=400, detail="API Keys not found in configuration")
-
-    backtest_id = str(uuid.uuid4())
-    background_tasks.add_task(run_backtest_task, backtest_id, request, binance_key, gemini_key)
-    
-    return {"backtest_id": backtest_id, "status": "started"}
-
-@router.get("/backtest/{backtest_id}")
-def get_backtest_status(backtest_id: str):
-    result = backtest_results.get(backtest_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Backtest not found")
-    return result
-
-@router.get("/logs", response_model=List[LogResponse])
-def get_logs(limit: int = 50, db: Session = Depends(get_db)):
-    """Get system logs"""
-    logs = db.query(SystemLog).order_by(SystemLog.timestamp.desc()).limit(limit).all()
-    # Convert datetime to string for response
-    return [
-        LogResponse(
-            id=l.id,
-            timestamp=l.timestamp.isoformat(),
-            level=l.level,
-            message=l.message,
-            component=l.component
-        ) for l in logs
-    ]
-
-@router.delete("/logs")
-def clear_logs(db: Session = Depends(get_db)):
-    """Clear all system logs"""
-    db.query(SystemLog).delete()
-    db.commit()
-    return {"status": "cleared"}
-
-@router.post("/stop")
-async def stop_trading():
-    if not orchestrator.is_running:
-        return {"status": "not_running"}
-    orchestrator.stop()
-    return {"status": "stopped"}
-
-@router.post("/reset")
-async def reset_data(db: Session = Depends(get_db)):
-    """
-    Reset all trading data (Trades, Decisions, Logs) but keep Configuration (API Keys).
-    """
-    try:
-        # Delete all records from operational tables
-        db.query(Trade).delete()
-        db.query(GeminiDecision).delete()
-        db.query(SystemLog).delete()
-        db.commit()
-        return {"status": "success", "message": "Trading data reset successfully"}
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
-
-@router.get("/status")
-async def get_status():
-    return {"running": orchestrator.is_running}
-
-@router.get("/market/candles")
-async def get_candles(symbol: str, timeframe: str = "1h", limit: int = 100):
-    agent = orchestrator.binance
-    should_close = False
-    
-    if not agent:
-        # Create temporary agent for public data if bot is not running
-        agent = BinanceAgent()
-        await agent.load_markets()
-        should_close = True
-    
-    try:
-        df = await agent.fetch_ohlcv(symbol, timeframe, limit)
-        if df is not None:
-            # Convert timestamp to int (ms) for frontend if needed, or keep as string
-            # Recharts usually likes unix timestamp numbers or ISO strings
-            # df['timestamp'] is datetime, let's convert to ms timestamp
-            result = df.to_dict(orient='records')
-            for row in result:
-                if hasattr(row['timestamp'], 'timestamp'):
-                    row['timestamp'] = int(row['timestamp'].timestamp() * 1000)
-            return result
-        return []
-    finally:
-        if should_close:
-            await agent.close()
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from pydantic import BaseModel
+from typing import List, Literal, Optional, Union
+from sqlalchemy.orm import Session
+from app.core.orchestrator import TradingOrchestrator
+from app.agents.binance_agent import BinanceAgent
+from app.agents.gemini_agent import GeminiAgent
+from app.core.database import get_db
+from app.models.database import SystemLog, Trade, GeminiDecision, BacktestJob, BacktestTrade, TradingAccount
+from app.core.backtest_jobs import enqueue_job, job_status, get_job_trades, get_job_equity
+from app.core.robustness import monte_carlo, MONTE_CARLO_METHODS
+from app.core import telemetry
+from app.core.config import settings
+from app.core.config_service import config_service
+from app.core.downsample import get_pyramid
+from app.core.trading_sessions import start_session, stop_sessions, list_sessions, worker_traces, session_state
+from app.core.llm_budget import llm_budget, usage_by_day, day_start
+from app.core.accounts import DEFAULT_ACCOUNT, list_accounts, load_accounts, save_account
+from app.core import warm_state
+from app.core.scanner import market_scanner
+from datetime import timedelta
+import json
+
+router = APIRouter()
+
+EQUITY_PAGE_LIMIT = 10000  # Points returned by one equity request
+EQUITY_RANGE_LIMIT = 500000  # Points read and downsampled by one request with max_points
+MONTE_CARLO_PATHS = (100, 50000)  # Bounds of `paths`: one (paths x trades) matrix is built per request
+
+# Global Orchestrator Instance
+orchestrator = TradingOrchestrator()
+
+class LogResponse(BaseModel):
+    id: int
+    timestamp: str
+    level: str
+    message: str
+    component: str
+    
+    class Config:
+        from_attributes = True
+
+class StartRequest(BaseModel):
+    symbol: str
+    market_type: str = "future"
+    timeframe: str
+    investment_amount: float
+    leverage: int
+    binance_api_key: Optional[str] = None
+    binance_secret_key: Optional[str] = None
+    gemini_api_key: Optional[str] = None
+    paper_trading: bool = True
+    max_open_positions: int = 1
+    strategy: str = "IA Driven"
+    check_interval: int = 60
+    # One model, or several queried concurrently (see GeminiAgent policies)
+    model: Union[str, List[str]] = "gemini-2.5-flash"
+    llm_policy: Literal["first_valid", "vote"] = "first_valid"
+    llm_quorum: Optional[int] = None  # Valid answers to wait for when voting (default: all)
+    speculative_lead: Optional[float] = None  # Seconds before candle close to start analyzing (default: settings)
+    # Execution accounts sharing one decision stream ("default" = configured keys, others from /accounts)
+    accounts: Optional[List[str]] = None
+    scanner: bool = False  # Analyze only while the symbol is among the market scanner's top candidates
+
+class AccountRequest(BaseModel):
+    api_key: Optional[str] = None
+    secret_key: Optional[str] = None
+    investment_amount: Optional[float] = None  # USDT per trade; the loop's amount if empty
+    enabled: Optional[bool] = None
+
+class ConfigRequest(BaseModel):
+    binance_api_key: Optional[str] = None
+    binance_secret_key: Optional[str] = None
+    gemini_api_key: Optional[str] = None
+    symbol: Optional[str] = None
+    timeframe: Optional[str] = None
+    investment_amount: Optional[float] = None
+    leverage: Optional[int] = None
+    paper_trading: Optional[bool] = None
+    max_open_positions: Optional[int] = None
+    strategy: Optional[str] = None
+    check_interval: Optional[int] = None
+
+class BacktestRequest(BaseModel):
+    symbol: str = "BTC/USDT"
+    timeframe: str = "1h"
+    strategy: str = "IA Driven"
+    model: Union[str, List[str]] = "gemini-2.5-flash"
+    llm_policy: Literal["first_valid", "vote"] = "first_valid"
+    llm_quorum: Optional[int] = None
+    days: int = 7
+    initial_capital: float = 1000.0
+    microstructure: bool = False  # Replay order book / trade flow features recorded by live loops
+
+class WalkForwardRequest(BaseModel):
+    symbol: str = "BTC/USDT"
+    timeframe: str = "1h"
+    strategies: List[str] = ["IA Driven"]
+    model: Union[str, List[str]] = "gemini-2.5-flash"
+    llm_policy: Literal["first_valid", "vote"] = "first_valid"
+    llm_quorum: Optional[int] = None
+    initial_capital: float = 1000.0
+    candles: int = 1500
+    train_size: int = 200
+    test_size: int = 100
+    max_parallel: int = 3
+
+@router.get("/models")
+def get_models():
+    """List available Gemini models"""
+    # Try to get API key from config if not provided in env
+    api_key = config_service.get('gemini_api_key')
+    
+    agent = GeminiAgent(api_key=api_key)
+    return agent.list_available_models()
+
+@router.post("/start")
+async def start_trading(request: StartRequest, background_tasks: BackgroundTasks = None, db: Session = Depends(get_db)):
+    try:
+        load_accounts(request.accounts or [])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if settings.TRADING_WORKERS:
+        # Control plane only: a trading worker (app.trading_worker) claims the session.
+        # Workers read API keys from the saved configuration.
+        params = request.dict(exclude={"symbol", "binance_api_key", "binance_secret_key", "gemini_api_key"})
+        return {"status": start_session(db, request.symbol, params)}
+
+    if orchestrator.is_running:
+        return {"status": "already_running"}
+    
+    print(f"DEBUG: Start Request Keys - Binance: {request.binance_api_key}, Gemini: {request.gemini_api_key}")
+
+    # Fallback: Try to load keys from DB if not provided in request
+    binance_key = request.binance_api_key
+    binance_secret = request.binance_secret_key
+    gemini_key = request.gemini_api_key
+    
+    if not binance_key:
+        binance_key = config_service.get('binance_api_key')
+    if not binance_secret:
+        binance_secret = config_service.get('binance_secret_key')
+    if not gemini_key:
+        gemini_key = config_service.get('gemini_api_key')
+            
+    # Start the orchestrator
+    background_tasks.add_task(
+        orchestrator.start_trading_loop,
+        symbol=request.symbol,
+        market_type=request.market_type,
+        timeframe=request.timeframe,
+        investment_amount=request.investment_amount,
+        leverage=request.leverage,
+        binance_api_key=binance_key,
+        binance_secret_key=binance_secret,
+        gemini_api_key=gemini_key,
+        paper_trading=request.paper_trading,
+        max_open_positions=request.max_open_positions,
+        strategy=request.strategy,
+        check_interval=request.check_interval,
+        model=request.model,
+        llm_policy=request.llm_policy,
+        llm_quorum=request.llm_quorum,
+        speculative_lead=request.speculative_lead,
+        accounts=request.accounts,
+        scanner=request.scanner
+    )
+
+    return {"status": "started"}
+
+resumed_loop = None  # Task of the loop restarted by resume_trading (kept referenced while it runs)
+
+def resume_trading():
+    """
+    On startup, restart the loop the previous process was still running (its warm restart
+    snapshot), so a restart or `--reload` doesn't stop trading. Keys come from the saved
+    configuration, as for trading workers.
+    """
+    global resumed_loop
+    if settings.TRADING_WORKERS or not settings.WARM_RESTART_ENABLED or orchestrator.is_running:
+        return
+    meta = warm_state.running_snapshot()
+    if meta is None:
+        return
+    print(f"Resuming the {meta['symbol']} trading loop from its warm restart snapshot")
+    resumed_loop = asyncio.create_task(orchestrator.start_trading_loop(
+        symbol=meta["symbol"],
+        binance_api_key=config_service.get('binance_api_key'),
+        binance_secret_key=config_service.get('binance_secret_key'),
+        gemini_api_key=config_service.get('gemini_api_key'),
+        **meta["params"]
+    ))
+
+@router.get("/config")
+def get_config():
+    """Get current configuration"""
+    return config_service.raw()
+
+@router.post("/config")
+def save_config(config: ConfigRequest):
+    """Save configuration; a running loop picks up live settings before its next tick"""
+    config_service.update(config.dict(exclude_unset=True))
+    return {"status": "saved"}
+
+@router.get("/accounts")
+def get_accounts(db: Session = Depends(get_db)):
+    return [{"name": DEFAULT_ACCOUNT, "api_key": None, "investment_amount": None, "enabled": True}] + list_accounts(db)
+
+@router.put("/accounts/{name}")
+def put_account(name: str, account: AccountRequest, db: Session = Depends(get_db)):
+    """Create or update an execution account (used by loops started afterwards)"""
+    try:
+        save_account(db, name, account.dict(exclude_unset=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "saved"}
+
+@router.delete("/accounts/{name}")
+def delete_account(name: str, db: Session = Depends(get_db)):
+    deleted = db.query(TradingAccount).filter(TradingAccount.name == name).delete()
+    db.commit()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return {"status": "deleted"}
+
+@router.post("/backtest")
+async def start_backtest(request: BacktestRequest, db: Session = Depends(get_db)):
+    # Get API keys
+    if not config_service.get('binance_api_key') or not config_service.get('gemini_api_key'):
+        raise HTTPException(status_code=400, detail="API Keys not found in configuration")
+
+    # Queued in the database; a backtest worker process (app.backtest_worker) runs it
+    backtest_id = enqueue_job(db, request.dict())
+    
+    return {"backtest_id": backtest_id, "status": "queued"}
+
+@router.post("/backtest/walkforward")
+async def start_walk_forward(request: WalkForwardRequest, db: Session = Depends(get_db)):
+    """Queue a walk-forward analysis (rolling train/test windows, folds run in parallel)"""
+    if not config_service.get('binance_api_key') or not config_service.get('gemini_api_key'):
+        raise HTTPException(status_code=400, detail="API Keys not found in configuration")
+    if not request.strategies:
+        raise HTTPException(status_code=400, detail="At least one strategy is required")
+
+    backtest_id = enqueue_job(db, {"kind": "walk_forward", **request.dict()})
+    return {"backtest_id": backtest_id, "status": "queued"}
+
+def _get_job_or_404(db: Session, backtest_id: str) -> BacktestJob:
+    job = db.query(BacktestJob).filter(BacktestJob.id == backtest_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    return job
+
+@router.get("/backtest/{backtest_id}")
+def get_backtest_status(backtest_id: str, db: Session = Depends(get_db)):
+    return job_status(_get_job_or_404(db, backtest_id))
+
+@router.get("/backtest/{backtest_id}/trades")
+def get_backtest_trades(backtest_id: str, offset: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    _get_job_or_404(db, backtest_id)
+    return get_job_trades(db, backtest_id, offset, min(limit, 1000))
+
+@router.get("/backtest/{backtest_id}/equity")
+def get_backtest_equity(backtest_id: str, offset: int = 0, limit: int = 1000, max_points: Optional[int] = None,
+                        db: Session = Depends(get_db)):
+    """Equity points; with `max_points`, the requested range is downsampled to that many (LTTB)"""
+    if max_points:
+        limit = min(limit, EQUITY_RANGE_LIMIT)
+        max_points = min(max(max_points, 2), EQUITY_PAGE_LIMIT)
+    else:
+        limit, max_points = min(limit, EQUITY_PAGE_LIMIT), None
+    return get_job_equity(_get_job_or_404(db, backtest_id), max(offset, 0), max(limit, 0), max_points)
+
+@router.get("/backtest/{backtest_id}/montecarlo")
+def get_backtest_monte_carlo(backtest_id: str, paths: int = 5000, ruin_threshold: float = 0.5,
+                             method: str = "bootstrap", seed: Optional[int] = None, db: Session = Depends(get_db)):
+    """Monte Carlo resampling of a completed backtest's trade sequence"""
+    if not MONTE_CARLO_PATHS[0] <= paths <= MONTE_CARLO_PATHS[1]:
+        raise HTTPException(status_code=400, detail=f"paths must be between {MONTE_CARLO_PATHS[0]} and {MONTE_CARLO_PATHS[1]}")
+    if method not in MONTE_CARLO_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method, expected one of: {', '.join(MONTE_CARLO_METHODS)}")
+    if not 0 < ruin_threshold < 1:
+        raise HTTPException(status_code=400, detail="ruin_threshold must be between 0 and 1 (exclusive)")
+    job = _get_job_or_404(db, backtest_id)
+    if job.status != 'completed':
+        raise HTTPException(status_code=409, detail="Backtest not completed")
+    pnls = [p for (p,) in db.query(BacktestTrade.pnl).filter(BacktestTrade.job_id == backtest_id).order_by(BacktestTrade.seq).all()]
+    initial_capital = json.loads(job.params).get("initial_capital", 1000.0)
+    return monte_carlo(pnls, initial_capital, n_paths=paths, ruin_threshold=ruin_threshold, method=method, seed=seed)
+
+@router.get("/logs", response_model=List[LogResponse])
+def get_logs(limit: int = 50, db: Session = Depends(get_db)):
+    """Get system logs"""
+    logs = db.query(SystemLog).order_by(SystemLog.timestamp.desc()).limit(limit).all()
+    # Convert datetime to string for response
+    return [
+        LogResponse(
+            id=l.id,
+            timestamp=l.timestamp.isoformat(),
+            level=l.level,
+            message=l.message,
+            component=l.component
+        ) for l in logs
+    ]
+
+@router.delete("/logs")
+def clear_logs(db: Session = Depends(get_db)):
+    """Clear all system logs"""
+    db.query(SystemLog).delete()
+    db.commit()
+    return {"status": "cleared"}
+
+@router.post("/stop")
+async def stop_trading(symbol: Optional[str] = None, db: Session = Depends(get_db)):
+    if settings.TRADING_WORKERS:
+        if not stop_sessions(db, symbol):
+            return {"status": "not_running"}
+        return {"status": "stopped"}
+
+    if not orchestrator.is_running:
+        return {"status": "not_running"}
+    orchestrator.stop()
+    return {"status": "stopped"}
+
+@router.post("/reset")
+async def reset_data(db: Session = Depends(get_db)):
+    """
+    Reset all trading data (Trades, Decisions, Logs) but keep Configuration (API Keys).
+    """
+    try:
+        # Delete all records from operational tables
+        db.query(Trade).delete()
+        db.query(GeminiDecision).delete()
+        db.query(SystemLog).delete()
+        db.commit()
+        return {"status": "success", "message": "Trading data reset successfully"}
+    except Exception as e:
+        db.rollback()
+        return {"status": "error", "message": str(e)}
+
+@router.get("/status")
+def get_status(db: Session = Depends(get_db)):
+    if settings.TRADING_WORKERS:
+        sessions = list_sessions(db)
+        active = any(s["desired_state"] == 'running' and s["status"] in ('pending', 'running') for s in sessions)
+        # Loop state (last decision, speculation, ...) as persisted by the workers' heartbeats
+        return {"running": active, "sessions": sessions}
+
+    return orchestrator.status()
+
+@router.get("/traces")
+def get_traces(limit: int = 20, db: Session = Depends(get_db)):
+    """Span trees of the most recent ticks (requires TRACING_ENABLED), including the trading workers'"""
+    traces = list(telemetry.TRACES)
+    if settings.TRADING_WORKERS:
+        traces = sorted(traces + worker_traces(db), key=lambda t: t["start"])
+    return {"enabled": settings.TRACING_ENABLED, "traces": traces[-limit:][::-1]}
+
+@router.get("/scanner")
+async def get_scanner(market_type: str = "future", timeframe: str = "1h", strategy: str = "IA Driven",
+                      limit: int = 50, refresh: bool = False):
+    """Pairs ranked by the market scanner (refreshed every SCANNER_REFRESH_SECONDS, or now with refresh=true)"""
+    try:
+        result = await market_scanner.ranking(market_type, timeframe, strategy, refresh=refresh)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Market scan failed: {e}")
+    return {**result, "ranking": result["ranking"][:limit]}
+
+@router.get("/usage")
+def get_usage(days: int = 7, db: Session = Depends(get_db)):
+    """LLM tokens and cost of live decisions per day/symbol/strategy/model, and today's budget"""
+    since = day_start() - timedelta(days=max(1, days) - 1)
+    rows = usage_by_day(db, since)
+    cost = sum(r["cost_usd"] for r in rows)
+    decisions = sum(r["decisions"] for r in rows)
+    symbol_days = len({(r["day"], r["symbol"]) for r in rows})
+    return {
+        "budget": llm_budget.report(),
+        "daily": rows,
+        "totals": {
+            "decisions": decisions,
+            "prompt_tokens": sum(r["prompt_tokens"] for r in rows),
+            "output_tokens": sum(r["output_tokens"] for r in rows),
+            "cost_usd": round(cost, 6),
+            "avg_cost_per_decision": round(cost / decisions, 6) if decisions else None,
+            # What one more traded symbol is expected to add per day at the current settings
+            "avg_daily_cost_per_symbol": round(cost / symbol_days, 6) if symbol_days else None
+        }
+    }
+
+async def _zoomed_candles(agent: BinanceAgent, symbol: str, timeframe: str, limit: int, max_points: int):
+    tf_ms = agent.exchange.parse_timeframe(timeframe) * 1000
+    pyramid = get_pyramid(symbol, timeframe, tf_ms)
+    async with pyramid.lock:
+        now = agent.exchange.milliseconds()
+        start = (now // tf_ms - limit + 1) * tf_ms
+        base = pyramid.base
+        if base.empty or base.timestamp[0] > start or now - base.timestamp[-1] > 1000 * tf_ms:
+            pyramid.update(await agent.fetch_ohlcv_history(symbol, timeframe, total=limit))
+        else:
+            # Only what closed since the last request, plus the forming candle
+            pyramid.update(await agent.fetch_ohlcv(symbol, timeframe, limit=1000, since=int(base.timestamp[-1])))
+        return pyramid.query(start, now + tf_ms, max_points)
+
+@router.get("/market/candles")
+async def get_candles(symbol: str, timeframe: str = "1h", limit: int = 100, max_points: Optional[int] = None):
+    """
+    The last `limit` candles. Ranges longer than `max_points` (default CHART_MAX_POINTS) are
+    answered from cached higher-timeframe aggregates, so the payload stays bounded.
+    """
+    max_points = max_points or settings.CHART_MAX_POINTS
+    limit = min(limit, settings.CHART_CACHE_CANDLES)
+    agent = orchestrator.binance
+    should_close = False
+    
+    if not agent:
+        # Create temporary agent for public data if bot is not running
+        agent = BinanceAgent()
+        await agent.load_markets()
+        should_close = True
+    
+    try:
+        if limit > max_points:
+            return (await _zoomed_candles(agent, symbol, timeframe, limit, max_points)).to_records()
+        candles = await agent.fetch_ohlcv(symbol, timeframe, limit)
+        if candles is not None:
+            # Timestamps as ms numbers for the chart
+            return candles.to_records()
+        return []
+    finally:
+        if should_close:
+            await agent.close()
+
+@router.get("/market/microstructure")
+def get_microstructure(symbol: str, db: Session = Depends(get_db)):
+    """Live order book / trade flow features of the running loop (MICROSTRUCTURE_ENABLED)"""
+    if settings.TRADING_WORKERS:
+        state = session_state(db, symbol)  # As of the worker's last heartbeat
+        features = state.get("microstructure") if state else None
+    else:
+        features = orchestrator.binance.microstructure_features(symbol) if orchestrator.binance else None
+    return {"enabled": settings.MICROSTRUCTURE_ENABLED, "features": features}
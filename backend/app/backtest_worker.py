@@ -0,0 +1,177 @@
+"""
+Backtest worker pool.
+
+Claims jobs from the `backtest_jobs` table, runs them outside the API process and
+checkpoints progress so an interrupted run resumes where it stopped.
+
+    python -m app.backtest_worker --workers 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+from app.agents.binance_agent import BinanceAgent
+from app.agents.gemini_agent import GeminiAgent
+from app.core.backtest_engine import BacktestEngine
+from app.core.robustness import run_walk_forward
+from app.core.backtest_jobs import claim_next_job, record_progress, complete_job, fail_job, purge_expired_jobs
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.core.telemetry import backtest_counts, backtest_counts_since
+from app.models.database import Configuration
+
+POLL_INTERVAL = 2  # seconds between queue polls when idle
+PURGE_INTERVAL = 600  # seconds between TTL cleanups
+LOG_FLUSH_INTERVAL = 1.0  # seconds; progress messages are batched into one heartbeat write
+
+class LeaseLost(Exception):
+    """Another worker re-claimed the job (our heartbeat was considered stale)."""
+
+def _load_keys():
+    db = SessionLocal()
+    try:
+        config_map = {c.config_key: c.config_value for c in db.query(Configuration).all()}
+        return config_map.get('binance_api_key'), config_map.get('gemini_api_key')
+    finally:
+        db.close()
+
+async def run_job(job_id: str, params: dict, checkpoint: dict, worker_id: str):
+    binance_key, gemini_key = _load_keys()
+    binance = BinanceAgent(api_key=binance_key) # Read-only for backtest usually
+    counts = backtest_counts()  # Jobs run one at a time per process, so the difference is this job's
+    pending_logs = []
+    last_flush = 0.0
+
+    def flush(progress: float = None, state: dict = None):
+        nonlocal last_flush
+        messages = list(pending_logs)
+        pending_logs.clear()
+        last_flush = time.monotonic()
+        if not record_progress(job_id, worker_id, messages=messages, progress=progress, checkpoint=state):
+            raise LeaseLost(job_id)
+
+    async def on_progress(msg):
+        pending_logs.append(msg)
+        if time.monotonic() - last_flush >= LOG_FLUSH_INTERVAL:
+            flush()
+
+    async def on_checkpoint(state):
+        flush(progress=state["index"] / state["total"], state=state)
+
+    async def on_fold(folds, total):
+        flush(progress=len(folds) / total, state={"folds": folds})
+
+    lease_lost = False
+    runner = asyncio.current_task()
+
+    async def keep_lease():
+        """Renew the lease on its own schedule: progress flushes can be minutes apart (slow LLM calls, fetches)"""
+        nonlocal lease_lost
+        while True:
+            await asyncio.sleep(settings.BACKTEST_LEASE_SECONDS / 3)
+            try:
+                held = record_progress(job_id, worker_id)
+            except Exception as e:
+                print(f"[{worker_id}] Failed to renew the lease on job {job_id}: {e}")
+                continue
+            if not held:
+                lease_lost = True
+                runner.cancel()
+                return
+
+    heartbeat = asyncio.create_task(keep_lease())
+    try:
+        await binance.load_markets()
+        gemini = GeminiAgent(api_key=gemini_key, model_name=params.get("model", "gemini-2.5-flash"),
+                             policy=params.get("llm_policy", "first_valid"), quorum=params.get("llm_quorum"))
+
+        if params.get("kind") == "walk_forward":
+            results = await run_walk_forward(
+                binance, gemini,
+                symbol=params["symbol"],
+                timeframe=params["timeframe"],
+                strategies=params["strategies"],
+                initial_capital=params["initial_capital"],
+                candles=params["candles"],
+                train_size=params["train_size"],
+                test_size=params["test_size"],
+                max_parallel=params["max_parallel"],
+                on_progress=on_progress,
+                completed_folds=checkpoint["folds"] if checkpoint else None,
+                on_fold=on_fold
+            )
+        else:
+            engine = BacktestEngine(binance, gemini, microstructure=params.get("microstructure", False))
+            results = await engine.run(
+                symbol=params["symbol"],
+                timeframe=params["timeframe"],
+                strategy=params["strategy"],
+                initial_capital=params["initial_capital"],
+                days=params["days"],
+                on_progress=on_progress,
+                checkpoint=checkpoint,
+                on_checkpoint=on_checkpoint
+            )
+        flush()
+
+        if isinstance(results, dict) and "error" in results:
+            finished = fail_job(job_id, worker_id, results["error"], backtest_counts_since(counts))
+        else:
+            finished = complete_job(job_id, worker_id, results, backtest_counts_since(counts))
+        if not finished:
+            raise LeaseLost(job_id)
+    except LeaseLost:
+        print(f"[{worker_id}] Lost lease on job {job_id}, abandoning.")
+    except asyncio.CancelledError:
+        if not lease_lost:
+            raise
+        print(f"[{worker_id}] Lost lease on job {job_id}, abandoning.")
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        if not fail_job(job_id, worker_id, str(e), backtest_counts_since(counts)):
+            print(f"[{worker_id}] Lost lease on job {job_id}, failure not recorded.")
+    finally:
+        heartbeat.cancel()
+        await binance.close()
+
+async def worker_loop(worker_id: str):
+    print(f"[{worker_id}] Backtest worker started.")
+    last_purge = 0.0
+    while True:
+        if time.monotonic() - last_purge > PURGE_INTERVAL:
+            purged = purge_expired_jobs()
+            if purged:
+                print(f"[{worker_id}] Purged {purged} expired backtest jobs.")
+            last_purge = time.monotonic()
+
+        claimed = claim_next_job(worker_id)
+        if not claimed:
+            await asyncio.sleep(POLL_INTERVAL)
+            continue
+
+        job_id, params, checkpoint = claimed
+        print(f"[{worker_id}] Claimed job {job_id}" + (" (resuming)" if checkpoint else ""))
+        await run_job(job_id, params, checkpoint, worker_id)
+
+def worker_main(index: int):
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    asyncio.run(worker_loop(worker_id))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run backtest worker processes")
+    parser.add_argument("--workers", type=int, default=settings.BACKTEST_WORKERS)
+    args = parser.parse_args()
+
+    init_db()
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=worker_main, args=(n,), daemon=True) for n in range(args.workers)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+if __name__ == "__main__":
+    main()
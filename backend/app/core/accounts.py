@@ -0,0 +1,63 @@
+from app.core.database import SessionLocal
+from app.models.database import TradingAccount
+
+DEFAULT_ACCOUNT = "default"  # The Binance keys of the configuration table (Trade.account left empty)
+
+def account_value(name: str):
+    """Trade/OrderFill.account for an execution account"""
+    return None if name == DEFAULT_ACCOUNT else name
+
+def account_name(value) -> str:
+    return value or DEFAULT_ACCOUNT
+
+def account_filter(column, name: str):
+    return column.is_(None) if name == DEFAULT_ACCOUNT else column == name
+
+class ExecutionAccount:
+    """One account a trading loop executes on: its own exchange client, sizing and user data stream"""
+    def __init__(self, name: str, binance, investment_amount: float = None):
+        self.name = name
+        self.binance = binance
+        self.investment_amount = investment_amount
+        self.user_stream = None
+
+def load_accounts(names: list) -> dict:
+    """Enabled TradingAccount rows by name (without the default account); unknown or disabled names raise"""
+    names = [n for n in names if n != DEFAULT_ACCOUNT]
+    if not names:
+        return {}
+    db = SessionLocal()
+    try:
+        rows = {a.name: a for a in db.query(TradingAccount).filter(TradingAccount.name.in_(names), TradingAccount.enabled == True)}
+    finally:
+        db.close()
+    missing = [n for n in names if n not in rows]
+    if missing:
+        raise ValueError(f"Unknown or disabled trading accounts: {', '.join(missing)}")
+    keyless = [n for n in names if not rows[n].api_key or not rows[n].secret_key]
+    if keyless:
+        # Never fall back to the configured keys: the decision would be placed twice on one account
+        raise ValueError(f"Trading accounts without API key/secret: {', '.join(keyless)}")
+    return rows
+
+def list_accounts(db) -> list:
+    return [{
+        "name": a.name,
+        "api_key": f"{a.api_key[:4]}..." if a.api_key else None,
+        "investment_amount": a.investment_amount,
+        "enabled": a.enabled
+    } for a in db.query(TradingAccount).order_by(TradingAccount.name).all()]
+
+def save_account(db, name: str, values: dict):
+    if name == DEFAULT_ACCOUNT:
+        raise ValueError(f"'{DEFAULT_ACCOUNT}' is the configured account; set its keys with POST /api/config")
+    account = db.query(TradingAccount).filter(TradingAccount.name == name).first()
+    if not account:
+        account = TradingAccount(name=name)
+        db.add(account)
+    for key, value in values.items():
+        setattr(account, key, value)
+    if not account.api_key or not account.secret_key:
+        db.rollback()
+        raise ValueError(f"Trading account '{name}' needs both api_key and secret_key")
+    db.commit()
@@ -1,13 +1,81 @@
-import pandas as pd
 import asyncio
+import time
 from datetime import datetime
 from app.agents.gemini_agent import GeminiAgent
 from app.agents.binance_agent import BinanceAgent
+from app.core.candles import Candles, format_time, format_times
+from app.core.microstructure import FeatureHistory, RECORD_SLACK_SECONDS
+from app.core.performance import backtest_metrics
+from app.core.config import settings
+from app.core.telemetry import BACKTEST_CANDLES, BACKTEST_LATENCY, BACKTEST_SPECULATION
+
+class DecisionPrefetcher:
+    """
+    Speculative, concurrent model evaluation for backtests.
+
+    The decision at an evaluation point depends only on candles up to that point, so upcoming
+    points can be evaluated ahead of the simulation (up to `lookahead` points, `concurrency`
+    requests at a time). The simulation still consumes decisions strictly in candle order and
+    only where it is flat, which yields the same trades as evaluating one by one. Results for
+    points reached while a position is open are discarded (the "rollback"); nothing new is
+    requested while in a position, since those points are only used once it closes.
+    """
+    def __init__(self, evaluate, points: list, concurrency: int = None, lookahead: int = None):
+        self.evaluate = evaluate  # async (index) -> decision
+        self.points = points
+        self.lookahead = lookahead or settings.BACKTEST_LLM_LOOKAHEAD
+        self.semaphore = asyncio.Semaphore(concurrency or settings.BACKTEST_LLM_CONCURRENCY)
+        self.tasks = {}
+        self.cursor = 0  # Index into `points` of the first point not yet reached
+        self.stats = {"requested": 0, "used": 0, "discarded": 0}
+
+    async def _evaluate(self, index: int):
+        async with self.semaphore:
+            return await self.evaluate(index)
+
+    def _reach(self, index: int, window: int):
+        """Move past `index` and keep the next `window` points in flight"""
+        while self.cursor < len(self.points) and self.points[self.cursor] <= index:
+            self.cursor += 1
+        for point in self.points[self.cursor:self.cursor + window]:
+            if point not in self.tasks:
+                self.tasks[point] = asyncio.create_task(self._evaluate(point))
+                self.stats["requested"] += 1
+
+    async def get(self, index: int):
+        """Decision at `index` (flat: the simulation will act on it)"""
+        task = self.tasks.pop(index, None)
+        if task is None:
+            task = asyncio.create_task(self._evaluate(index))
+            self.stats["requested"] += 1
+        self._reach(index, self.lookahead)
+        self.stats["used"] += 1
+        BACKTEST_SPECULATION.inc(outcome="used")
+        return await task
+
+    def skip(self, index: int):
+        """Evaluation point reached while in a position: drop its speculative result"""
+        task = self.tasks.pop(index, None)
+        if task is not None:
+            task.cancel()
+            self.stats["discarded"] += 1
+            BACKTEST_SPECULATION.inc(outcome="discarded")
+        self._reach(index, 0)
+
+    def close(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.stats["discarded"] += len(self.tasks)
+        BACKTEST_SPECULATION.inc(len(self.tasks), outcome="discarded")
+        self.tasks.clear()
 
 class BacktestEngine:
-    def __init__(self, binance_agent: BinanceAgent, gemini_agent: GeminiAgent):
+    CHECKPOINT_EVERY = 5  # candles
+
+    def __init__(self, binance_agent: BinanceAgent, gemini_agent: GeminiAgent, microstructure: bool = False):
         self.binance = binance_agent
         self.gemini = gemini_agent
+        self.microstructure = microstructure  # Replay features recorded by live loops (MicrostructureSnapshot)
         self.results = {
             "total_trades": 0,
             "wins": 0,
@@ -17,10 +85,14 @@ class BacktestEngine:
             "trades": []
         }
 
-    async def run(self, symbol: str, timeframe: str, strategy: str, initial_capital: float = 1000.0, days: int = 7, on_progress=None):
+    async def run(self, symbol: str, timeframe: str, strategy: str, initial_capital: float = 1000.0, days: int = 7, on_progress=None,
+                  checkpoint: dict = None, on_checkpoint=None):
         """
         Run backtest for a specific symbol and timeframe.
         WARNING: This uses REAL Gemini API calls which consumes quota.
+        
+        `on_checkpoint(state)` is awaited every CHECKPOINT_EVERY candles with a JSON-serializable
+        state; passing that state back as `checkpoint` resumes the run on the same candle window.
         """
         async def log(msg):
             if on_progress:
@@ -34,7 +106,11 @@ class BacktestEngine:
             # limit = days * 24 * 60 // int(self._timeframe_to_minutes(timeframe)) + 100
             # Simplified limit for now to ensure we get enough data
             limit = 500 
-            df = await self.binance.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+            since = checkpoint['since'] if checkpoint else None
+            df = await self.binance.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit, since=since)
+            if checkpoint:
+                # Candles closed since the original run must not extend the window
+                df = df[:checkpoint['total']]
             await log(f"Successfully fetched {len(df)} candles.")
         except Exception as e:
             await log(f"Error fetching data: {str(e)}")
@@ -43,100 +119,166 @@ class BacktestEngine:
         if df is None or df.empty:
             return {"error": "No data found"}
 
-        capital = initial_capital
-        position = None # {'entry_price': float, 'amount': float, 'type': 'BUY'/'SELL'}
+        return await self.simulate(df, symbol, timeframe, strategy, initial_capital, on_progress, checkpoint, on_checkpoint)
+
+    async def _recorded_features(self, df: Candles, symbol: str, timeframe: str, log):
+        """index -> microstructure features recorded during candle `index` (None when disabled or not recorded)"""
+        if not self.microstructure:
+            return lambda index: None
+        tf_ms = self.binance.exchange.parse_timeframe(timeframe) * 1000
+        # The tick of a close records its snapshot after the close delay: match it, not the previous tick's
+        after_ms = min(int((settings.CANDLE_CLOSE_DELAY_SECONDS + RECORD_SLACK_SECONDS) * 1000), tf_ms // 2)
+        history = await asyncio.to_thread(FeatureHistory.load, symbol, int(df.timestamp[0]), int(df.timestamp[-1]) + tf_ms + after_ms)
+        await log(f"Loaded {len(history)} recorded microstructure snapshots.")
+        return lambda index: history.at(int(df.timestamp[index]) + tf_ms, tf_ms, after_ms)
+
+    async def simulate(self, df: Candles, symbol: str, timeframe: str, strategy: str, initial_capital: float = 1000.0,
+                       on_progress=None, checkpoint: dict = None, on_checkpoint=None):
+        """
+        Simulate the strategy over an already fetched candle window.
+        The first 20 candles are used as context only.
+        """
+        async def log(msg):
+            if on_progress:
+                await on_progress(msg)
+            print(msg)
+
+        started = time.perf_counter()
+        since = int(df.timestamp[0])
         
-        self.results["equity_curve"].append({"time": str(df.iloc[0]['timestamp']), "equity": capital})
+        if checkpoint:
+            capital = checkpoint['capital']
+            position = checkpoint['position']
+            self.results = checkpoint['results']
+            start_index = checkpoint['index']
+            await log(f"Resuming from checkpoint at candle {start_index}/{len(df)}...")
+        else:
+            capital = initial_capital
+            position = None # {'entry_price': float, 'amount': float, 'type': 'BUY'/'SELL'}
+            start_index = 20
 
         # 2. Simulate Loop
         # We need at least 20 candles for analysis
         total_candles = len(df)
         await log(f"Starting simulation on {total_candles} candles...")
+
+        features_at = await self._recorded_features(df, symbol, timeframe, log)
+        # Entry decisions are requested every 5 candles (to save quota), evaluated ahead concurrently
+        prefetcher = DecisionPrefetcher(
+            lambda index: self.gemini.analyze_market(symbol, {timeframe: df[:index + 1]}, timeframe, strategy,
+                                                     microstructure=features_at(index)),
+            [i for i in range(start_index, total_candles) if i % 5 == 0]
+        )
         
-        for i in range(20, total_candles):
-            if i % 10 == 0:
-                await log(f"Processing candle {i}/{total_candles} ({df.iloc[i]['timestamp']})...")
+        try:
+            for i in range(start_index, total_candles):
+                # Persist state before handling candle i, so a resumed run re-enters here
+                if on_checkpoint and i > start_index and i % self.CHECKPOINT_EVERY == 0:
+                    await on_checkpoint({
+                        "since": since,
+                        "index": i,
+                        "total": total_candles,
+                        "capital": capital,
+                        "position": position,
+                        "results": self.results
+                    })
+
+                if i % 10 == 0:
+                    await log(f"Processing candle {i}/{total_candles} ({format_time(df.timestamp[i])})...")
                 
-            current_candle = df.iloc[i]
-            current_time = str(current_candle['timestamp'])
-            current_price = current_candle['close']
-            
-            # Slice data up to current time (simulating past)
-            historical_slice = df.iloc[:i+1]
+                current_time = format_time(df.timestamp[i])
+                current_price = float(df.close[i])
             
-            # Construct data_dict for Agent
-            data_dict = {timeframe: historical_slice}
-            
-            # Check Exit
-            if position:
-                pnl = 0
-                closed = False
-                reason = ""
+                # No entry on this candle whether or not the position closes: drop its speculative decision
+                if position and i % 5 == 0:
+                    prefetcher.skip(i)
+
+                # Check Exit
+                if position:
+                    pnl = 0
+                    closed = False
+                    reason = ""
                 
-                # Simple SL/TP check (Mocked for now, agent provides them)
-                if position['type'] == 'BUY':
-                    if current_price <= position['entry_price'] * 0.98: # 2% SL
-                        pnl = (current_price - position['entry_price']) * position['amount']
-                        closed = True
-                        reason = "Stop Loss"
-                    elif current_price >= position['entry_price'] * 1.04: # 4% TP
-                        pnl = (current_price - position['entry_price']) * position['amount']
-                        closed = True
-                        reason = "Take Profit"
+                    # Simple SL/TP check (Mocked for now, agent provides them)
+                    if position['type'] == 'BUY':
+                        if current_price <= position['entry_price'] * 0.98: # 2% SL
+                            pnl = (current_price - position['entry_price']) * position['amount']
+                            closed = True
+                            reason = "Stop Loss"
+                        elif current_price >= position['entry_price'] * 1.04: # 4% TP
+                            pnl = (current_price - position['entry_price']) * position['amount']
+                            closed = True
+                            reason = "Take Profit"
                 
-                if closed:
-                    capital += pnl
-                    self.results["total_pnl"] += pnl
-                    self.results["total_trades"] += 1
-                    if pnl > 0: self.results["wins"] += 1
-                    else: self.results["losses"] += 1
+                    if closed:
+                        capital += pnl
+                        self.results["total_pnl"] += pnl
+                        self.results["total_trades"] += 1
+                        if pnl > 0: self.results["wins"] += 1
+                        else: self.results["losses"] += 1
                     
-                    self.results["trades"].append({
-                        "entry_time": position['time'],
-                        "exit_time": current_time,
-                        "type": position['type'],
-                        "entry_price": position['entry_price'],
-                        "exit_price": current_price,
-                        "pnl": pnl,
-                        "reason": reason
-                    })
-                    await log(f"Closed {position['type']} at {current_price:.2f} (PnL: {pnl:.2f}) - {reason}")
-                    position = None
-                    self.results["equity_curve"].append({"time": current_time, "equity": capital})
-                    continue # Wait for next candle to re-enter
-
-            # Check Entry (Only if no position)
-            if not position:
-                # Call Agent (Real API Call)
-                # To save quota, we might want to skip some candles or use a cheaper model
-                # For MVP, let's run it every 5 candles to save quota
-                if i % 5 != 0:
-                    continue
-
-                try:
-                    await log("Requesting AI analysis...")
-                    analysis_json = await self.gemini.analyze_market(symbol, data_dict, timeframe, strategy)
-                    if analysis_json:
-                        import json
-                        cleaned = analysis_json.replace('```json', '').replace('```', '').strip()
-                        decision = json.loads(cleaned)
-                        
-                        action = decision.get('action')
-                        confidence = decision.get('confidence', 0)
+                        self.results["trades"].append({
+                            "entry_time": position['time'],
+                            "exit_time": current_time,
+                            "type": position['type'],
+                            "entry_price": position['entry_price'],
+                            "exit_price": current_price,
+                            "pnl": pnl,
+                            "reason": reason,
+                            "strategy": strategy,
+                            "qty": position['amount'],
+                            "entry_index": position['index'],
+                            "exit_index": i
+                        })
+                        await log(f"Closed {position['type']} at {current_price:.2f} (PnL: {pnl:.2f}) - {reason}")
+                        position = None
+                        continue # Wait for next candle to re-enter
+
+                # Check Entry (Only if no position)
+                if not position:
+                    # Call Agent (Real API Call)
+                    # To save quota, we might want to skip some candles or use a cheaper model
+                    # For MVP, let's run it every 5 candles to save quota
+                    if i % 5 != 0:
+                        continue
+
+                    try:
+                        await log("Requesting AI analysis...")
+                        decision = await prefetcher.get(i)
+                        if decision:
+                            action = decision.action
+                            confidence = decision.confidence
                         
-                        await log(f"AI Decision: {action} (Confidence: {confidence})")
+                            await log(f"AI Decision: {action} (Confidence: {confidence})")
                         
-                        if action in ['BUY', 'SELL'] and confidence > 0.7:
-                            amount = capital * 0.1 # Invest 10%
-                            position = {
-                                'type': action,
-                                'entry_price': current_price,
-                                'amount': amount / current_price,
-                                'time': current_time
-                            }
-                            await log(f"OPEN {action} at {current_price:.2f} (Conf: {confidence})")
-                except Exception as e:
-                    await log(f"Agent error: {e}")
+                            if action in ['BUY', 'SELL'] and confidence > 0.7:
+                                amount = capital * 0.1 # Invest 10%
+                                position = {
+                                    'type': action,
+                                    'entry_price': current_price,
+                                    'amount': amount / current_price,
+                                    'time': current_time,
+                                    'index': i
+                                }
+                                await log(f"OPEN {action} at {current_price:.2f} (Conf: {confidence})")
+                    except Exception as e:
+                        await log(f"Agent error: {e}")
+        finally:
+            prefetcher.close()
+        self.results["llm_requests"] = prefetcher.stats
+
+        # Per-bar mark-to-market equity and summary metrics, computed in bulk
+        metrics, equity = backtest_metrics(df.close.astype('float64', copy=False), df.timestamp, self.results["trades"],
+                                           initial_capital, timeframe, start_index=20, open_position=position)
+        times = format_times(df.timestamp[20:])
+        self.results["equity_curve"] = [{"time": t, "equity": float(e)} for t, e in zip(times, equity)]
+        self.results["metrics"] = metrics
+        # Headline figures read by the dashboard
+        self.results["total_return"] = metrics["total_return"]
+        self.results["win_rate"] = metrics["win_rate"]
+        self.results["max_drawdown"] = metrics["max_drawdown"]
 
+        BACKTEST_CANDLES.inc(max(0, total_candles - start_index))
+        BACKTEST_LATENCY.observe(time.perf_counter() - started)
         await log("Backtest completed.")
         return self.results
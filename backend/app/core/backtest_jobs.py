@@ -0,0 +1,213 @@
+import json
+import uuid
+import zlib
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.downsample import lttb
+from app.core.telemetry import merge_backtest_counts
+from app.models.database import BacktestJob, BacktestTrade
+
+MAX_JOB_LOGS = 50
+TELEMETRY_OVERLAP = timedelta(seconds=60)  # Re-scan window for jobs committed after a later-finished one
+
+def _pack(data) -> bytes:
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode())
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob)) if blob else None
+
+def enqueue_job(db, params: dict) -> str:
+    """Persist a new backtest job; a worker process will pick it up."""
+    job = BacktestJob(id=str(uuid.uuid4()), status='queued', params=json.dumps(params), logs="[]")
+    db.add(job)
+    db.commit()
+    return job.id
+
+def claim_next_job(worker_id: str):
+    """
+    Atomically claim the oldest queued job, or a running job whose worker stopped heartbeating.
+    Returns (job_id, params, checkpoint) or None.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=settings.BACKTEST_LEASE_SECONDS)
+        claimable = or_(
+            BacktestJob.status == 'queued',
+            and_(BacktestJob.status == 'running', BacktestJob.heartbeat_at < stale)
+        )
+        candidates = db.query(BacktestJob.id).filter(claimable).order_by(BacktestJob.created_at).limit(5).all()
+        for (job_id,) in candidates:
+            # Conditional update: only one worker can win the row
+            claimed = db.query(BacktestJob).filter(BacktestJob.id == job_id, claimable).update(
+                {"status": 'running', "worker_id": worker_id, "heartbeat_at": now},
+                synchronize_session=False
+            )
+            db.commit()
+            if claimed:
+                job = db.query(BacktestJob).filter(BacktestJob.id == job_id).first()
+                return job.id, json.loads(job.params), _unpack(job.checkpoint)
+        return None
+    finally:
+        db.close()
+
+def record_progress(job_id: str, worker_id: str, messages: list = None, progress: float = None, checkpoint: dict = None):
+    """Heartbeat the job lease, appending log lines and/or storing a checkpoint."""
+    db = SessionLocal()
+    try:
+        job = db.query(BacktestJob).filter(BacktestJob.id == job_id, BacktestJob.worker_id == worker_id,
+                                           BacktestJob.status == 'running').first()
+        if not job:
+            return False  # Lease lost to another worker
+        job.heartbeat_at = datetime.utcnow()
+        if messages:
+            logs = json.loads(job.logs or "[]")
+            logs.extend(messages)
+            job.logs = json.dumps(logs[-MAX_JOB_LOGS:])
+        if progress is not None:
+            job.progress = progress
+        if checkpoint is not None:
+            job.checkpoint = _pack(checkpoint)
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+def complete_job(job_id: str, worker_id: str, results: dict, telemetry: dict = None) -> bool:
+    """
+    Store the results compactly: trades as rows, equity curve as a compressed column pair.
+    Returns False (nothing written) if the lease was lost to another worker.
+    """
+    db = SessionLocal()
+    try:
+        trades = results.pop("trades", [])
+        equity_curve = results.pop("equity_curve", [])
+        equity = _pack({
+            "time": [p["time"] for p in equity_curve],
+            "equity": [p["equity"] for p in equity_curve]
+        })
+        if not _finish(db, job_id, worker_id, telemetry, status='completed', summary=json.dumps(results),
+                       equity_curve=equity, progress=1.0):
+            return False
+        db.query(BacktestTrade).filter(BacktestTrade.job_id == job_id).delete()
+        db.bulk_insert_mappings(BacktestTrade, [
+            {"job_id": job_id, "seq": n, "type": t["type"], "entry_time": t["entry_time"], "exit_time": t["exit_time"],
+             "entry_price": t["entry_price"], "exit_price": t["exit_price"], "pnl": t["pnl"], "reason": t["reason"],
+             "strategy": t.get("strategy")}
+            for n, t in enumerate(trades)
+        ])
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+def fail_job(job_id: str, worker_id: str, error: str, telemetry: dict = None) -> bool:
+    """Mark the job failed; returns False (nothing written) if the lease was lost to another worker."""
+    db = SessionLocal()
+    try:
+        if not _finish(db, job_id, worker_id, telemetry, status='failed', error=error):
+            return False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+def _finish(db, job_id: str, worker_id: str, telemetry: dict = None, **values) -> bool:
+    """
+    Conditional update: only the worker still holding the running job's lease can finish it,
+    so a worker that was considered stale can't overwrite the results of the one that re-claimed it.
+    """
+    finished_at = datetime.utcnow()
+    values.update(
+        checkpoint=None,
+        finished_at=finished_at,
+        expires_at=finished_at + timedelta(hours=settings.BACKTEST_RESULT_TTL_HOURS)
+    )
+    if telemetry is not None:
+        values["telemetry"] = json.dumps(telemetry)
+    updated = db.query(BacktestJob).filter(
+        BacktestJob.id == job_id, BacktestJob.worker_id == worker_id, BacktestJob.status == 'running'
+    ).update(values, synchronize_session=False)
+    if not updated:
+        db.rollback()
+    return bool(updated)
+
+_telemetry_since = datetime.utcnow()  # Jobs finished before this process started were never exported by it
+_telemetry_imported = {}  # job_id -> finished_at, within the overlap window
+
+def import_job_telemetry():
+    """
+    Merge the metric counts stored by workers with their finished jobs into this process's registry,
+    each job once, so /metrics of the API reports backtests run by the worker pool.
+    """
+    global _telemetry_since
+    db = SessionLocal()
+    try:
+        rows = db.query(BacktestJob.id, BacktestJob.finished_at, BacktestJob.telemetry).filter(
+            BacktestJob.finished_at > _telemetry_since - TELEMETRY_OVERLAP,
+            BacktestJob.telemetry.isnot(None)
+        ).all()
+    finally:
+        db.close()
+    for job_id, finished_at, telemetry in rows:
+        if job_id in _telemetry_imported or finished_at <= _telemetry_since - TELEMETRY_OVERLAP:
+            continue
+        _telemetry_imported[job_id] = finished_at
+        try:
+            merge_backtest_counts(json.loads(telemetry))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring malformed telemetry of backtest job {job_id}: {e}")
+        _telemetry_since = max(_telemetry_since, finished_at)
+    horizon = _telemetry_since - TELEMETRY_OVERLAP
+    for job_id in [j for j, finished_at in _telemetry_imported.items() if finished_at <= horizon]:
+        del _telemetry_imported[job_id]
+
+def job_status(job: BacktestJob) -> dict:
+    """Status payload for the API (results contain totals only; trades/equity are paged)."""
+    result = {
+        "status": job.status,
+        "progress": job.progress,
+        "logs": json.loads(job.logs or "[]")
+    }
+    if job.error:
+        result["error"] = job.error
+    if job.summary:
+        result["results"] = json.loads(job.summary)
+    return result
+
+def get_job_trades(db, job_id: str, offset: int = 0, limit: int = 100):
+    rows = db.query(BacktestTrade).filter(BacktestTrade.job_id == job_id) \
+        .order_by(BacktestTrade.seq).offset(offset).limit(limit).all()
+    return [
+        {"entry_time": t.entry_time, "exit_time": t.exit_time, "type": t.type, "entry_price": t.entry_price,
+         "exit_price": t.exit_price, "pnl": t.pnl, "reason": t.reason, "strategy": t.strategy}
+        for t in rows
+    ]
+
+def get_job_equity(job: BacktestJob, offset: int = 0, limit: int = 1000, max_points: int = None):
+    curve = _unpack(job.equity_curve) or {"time": [], "equity": []}
+    end = offset + limit
+    times, equity = curve["time"][offset:end], curve["equity"][offset:end]
+    if max_points is not None and len(equity) > max_points:
+        keep = lttb(np.arange(len(equity)), np.asarray(equity, dtype=np.float64), max_points)
+        times, equity = [times[i] for i in keep], [equity[i] for i in keep]
+    return {
+        "total": len(curve["time"]),
+        "points": [{"time": t, "equity": e} for t, e in zip(times, equity)]
+    }
+
+def purge_expired_jobs() -> int:
+    """Delete finished jobs (and their trades) whose TTL has elapsed."""
+    db = SessionLocal()
+    try:
+        expired = [j for (j,) in db.query(BacktestJob.id).filter(BacktestJob.expires_at < datetime.utcnow()).all()]
+        if expired:
+            db.query(BacktestTrade).filter(BacktestTrade.job_id.in_(expired)).delete(synchronize_session=False)
+            db.query(BacktestJob).filter(BacktestJob.id.in_(expired)).delete(synchronize_session=False)
+            db.commit()
+        return len(expired)
+    finally:
+        db.close()
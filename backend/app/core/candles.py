@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+import numpy as np
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+def format_time(ms: int) -> str:
+    """Candle open time as shown in prompts and results, e.g. '2024-05-01 13:00:00'"""
+    return str(datetime(1970, 1, 1) + timedelta(milliseconds=int(ms)))
+
+def format_times(ms: np.ndarray) -> list:
+    """format_time for a whole array of ms timestamps at once"""
+    seconds = np.asarray(ms, dtype=np.int64).astype('datetime64[ms]').astype('datetime64[s]')
+    return [t.replace('T', ' ') for t in np.datetime_as_string(seconds, unit='s').tolist()]
+
+class Candles:
+    """
+    OHLCV window as columns: int64 ms open times plus one float array per field.
+
+    Slicing returns views sharing the same memory, so per-candle windows in backtests and
+    per-tick trims cost nothing. Convert with to_frame() only where pandas is actually needed
+    (prompt tables, JSON dumps); pandas is only imported then.
+    """
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, timestamp: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, volume: np.ndarray):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_ohlcv(cls, rows: list, dtype=np.float64) -> "Candles":
+        """From ccxt's [[ms, o, h, l, c, v], ...]; fields are stored as one contiguous block"""
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        fields = np.ascontiguousarray(data[:, 1:].T, dtype=dtype)
+        return cls(data[:, 0].astype(np.int64), *fields)
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame", dtype=np.float64) -> "Candles":
+        timestamp = df['timestamp']
+        if np.issubdtype(timestamp.dtype, np.datetime64):
+            timestamp = timestamp.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        return cls(np.asarray(timestamp, dtype=np.int64), *(df[k].to_numpy(dtype=dtype) for k in FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamp) == 0
+
+    def __getitem__(self, index: slice) -> "Candles":
+        if not isinstance(index, slice):
+            raise TypeError("Candles only support slicing; use row(i) for a single candle")
+        return Candles(*(getattr(self, k)[index] for k in self.__slots__))
+
+    def tail(self, n: int) -> "Candles":
+        return self[-n:] if n else self[:0]
+
+    def before(self, ms: int) -> "Candles":
+        """Candles opening before `ms` (timestamps are sorted)"""
+        return self[:int(np.searchsorted(self.timestamp, ms, side='left'))]
+
+    def row(self, i: int) -> dict:
+        return {k: (int(v[i]) if k == 'timestamp' else float(v[i])) for k, v in ((k, getattr(self, k)) for k in self.__slots__)}
+
+    def to_frame(self) -> "pd.DataFrame":
+        """DataFrame with datetime open times, as fetch_ohlcv used to return"""
+        import pandas as pd
+        df = pd.DataFrame({k: getattr(self, k) for k in FIELDS})
+        df.insert(0, 'timestamp', pd.to_datetime(self.timestamp, unit='ms'))
+        return df
+
+    def to_string(self) -> str:
+        return self.to_frame().to_string()
+
+    def to_json(self) -> str:
+        return self.to_frame().to_json()
+
+    def to_records(self) -> list:
+        """[{timestamp: ms, open, ...}] for API responses"""
+        columns = [self.timestamp.tolist()] + [getattr(self, k).tolist() for k in FIELDS]
+        return [dict(zip(self.__slots__, values)) for values in zip(*columns)]
+
+    @classmethod
+    def concat(cls, parts: list) -> "Candles":
+        return cls(*(np.concatenate([getattr(p, k) for p in parts]) for k in cls.__slots__))
+
+def aggregate(candles: Candles, bucket_ms: int) -> Candles:
+    """Merge candles into `bucket_ms` buckets aligned to the epoch (e.g. 1h candles into 4h)"""
+    n = len(candles)
+    if n == 0:
+        return candles
+    keys = candles.timestamp // bucket_ms
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [n])) - 1
+    return Candles(
+        keys[starts] * bucket_ms,
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        candles.close[ends],
+        np.add.reduceat(candles.volume, starts)
+    )
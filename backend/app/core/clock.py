@@ -0,0 +1,29 @@
+import asyncio
+import time
+from app.core.config import settings
+
+class Clock:
+    """
+    Wall clock that can run faster than real time.
+    With speed > 1 simulated time advances `speed` seconds per real second and sleeps shrink
+    accordingly, so a loop driven by mock backends runs e.g. 100x faster.
+    """
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self._origin_wall = time.time()
+        self._origin_mono = time.monotonic()
+
+    def time(self) -> float:
+        """Current (simulated) epoch seconds"""
+        if self.speed == 1.0:
+            return time.time()
+        return self._origin_wall + (time.monotonic() - self._origin_mono) * self.speed
+
+    def milliseconds(self) -> int:
+        return int(self.time() * 1000)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds / self.speed)
+
+# Time acceleration only applies to the offline mock backends
+clock = Clock(speed=settings.SIM_SPEED if settings.EXCHANGE_BACKEND == "mock" else 1.0)
@@ -1,18 +1,94 @@
-from pydantic_settings import BaseSettings
-from typing import Optional
-
-class Settings(BaseSettings):
-    PROJECT_NAME: str = "Agentic Trading System"
-    
-    # Binance
-    BINANCE_API_KEY: Optional[str] = None
-    BINANCE_SECRET_KEY: Optional[str] = None
-    BINANCE_TESTNET: bool = True
-    
-    # Gemini
-    GEMINI_API_KEY: Optional[str] = None
-    
-    class Config:
-        env_file = ".env"
-
-settings = Settings()
+from pydantic_settings import BaseSettings
+from typing import Optional
+
+class Settings(BaseSettings):
+    PROJECT_NAME: str = "Agentic Trading System"
+    
+    # Binance
+    BINANCE_API_KEY: Optional[str] = None
+    BINANCE_SECRET_KEY: Optional[str] = None
+    BINANCE_TESTNET: bool = True
+    
+    # Gemini
+    GEMINI_API_KEY: Optional[str] = None
+    
+    # Offline backends for load testing: "binance"/"gemini" or "mock"
+    EXCHANGE_BACKEND: str = "binance"
+    LLM_BACKEND: str = "gemini"
+    SIM_SPEED: float = 1.0  # Simulated seconds per real second (mock exchange only)
+    MOCK_CANDLES_DIR: Optional[str] = None  # Recorded candles as <BASE>_<QUOTE>.csv; synthetic prices if unset
+    MOCK_EXCHANGE_LATENCY_MS: float = 0.0
+    MOCK_LLM_LATENCY_MS: float = 0.0
+    MOCK_LLM_JITTER_MS: float = 0.0
+    MOCK_LLM_SCRIPT: Optional[str] = None  # JSON file with a list of responses to cycle through
+    
+    # LLM ensembles: estimated USD per decision; models beyond the cap are not queried (None = no cap)
+    LLM_MAX_COST_PER_DECISION: Optional[float] = None
+    LLM_STRUCTURED_OUTPUT: bool = True  # Ask for schema-constrained JSON (disable for models without support)
+    
+    # LLM daily budget for live analyses, USD (None = unlimited); tiers are fractions of it spent
+    LLM_DAILY_BUDGET_USD: Optional[float] = None
+    LLM_BUDGET_ECONOMY_AT: float = 0.7  # Switch to the fallback model with a shorter prompt context
+    LLM_BUDGET_THROTTLE_AT: float = 0.9  # Also analyze only every LLM_BUDGET_INTERVAL_FACTOR-th tick
+    LLM_BUDGET_FALLBACK_MODEL: str = "gemini-2.5-flash-lite"
+    LLM_BUDGET_CONTEXT_CANDLES: int = 8  # Candles per timeframe in the prompt (15 normally)
+    LLM_BUDGET_INTERVAL_FACTOR: int = 3
+    LLM_BUDGET_REFRESH_SECONDS: int = 15  # How often today's saved spend is re-read (shared across workers)
+    
+    # Backtest Workers
+    BACKTEST_WORKERS: int = 2
+    BACKTEST_LEASE_SECONDS: int = 120  # A running job without heartbeat for this long is re-claimed
+    BACKTEST_RESULT_TTL_HOURS: int = 72
+    BACKTEST_LLM_CONCURRENCY: int = 8  # Model requests in flight per backtest
+    BACKTEST_LLM_LOOKAHEAD: int = 16  # Evaluation points requested ahead of the simulation
+    
+    # Market microstructure feed (partial depth + aggTrades websocket) for the prompt; bounded per symbol
+    MICROSTRUCTURE_ENABLED: bool = False
+    MICROSTRUCTURE_DEPTH_LEVELS: int = 20  # 5, 10 or 20 (Binance partial depth streams)
+    MICROSTRUCTURE_TRADE_BUFFER: int = 2048  # Aggregated trades kept for the rolling flow features
+    MICROSTRUCTURE_HISTORY: int = 600  # Depth snapshots averaged for the rolling imbalance
+    MICROSTRUCTURE_WALL_RATIO: float = 3.0  # A level this many times the side's mean size is a wall
+    MICROSTRUCTURE_STALE_SECONDS: int = 30  # Features older than this are not used
+    
+    # Trading Workers
+    TRADING_WORKERS: bool = False  # Live loops run in app.trading_worker processes; the API only records sessions
+    TRADING_WORKER_MAX_SYMBOLS: int = 4  # Sessions (symbols) one worker process runs at most
+    TRADING_LEASE_SECONDS: int = 60  # A session without heartbeat for this long is taken over by another worker
+    
+    # Scheduling
+    CANDLE_CLOSE_DELAY_SECONDS: float = 1.0  # Wait after a candle close so the exchange has finalized it
+    MONITOR_INTERVAL_SECONDS: float = 10.0  # SL/TP check cadence between analyses
+    CLOCK_RESYNC_SECONDS: float = 600.0  # How often to re-measure the exchange time offset
+    RECONCILE_INTERVAL_SECONDS: float = 60.0  # Exchange position/fill reconciliation (real trading)
+    SPECULATIVE_LEAD_SECONDS: float = 0.0  # Start the analysis this long before the candle close (0 = off)
+    SPECULATIVE_PRICE_TOLERANCE: float = 0.001  # Max relative OHLC change of the final candle for an early decision to stand
+    SPECULATIVE_VOLUME_TOLERANCE: float = 0.25  # Max relative volume change of the final candle
+    
+    # Market scanner (loops started with "scanner": true only analyze while in the top K)
+    SCANNER_TOP_K: int = 5  # Pairs per market type/timeframe/strategy routed to the model
+    SCANNER_REFRESH_SECONDS: int = 300
+    SCANNER_UNIVERSE: int = 150  # Most traded pairs (24h quote volume) scored each refresh
+    SCANNER_QUOTE: str = "USDT"
+    SCANNER_CANDLES: int = 60  # Candles per pair the scores are computed on
+    SCANNER_CONCURRENCY: int = 10  # Candle requests in flight during a refresh
+    
+    # Warm restart
+    WARM_RESTART_ENABLED: bool = True  # Snapshot live loop state after every tick and restore it on start
+    WARM_STATE_DIR: str = "./warm_state"  # One .npz per symbol plus the cached exchange markets
+    WARM_STATE_MAX_AGE_SECONDS: int = 900  # Older snapshots are ignored (cold start)
+    WARM_MARKETS_MAX_AGE_SECONDS: int = 21600  # Cached markets are reloaded from the exchange after this
+    
+    # Market data
+    CANDLE_FLOAT32: bool = False  # Store OHLCV as float32 (half the memory, ~7 significant digits)
+    CHART_MAX_POINTS: int = 1000  # Default point budget for chart responses (candles, equity curves)
+    CHART_CACHE_CANDLES: int = 100000  # Base candles kept per symbol/timeframe for zoomed-out charts
+    
+    # Observability
+    TRACING_ENABLED: bool = False  # Keep per-stage span trees of recent ticks (GET /api/traces)
+    BINANCE_WEIGHT_LIMIT: int = 2400  # Request weight per minute allowed by the exchange
+    ENABLE_PROFILING: bool = False  # Mount the /api/admin/profile/* endpoints
+    
+    class Config:
+        env_file = ".env"
+
+settings = Settings()
@@ -0,0 +1,122 @@
+import threading
+from sqlalchemy import func
+from app.core.database import SessionLocal
+from app.models.database import Configuration
+
+# Known keys and the type their stored string is read as
+CONFIG_TYPES = {
+    "binance_api_key": str,
+    "binance_secret_key": str,
+    "gemini_api_key": str,
+    "symbol": str,
+    "timeframe": str,
+    "investment_amount": float,
+    "leverage": int,
+    "paper_trading": bool,
+    "max_open_positions": int,
+    "strategy": str,
+    "check_interval": int
+}
+
+def _convert(key: str, value: str):
+    kind = CONFIG_TYPES.get(key, str)
+    if value is None or kind is str:
+        return value
+    try:
+        if kind is bool:
+            return value.strip().lower() in ("true", "1", "yes")
+        return kind(float(value)) if kind is int else kind(value)
+    except ValueError:
+        return None
+
+class ConfigService:
+    """
+    In-memory view of the configurations table. Loaded on first read, reloaded after every write
+    made through update(); subscribers receive the typed values that actually changed.
+
+    Writes from other processes (the API, seen from a trading worker, or a manual DB edit) are
+    seen after invalidate(), or published like local ones by refresh().
+    """
+    def __init__(self):
+        self._values = None  # Raw stored strings, as returned by GET /config
+        self._version = None  # Newest updated_at of the table when _values was read by refresh()
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def _load(self) -> dict:
+        with self._lock:
+            if self._values is None:
+                db = SessionLocal()
+                try:
+                    self._values = {c.config_key: c.config_value for c in db.query(Configuration).all()}
+                finally:
+                    db.close()
+            return self._values
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+
+    def raw(self) -> dict:
+        return dict(self._load())
+
+    def get(self, key: str, default=None):
+        value = _convert(key, self._load().get(key))
+        return default if value is None else value
+
+    def update(self, values: dict) -> dict:
+        """Persist non-None values; returns (and publishes) the typed values that changed"""
+        current = self._load()
+        changes = {k: str(v) for k, v in values.items() if v is not None and current.get(k) != str(v)}
+        if not changes:
+            return {}
+        db = SessionLocal()
+        try:
+            for key, value in changes.items():
+                row = db.query(Configuration).filter(Configuration.config_key == key).first()
+                if row:
+                    row.config_value = value
+                else:
+                    db.add(Configuration(config_key=key, config_value=value))
+            db.commit()
+        finally:
+            db.close()
+        self.invalidate()
+        return self._publish(changes)
+
+    def refresh(self) -> dict:
+        """
+        Reload if the table changed since the last refresh (its newest updated_at, one cheap query)
+        and publish the values that differ from the ones held; returns them typed
+        """
+        db = SessionLocal()
+        try:
+            version = db.query(func.max(Configuration.updated_at)).scalar()
+            if version == self._version and self._values is not None:
+                return {}
+            values = {c.config_key: c.config_value for c in db.query(Configuration).all()}
+        finally:
+            db.close()
+        with self._lock:
+            previous, self._values, self._version = self._values, values, version
+        if previous is None:
+            return {}  # Nothing held yet to compare with
+        return self._publish({k: v for k, v in values.items() if previous.get(k) != v})
+
+    def _publish(self, changes: dict) -> dict:
+        if not changes:
+            return {}
+        typed = {key: _convert(key, value) for key, value in changes.items()}
+        for callback in list(self._subscribers):
+            try:
+                callback(typed)
+            except Exception as e:
+                print(f"Config subscriber failed: {e}")
+        return typed
+
+    def subscribe(self, callback):
+        """Call `callback(changes)` after each write; returns a function that unsubscribes"""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback) if callback in self._subscribers else None
+
+config_service = ConfigService()
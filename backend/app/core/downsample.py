@@ -0,0 +1,85 @@
+import asyncio
+import numpy as np
+from app.core.candles import Candles, aggregate
+from app.core.config import settings
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `n` points that keep the visual shape of y(x)
+    (peaks and troughs survive, unlike plain striding). First and last points are always kept.
+    """
+    size = len(x)
+    if n >= size:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1][:n])
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (size - 2) / (n - 2)
+    indices = np.empty(n, dtype=np.int64)
+    indices[0], indices[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, size)
+        if end >= next_end:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+class CandlePyramid:
+    """
+    Cached base candles of one symbol/timeframe plus aggregates at 4x, 16x, 64x and 256x the
+    timeframe. Appending candles only rebuilds the aggregate buckets they touch.
+    """
+    FACTORS = (1, 4, 16, 64, 256)
+
+    def __init__(self, tf_ms: int, max_candles: int = None):
+        self.tf_ms = tf_ms
+        self.max_candles = max_candles or settings.CHART_CACHE_CANDLES
+        self.levels = {factor: Candles.from_ohlcv([]) for factor in self.FACTORS}
+        self.lock = asyncio.Lock()
+
+    @property
+    def base(self) -> Candles:
+        return self.levels[1]
+
+    def update(self, candles: Candles):
+        """Merge fetched base candles; ones already cached (e.g. the forming candle) are replaced"""
+        if candles.empty:
+            return
+        first = int(candles.timestamp[0])
+        base = Candles.concat([self.base.before(first), candles])
+        trimmed = len(base) > self.max_candles
+        if trimmed:
+            base = base[-self.max_candles:]
+            first = int(base.timestamp[0])  # Every bucket may have lost candles: rebuild all
+        self.levels[1] = base
+        for factor in self.FACTORS[1:]:
+            bucket = self.tf_ms * factor
+            start = first // bucket * bucket
+            kept = self.levels[factor][:0] if trimmed else self.levels[factor].before(start)
+            self.levels[factor] = Candles.concat([kept, aggregate(base[len(base.before(start)):], bucket)])
+
+    def query(self, start: int, end: int, max_points: int) -> Candles:
+        """Candles opening in [start, end) at the finest level that fits in `max_points`"""
+        for factor in self.FACTORS:
+            level = self.levels[factor]
+            window = level[int(np.searchsorted(level.timestamp, start)):int(np.searchsorted(level.timestamp, end))]
+            if len(window) <= max_points:
+                return window
+        # Wider than the top level allows: merge it further
+        bucket = self.tf_ms * self.FACTORS[-1] * -(-len(window) // max_points)
+        return aggregate(window, bucket)
+
+_pyramids = {}
+
+def get_pyramid(symbol: str, timeframe: str, tf_ms: int) -> CandlePyramid:
+    key = (symbol, timeframe)
+    if key not in _pyramids:
+        _pyramids[key] = CandlePyramid(tf_ms)
+    return _pyramids[key]
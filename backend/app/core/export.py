@@ -0,0 +1,111 @@
+import csv
+import io
+from datetime import datetime
+from sqlalchemy import select, Integer, Float, Boolean, DateTime
+from app.core.database import engine
+from app.models.database import Trade, GeminiDecision, SystemLog
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow/Parquet exports are unavailable, CSV still works
+    pa = pq = None
+
+CHUNK_ROWS = 10000
+
+# Exportable tables: model, time column used for range filters, whether it has a symbol column.
+# GeminiDecision.market_data (a JSON candle dump per row) is left out.
+DATASETS = {
+    "trades": (Trade, Trade.entry_time, True),
+    "decisions": (GeminiDecision, GeminiDecision.timestamp, True),
+    "logs": (SystemLog, SystemLog.timestamp, False)
+}
+EXCLUDED_COLUMNS = {"market_data"}
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet")
+}
+
+def export_columns(dataset: str) -> list:
+    model = DATASETS[dataset][0]
+    return [c for c in model.__table__.columns if c.name not in EXCLUDED_COLUMNS]
+
+def _query(dataset: str, symbol: str = None, start: datetime = None, end: datetime = None):
+    model, time_column, has_symbol = DATASETS[dataset]
+    query = select(*export_columns(dataset)).order_by(model.id)
+    if symbol and has_symbol:
+        query = query.where(model.symbol == symbol)
+    if start:
+        query = query.where(time_column >= start)
+    if end:
+        query = query.where(time_column < end)
+    return query
+
+def _chunks(query):
+    """Row chunks from a server-side cursor (where the driver supports one); constant memory"""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=CHUNK_ROWS).execute(query)
+        for rows in result.partitions(CHUNK_ROWS):
+            yield rows
+
+def _arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp('us')
+    return pa.string()
+
+class _Buffer(io.RawIOBase):
+    """Write target whose contents are handed out (and dropped) after every chunk"""
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+def stream_export(dataset: str, fmt: str, symbol: str = None, start: datetime = None, end: datetime = None):
+    """Yield the export file in pieces, one query chunk at a time"""
+    columns = export_columns(dataset)
+    names = [c.name for c in columns]
+    chunks = _chunks(_query(dataset, symbol, start, end))
+
+    if fmt == "csv":
+        text = io.StringIO()
+        writer = csv.writer(text)
+        writer.writerow(names)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield text.getvalue().encode()
+            text.seek(0)
+            text.truncate()
+        yield text.getvalue().encode()
+        return
+
+    schema = pa.schema([(c.name, _arrow_type(c)) for c in columns])
+    sink = _Buffer()
+    writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            if fmt == "arrow":
+                writer.write_batch(batch)
+            else:
+                writer.write_table(pa.Table.from_batches([batch]))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
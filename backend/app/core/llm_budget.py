@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import GeminiDecision
+
+TIERS = ("normal", "economy", "throttled", "exhausted")
+
+def day_start(day=None) -> datetime:
+    return datetime.combine(day or datetime.utcnow().date(), datetime.min.time())
+
+def usage_by_day(db, since: datetime) -> list:
+    """Saved decisions' token usage per (day, symbol, strategy, model)"""
+    day = func.date(GeminiDecision.timestamp)
+    rows = db.query(
+        day, GeminiDecision.symbol, GeminiDecision.strategy, GeminiDecision.model, func.count(GeminiDecision.id),
+        func.sum(GeminiDecision.prompt_tokens), func.sum(GeminiDecision.output_tokens), func.sum(GeminiDecision.cost_usd)
+    ).filter(GeminiDecision.timestamp >= since, GeminiDecision.model.isnot(None)) \
+     .group_by(day, GeminiDecision.symbol, GeminiDecision.strategy, GeminiDecision.model) \
+     .order_by(day, GeminiDecision.symbol).all()
+    return [{
+        "day": str(d), "symbol": symbol, "strategy": strategy, "model": model, "decisions": count,
+        "prompt_tokens": prompt_tokens or 0, "output_tokens": output_tokens or 0, "cost_usd": round(cost or 0.0, 6)
+    } for d, symbol, strategy, model, count, prompt_tokens, output_tokens, cost in rows]
+
+class LlmBudget:
+    """
+    Live analysis spend for today (UTC) against LLM_DAILY_BUDGET_USD, and the tier the trading
+    loops degrade to as it runs out:
+    - "economy" (LLM_BUDGET_ECONOMY_AT spent): fallback model and a shorter prompt context
+    - "throttled" (LLM_BUDGET_THROTTLE_AT spent): also analyze only every Nth tick per symbol
+    - "exhausted": no analyses until the next day
+    Saved decisions are the shared record (re-read every LLM_BUDGET_REFRESH_SECONDS, so all
+    trading workers count against one budget); analyses that produced no saved decision (failed
+    parses, discarded speculation) are added from this process's own meter.
+    """
+    def __init__(self):
+        self.day = None
+        self.saved = 0.0  # Today's cost of saved decisions, as of the last refresh
+        self.recent = 0.0  # Cost saved by this process since then
+        self.unsaved = defaultdict(float)  # (symbol, model) -> cost of today's analyses that weren't saved
+        self.ticks = defaultdict(int)
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+
+    def _refresh(self):
+        today = datetime.utcnow().date()
+        if self.day != today:
+            self.day, self.saved, self.recent, self.refreshed_at = today, 0.0, 0.0, None
+            self.unsaved.clear()
+            self.ticks.clear()
+        if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < settings.LLM_BUDGET_REFRESH_SECONDS:
+            return
+        db = SessionLocal()
+        try:
+            total = db.query(func.sum(GeminiDecision.cost_usd)).filter(GeminiDecision.timestamp >= day_start(today)).scalar()
+            self.saved, self.recent = total or 0.0, 0.0
+        except Exception as e:
+            print(f"Error loading today's LLM spend: {e}")
+        finally:
+            db.close()
+        self.refreshed_at = time.monotonic()
+
+    def record(self, symbol: str, usage: dict, saved: bool):
+        """Account one analysis (usage as returned by summarize_usage)"""
+        if not usage or not usage["cost_usd"]:
+            return
+        with self.lock:
+            self._refresh()
+            if saved:
+                self.recent += usage["cost_usd"]
+            else:
+                self.unsaved[(symbol, usage["model"])] += usage["cost_usd"]
+
+    def spent_today(self) -> float:
+        with self.lock:
+            self._refresh()
+            return self.saved + self.recent + sum(self.unsaved.values())
+
+    def tier(self) -> str:
+        budget = settings.LLM_DAILY_BUDGET_USD
+        if not budget:
+            return "normal"
+        spent = self.spent_today() / budget
+        if spent >= 1.0:
+            return "exhausted"
+        if spent >= settings.LLM_BUDGET_THROTTLE_AT:
+            return "throttled"
+        if spent >= settings.LLM_BUDGET_ECONOMY_AT:
+            return "economy"
+        return "normal"
+
+    def allow_analysis(self, symbol: str) -> bool:
+        """Called once per live tick that would analyze `symbol`"""
+        tier = self.tier()
+        if tier != "throttled":
+            return tier != "exhausted"
+        with self.lock:
+            allowed = self.ticks[symbol] % max(1, settings.LLM_BUDGET_INTERVAL_FACTOR) == 0
+            self.ticks[symbol] += 1
+            return allowed
+
+    def report(self) -> dict:
+        spent = self.spent_today()
+        budget = settings.LLM_DAILY_BUDGET_USD
+        with self.lock:
+            unsaved = [{"symbol": s, "model": m, "cost_usd": round(c, 6)} for (s, m), c in self.unsaved.items()]
+        return {
+            "day": self.day.isoformat(),
+            "budget_usd": budget,
+            "spent_usd": round(spent, 6),
+            "remaining_usd": round(max(0.0, budget - spent), 6) if budget else None,
+            "tier": self.tier(),
+            "unsaved": unsaved
+        }
+
+llm_budget = LlmBudget()
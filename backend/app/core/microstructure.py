@@ -0,0 +1,249 @@
+import json
+import numpy as np
+from datetime import datetime
+from app.core.clock import clock
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import MicrostructureSnapshot
+
+RECORD_SLACK_SECONDS = 5.0  # Live snapshots follow the close by the close delay plus up to this (data fetch, SL/TP checks)
+
+class TradeFlow:
+    """
+    The last `capacity` aggregated trades in a ring buffer, with running sums so the rolling
+    features cost O(1) per trade. Sums are recomputed from the buffer once per `capacity`
+    evictions to keep float drift in check (amortized O(1)).
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.time = np.zeros(capacity, dtype=np.int64)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.qty = np.zeros(capacity, dtype=np.float64)
+        self.side = np.zeros(capacity, dtype=np.int8)  # +1 taker buy, -1 taker sell
+        self.size = 0
+        self.head = 0  # Next slot to write
+        self.buy_volume = self.sell_volume = self.notional = 0.0
+        self.cvd = 0.0  # Cumulative volume delta since the feed started (not limited to the buffer)
+        self.evictions = 0
+
+    def add(self, timestamp: int, price: float, qty: float, buyer_is_maker: bool):
+        i = self.head
+        if self.size == self.capacity:
+            self._account(i, -1)
+            self.evictions += 1
+        else:
+            self.size += 1
+        side = -1 if buyer_is_maker else 1
+        self.time[i], self.price[i], self.qty[i], self.side[i] = timestamp, price, qty, side
+        self._account(i, 1)
+        self.cvd += side * qty
+        self.head = (i + 1) % self.capacity
+        if self.evictions >= self.capacity:
+            self._resum()
+
+    def _account(self, i: int, sign: int):
+        if self.side[i] > 0:
+            self.buy_volume += sign * self.qty[i]
+        else:
+            self.sell_volume += sign * self.qty[i]
+        self.notional += sign * self.price[i] * self.qty[i]
+
+    def _resum(self):
+        qty, side = self.qty[:self.size], self.side[:self.size]
+        self.buy_volume = float(qty[side > 0].sum())
+        self.sell_volume = float(qty[side < 0].sum())
+        self.notional = float((self.price[:self.size] * qty).sum())
+        self.evictions = 0
+
+    def features(self) -> dict:
+        if not self.size:
+            return None
+        oldest = self.time[self.head if self.size == self.capacity else 0]
+        newest = self.time[(self.head - 1) % self.capacity]
+        volume = self.buy_volume + self.sell_volume
+        return {
+            "window_seconds": round((newest - oldest) / 1000, 1),
+            "trades": self.size,
+            "buy_volume": round(self.buy_volume, 6),
+            "sell_volume": round(self.sell_volume, 6),
+            "delta": round(self.buy_volume - self.sell_volume, 6),
+            "buy_ratio": round(self.buy_volume / volume, 4) if volume else None,
+            "vwap": round(self.notional / volume, 8) if volume else None,
+            "cvd": round(self.cvd, 6)
+        }
+
+class DepthBook:
+    """
+    Latest partial order book (top `levels` per side, replaced by every depth snapshot) and a
+    ring of recent imbalances. Each update is O(levels), a fixed small constant.
+    """
+    def __init__(self, levels: int, history: int):
+        self.levels = levels
+        self.bids = np.zeros((0, 2))
+        self.asks = np.zeros((0, 2))
+        self.time = None
+        self.imbalances = np.zeros(history)
+        self.imbalance_count = 0
+        self.imbalance_sum = 0.0
+
+    def update(self, timestamp: int, bids: list, asks: list):
+        self.bids = np.asarray(bids[:self.levels], dtype=np.float64).reshape(-1, 2)
+        self.asks = np.asarray(asks[:self.levels], dtype=np.float64).reshape(-1, 2)
+        self.time = timestamp
+        i = self.imbalance_count % len(self.imbalances)
+        value = self.imbalance()
+        self.imbalance_sum += value - self.imbalances[i]
+        self.imbalances[i] = value
+        self.imbalance_count += 1
+
+    def imbalance(self) -> float:
+        """(bid size - ask size) / total over the levels held: +1 all bids, -1 all asks"""
+        bid, ask = self.bids[:, 1].sum(), self.asks[:, 1].sum()
+        return float((bid - ask) / (bid + ask)) if bid + ask else 0.0
+
+    @staticmethod
+    def _wall(side: np.ndarray, mid: float) -> dict:
+        """The largest level, if it stands out from the rest of its side"""
+        if len(side) < 2:
+            return None
+        k = int(side[:, 1].argmax())
+        ratio = side[k, 1] / side[:, 1].mean()
+        if ratio < settings.MICROSTRUCTURE_WALL_RATIO:
+            return None
+        return {
+            "price": float(side[k, 0]),
+            "size": float(side[k, 1]),
+            "ratio": round(float(ratio), 2),
+            "distance_bps": round(abs(float(side[k, 0]) - mid) / mid * 10000, 2)
+        }
+
+    def features(self) -> dict:
+        if not len(self.bids) or not len(self.asks):
+            return None
+        best_bid, best_ask = self.bids[0, 0], self.asks[0, 0]
+        mid = (best_bid + best_ask) / 2
+        held = min(self.imbalance_count, len(self.imbalances))
+        return {
+            "mid": round(float(mid), 8),
+            "spread_bps": round(float(best_ask - best_bid) / mid * 10000, 3),
+            "imbalance": round(self.imbalance(), 4),
+            "imbalance_avg": round(self.imbalance_sum / held, 4),
+            "bid_wall": self._wall(self.bids, mid),
+            "ask_wall": self._wall(self.asks, mid)
+        }
+
+class MicrostructureBook:
+    """Bounded per-symbol microstructure state, fed by MarketDataStream"""
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.trades = TradeFlow(settings.MICROSTRUCTURE_TRADE_BUFFER)
+        self.depth = DepthBook(settings.MICROSTRUCTURE_DEPTH_LEVELS, settings.MICROSTRUCTURE_HISTORY)
+        self.updated_at = None
+
+    def on_trade(self, timestamp: int, price: float, qty: float, buyer_is_maker: bool):
+        self.trades.add(timestamp, price, qty, buyer_is_maker)
+        self.updated_at = clock.milliseconds()
+
+    def on_depth(self, timestamp: int, bids: list, asks: list):
+        self.depth.update(timestamp, bids, asks)
+        self.updated_at = clock.milliseconds()
+
+    def features(self) -> dict:
+        """Current rolling features, or None if the feed is empty or stale"""
+        if self.updated_at is None or clock.milliseconds() - self.updated_at > settings.MICROSTRUCTURE_STALE_SECONDS * 1000:
+            return None
+        book, flow = self.depth.features(), self.trades.features()
+        if book is None and flow is None:
+            return None
+        return {"time": clock.milliseconds(), "book": book, "flow": flow}
+
+    def state(self) -> dict:
+        """Buffers and running sums as flat arrays (warm restart snapshots)"""
+        t, d = self.trades, self.depth
+        return {
+            "trade_time": t.time, "trade_price": t.price, "trade_qty": t.qty, "trade_side": t.side,
+            "trade_sums": np.array([t.size, t.head, t.evictions, t.buy_volume, t.sell_volume, t.notional, t.cvd]),
+            "bids": d.bids, "asks": d.asks, "imbalances": d.imbalances,
+            "depth_sums": np.array([d.imbalance_count, d.imbalance_sum, -1 if d.time is None else d.time,
+                                    -1 if self.updated_at is None else self.updated_at])
+        }
+
+    def restore(self, state: dict) -> bool:
+        """Resume from state(); False (book left empty) if the buffer sizes have changed since"""
+        t, d = self.trades, self.depth
+        if len(state["trade_time"]) != t.capacity or len(state["imbalances"]) != len(d.imbalances):
+            return False
+        t.time[:], t.price[:], t.qty[:], t.side[:] = state["trade_time"], state["trade_price"], state["trade_qty"], state["trade_side"]
+        size, head, evictions, t.buy_volume, t.sell_volume, t.notional, t.cvd = state["trade_sums"].tolist()
+        t.size, t.head, t.evictions = int(size), int(head), int(evictions)
+        d.bids, d.asks, d.imbalances[:] = state["bids"], state["asks"], state["imbalances"]
+        count, d.imbalance_sum, depth_time, updated_at = state["depth_sums"].tolist()
+        d.imbalance_count = int(count)
+        d.time = None if depth_time < 0 else int(depth_time)
+        self.updated_at = None if updated_at < 0 else int(updated_at)
+        return True
+
+def format_features(features: dict) -> str:
+    """Compact prompt text for a features dict"""
+    lines = []
+    book, flow = features.get("book"), features.get("flow")
+    if book:
+        lines.append(f"- Libro (top {settings.MICROSTRUCTURE_DEPTH_LEVELS} niveles): spread {book['spread_bps']} bps, "
+                     f"imbalance {book['imbalance']:+.2f} (media reciente {book['imbalance_avg']:+.2f}; +1 = solo compradores)")
+        for key, name in (("bid_wall", "Muro de compra"), ("ask_wall", "Muro de venta")):
+            wall = book.get(key)
+            if wall:
+                lines.append(f"- {name}: {wall['size']} @ {wall['price']} ({wall['ratio']}x la media, a {wall['distance_bps']} bps)")
+    if flow:
+        lines.append(f"- Flujo de trades (últimos {flow['trades']} agregados, {flow['window_seconds']}s): "
+                     f"compras agresoras {flow['buy_volume']}, ventas agresoras {flow['sell_volume']}, "
+                     f"delta {flow['delta']:+}, CVD {flow['cvd']:+}, VWAP {flow['vwap']}")
+    return "\n".join(lines)
+
+def record_snapshot(symbol: str, features: dict):
+    """Persist features as of a live analysis, for backtests over the same period"""
+    db = SessionLocal()
+    try:
+        db.add(MicrostructureSnapshot(
+            symbol=symbol,
+            timestamp=datetime.utcfromtimestamp(features["time"] / 1000),
+            features=json.dumps(features)
+        ))
+        db.commit()
+    except Exception as e:
+        print(f"Failed to save microstructure snapshot: {e}")
+    finally:
+        db.close()
+
+class FeatureHistory:
+    """Recorded snapshots of one symbol, looked up by time (backtests)"""
+    def __init__(self, times: np.ndarray, features: list):
+        self.times = times
+        self.features = features
+
+    @classmethod
+    def load(cls, symbol: str, start_ms: int, end_ms: int) -> "FeatureHistory":
+        db = SessionLocal()
+        try:
+            rows = db.query(MicrostructureSnapshot.features).filter(
+                MicrostructureSnapshot.symbol == symbol,
+                MicrostructureSnapshot.timestamp >= datetime.utcfromtimestamp(start_ms / 1000),
+                MicrostructureSnapshot.timestamp <= datetime.utcfromtimestamp(end_ms / 1000)
+            ).order_by(MicrostructureSnapshot.timestamp).all()
+        finally:
+            db.close()
+        features = [json.loads(row[0]) for row in rows]
+        return cls(np.array([f["time"] for f in features], dtype=np.int64), features)
+
+    def __len__(self):
+        return len(self.features)
+
+    def at(self, ms: int, max_age_ms: int, after_ms: int = 0) -> dict:
+        """
+        The latest snapshot at or before `ms + after_ms` (live ticks record theirs shortly after the
+        close), if not older than `max_age_ms` before `ms`
+        """
+        i = int(np.searchsorted(self.times, ms + after_ms, side="right")) - 1
+        if i < 0 or ms - self.times[i] > max_age_ms:
+            return None
+        return self.features[i]
@@ -1,360 +1,900 @@
-import asyncio
-import json
-from app.agents.binance_agent import BinanceAgent
-from app.agents.gemini_agent import GeminiAgent
-from app.core.database import SessionLocal
-from app.models.database import GeminiDecision, Trade, SystemLog, Configuration
-from datetime import datetime
-
-class TradingOrchestrator:
-    def __init__(self):
-        self.binance = None # Initialized on start
-        self.gemini = None
-        self.is_running = False
-        self.symbol = None
-        self.market_type = None
-        self.timeframe = None
-        self.investment_amount = None
-        self.leverage = None
-
-    def log(self, level: str, message: str, details: dict = None):
-        """Save log to database and print"""
-        print(f"[{level}] {message}")
-        try:
-            db = SessionLocal()
-            log_entry = SystemLog(
-                level=level,
-                component="Orchestrator",
-                message=message,
-                details=json.dumps(details) if details else None
-            )
-            db.add(log_entry)
-            db.commit()
-            db.close()
-        except Exception as e:
-            print(f"Failed to save log: {e}")
-
-    async def manage_open_positions(self, symbol: str, current_price: float, paper_trading: bool):
-        """
-        Check ALL open positions for the symbol and handle SL/TP.
-        Returns the number of positions that remain OPEN.
-        """
-        db = SessionLocal()
-        try:
-            # Find ALL open trades for this symbol
-            trades = db.query(Trade).filter(
-                Trade.symbol == symbol, 
-                Trade.status == 'OPEN'
-            ).all()
-            
-            open_count = 0
-            
-            if not trades:
-                return 0
-            
-            # --- SYNCHRONIZATION (Real Trading Only) ---
-            # Note: Syncing multiple positions is complex because Binance returns a net position for Futures.
-            # If we are in Hedge Mode, we might have long and short.
-            # If in One-Way Mode (default), we only have one net position.
-            # For simplicity in this iteration: 
-            # We will sync based on TOTAL size. If Binance size == 0, close ALL DB positions.
-            # This is a simplification. Ideally we track order IDs.
-            
-            if not paper_trading:
-                try:
-                    real_position = await self.binance.get_open_position(symbol)
-                    real_amt = float(real_position['info']['positionAmt']) if real_position else 0
-                    
-                    if real_amt == 0 and trades:
-                        self.log("WARNING", f"Binance position is CLOSED/LIQUIDATED. Closing {len(trades)} local trades.")
-                        for trade in trades:
-                            trade.status = 'CLOSED'
-                            trade.exit_price = current_price 
-                            trade.exit_time = datetime.utcnow()
-                            trade.profit_loss = 0 
-                        db.commit()
-                        return 0
-                except Exception as e:
-                    self.log("ERROR", f"Failed to sync position with Binance: {e}")
-
-            # Iterate over each open trade to check SL/TP
-            for trade in trades:
-                # If we just closed it in sync step (though we returned 0 above, so this is safe)
-                if trade.status != 'OPEN':
-                    continue
-
-                self.log("INFO", f"Monitoring Trade #{trade.id} ({trade.action}) | Entry: {trade.entry_price} | Current: {current_price}")
-                
-                if not trade.gemini_decision:
-                    open_count += 1
-                    continue
-
-                stop_loss = trade.gemini_decision.stop_loss
-                take_profit = trade.gemini_decision.take_profit
-                
-                close_action = None
-                reason = None
-                
-                # Check SL/TP
-                if trade.action == 'BUY': # LONG
-                    if stop_loss and current_price <= stop_loss:
-                        close_action = 'SELL'
-                        reason = f"Stop Loss hit ({current_price} <= {stop_loss})"
-                    elif take_profit and current_price >= take_profit:
-                        close_action = 'SELL'
-                        reason = f"Take Profit hit ({current_price} >= {take_profit})"
-                elif trade.action == 'SELL': # SHORT
-                    if stop_loss and current_price >= stop_loss:
-                        close_action = 'BUY'
-                        reason = f"Stop Loss hit ({current_price} >= {stop_loss})"
-                    elif take_profit and current_price <= take_profit:
-                        close_action = 'BUY'
-                        reason = f"Take Profit hit ({current_price} <= {take_profit})"
-                
-                if close_action:
-                    self.log("INFO", f"Closing Trade #{trade.id}: {reason}")
-                    
-                    # Execute Close
-                    if not paper_trading:
-                        try:
-                            # Real Execution
-                            quantity = trade.amount / trade.entry_price
-                            await self.binance.create_order(symbol, 'market', close_action.lower(), quantity)
-                            self.log("INFO", f"Real Close Order Executed: {close_action} {quantity}")
-                        except Exception as e:
-                            self.log("ERROR", f"Failed to close trade on Binance: {e}")
-                            # If real close fails, keep open in DB
-                            open_count += 1
-                            continue 
-                    
-                    # Update DB
-                    trade.status = 'CLOSED'
-                    trade.exit_price = current_price
-                    trade.exit_time = datetime.utcnow()
-                    
-                    # P/L Calculation
-                    if trade.action == 'BUY':
-                        trade.profit_loss = (current_price - trade.entry_price) * (trade.amount / trade.entry_price)
-                        trade.profit_loss_pct = (current_price - trade.entry_price) / trade.entry_price
-                    else: # SHORT
-                        trade.profit_loss = (trade.entry_price - current_price) * (trade.amount / trade.entry_price)
-                        trade.profit_loss_pct = (trade.entry_price - current_price) / trade.entry_price
-                    
-                    db.commit()
-                    self.log("INFO", f"Trade #{trade.id} Closed. P/L: {trade.profit_loss:.2f} USDT")
-                else:
-                    open_count += 1
-            
-            return open_count
-
-        except Exception as e:
-            self.log("ERROR", f"Error managing open positions: {e}")
-            return 1 # Assume at least one is open on error to prevent spamming new trades
-        finally:
-            db.close()
-
-    async def start_trading_loop(self, symbol: str, market_type: str, timeframe: str, 
-                               investment_amount: float, leverage: int,
-                               binance_api_key: str = None, binance_secret_key: str = None, 
-                               gemini_api_key: str = None, paper_trading: bool = False,
-                               max_open_positions: int = 1, strategy: str = "IA Driven",
-                               check_interval: int = 60, model: str = "gemini-2.5-flash"):
-        self.is_running = True
-        self.symbol = symbol
-        self.market_type = market_type
-        self.timeframe = timeframe
-        self.investment_amount = investment_amount
-        self.leverage = leverage
-        self.max_open_positions = max_open_positions
-        self.check_interval = check_interval
-        
-        mode_str = "PAPER TRADING" if paper_trading else "REAL TRADING"
-        self.log("INFO", f"Starting {mode_str} loop for {symbol} ({market_type}, {timeframe})", {
-            "investment": investment_amount,
-            "leverage": leverage,
-            "paper_trading": paper_trading,
-            "max_open_positions": max_open_positions,
-            "strategy": strategy,
-            "check_interval": check_interval,
-            "model": model
-        })
-        
-        # Debug: Check keys (masked)
-        b_key_masked = f"{binance_api_key[:4]}..." if binance_api_key else "None"
-        g_key_masked = f"{gemini_api_key[:4]}..." if gemini_api_key else "None"
-        self.log("INFO", f"Keys received - Binance: {b_key_masked}, Gemini: {g_key_masked}")
-
-        # Initialize Agents with provided keys
-        try:
-            self.binance = BinanceAgent(api_key=binance_api_key, secret_key=binance_secret_key, market_type=market_type)
-            await self.binance.load_markets()
-            self.gemini = GeminiAgent(api_key=gemini_api_key, model_name=model)
-            self.log("INFO", "Agents initialized successfully")
-        except Exception as e:
-            self.log("ERROR", f"Failed to initialize agents: {str(e)}")
-            self.is_running = False
-            return
-        
-        try:
-            while self.is_running:
-                try:
-                    # 1. Fetch Data (Multi-Timeframe)
-                    self.log("INFO", "Fetching market data...")
-                    
-                    # Define timeframe hierarchy
-                    tf_map = {
-                        '1m': ['5m', '15m'],
-                        '5m': ['15m', '1h'],
-                        '15m': ['1h', '4h'],
-                        '1h': ['4h', '1d'],
-                        '4h': ['1d', '1w'],
-                        '1d': ['1w', '1M']
-                    }
-                    
-                    higher_tfs = tf_map.get(timeframe, [])
-                    data_dict = {}
-                    
-                    # Fetch Base Timeframe
-                    base_ohlcv = await self.binance.fetch_ohlcv(symbol, timeframe=timeframe)
-                    if base_ohlcv is None:
-                        self.log("WARNING", "Failed to fetch base data. Retrying in 10s...")
-                        await asyncio.sleep(10)
-                        continue
-                    data_dict[timeframe] = base_ohlcv
-                    current_price = base_ohlcv.iloc[-1]['close']
-                    
-                    # Fetch Higher Timeframes
-                    for tf in higher_tfs:
-                        try:
-                            df = await self.binance.fetch_ohlcv(symbol, timeframe=tf)
-                            if df is not None:
-                                data_dict[tf] = df
-                        except Exception as e:
-                            self.log("WARNING", f"Failed to fetch {tf} data: {e}")
-
-                    # 2. Check Open Positions & Manage SL/TP
-                    open_trades_count = await self.manage_open_positions(symbol, current_price, paper_trading)
-                    
-                    if open_trades_count >= self.max_open_positions:
-                        self.log("INFO", f"Max positions reached ({open_trades_count}/{self.max_open_positions}). Skipping new analysis.")
-                        await asyncio.sleep(self.check_interval)
-                        continue
-                        
-                    # 3. Analyze with Gemini (Only if slots available)
-                    self.log("INFO", f"Analyzing market with Gemini (Open: {open_trades_count}/{self.max_open_positions}) | Strategy: {strategy}...")
-                    # Pass the entire data_dict to analyze_market
-                    analysis_json = await self.gemini.analyze_market(symbol, data_dict, timeframe, strategy)
-                    
-                    if analysis_json:
-                        # Clean json string if needed (Gemini might add markdown)
-                        cleaned_json = analysis_json.replace('```json', '').replace('```', '').strip()
-                        try:
-                            decision = json.loads(cleaned_json)
-                            self.log("INFO", f"Gemini Decision: {decision.get('action')} ({decision.get('confidence')})", decision)
-                            
-                            # Save Gemini decision to database
-                            db = SessionLocal()
-                            try:
-                                gemini_decision = GeminiDecision(
-                                    symbol=symbol,
-                                    action=decision.get('action'),
-                                    confidence=decision.get('confidence'),
-                                    entry_price=decision.get('entry_price'),
-                                    stop_loss=decision.get('stop_loss'),
-                                    take_profit=decision.get('take_profit'),
-                                    reasoning=decision.get('reasoning'),
-                                    market_data=data_dict[timeframe].tail(20).to_json(), # Save base TF data for reference
-                                    executed=False
-                                )
-                                db.add(gemini_decision)
-                                db.commit()
-                                db.refresh(gemini_decision)
-                                
-                                # 4. Execute
-                                if decision.get('action') in ['BUY', 'SELL']:
-                                    # Balance Check
-                                    if decision.get('action') == 'BUY':
-                                        self.log("INFO", "Checking account balance...")
-                                        balance = await self.binance.get_balance()
-                                        
-                                        if balance:
-                                            quote_currency = 'USDT' 
-                                            free_balance = balance.get(quote_currency, {}).get('free', 0.0)
-                                            self.log("INFO", f"Free Balance: {free_balance} {quote_currency}")
-                                            
-                                            if not paper_trading and free_balance < investment_amount:
-                                                self.log("WARNING", f"Insufficient funds. Required: {investment_amount}, Available: {free_balance}")
-                                                gemini_decision.executed = False
-                                                gemini_decision.reasoning += " [SKIPPED: Insufficient Funds]"
-                                                db.commit()
-                                                continue
-                                            elif paper_trading:
-                                                self.log("INFO", f"Paper Trading: Skipping balance check (Virtual Balance assumed)")
-                                        else:
-                                            if not paper_trading:
-                                                self.log("WARNING", "Failed to fetch balance. Skipping trade.")
-                                                continue
-                                            else:
-                                                self.log("WARNING", "Failed to fetch balance, but proceeding in Paper Mode.")
-
-                                    self.log("INFO", f"Executing {decision['action']} order ({mode_str})...", {
-                                        "amount": investment_amount,
-                                        "leverage": leverage
-                                    })
-                                    
-                                    # Execution Logic
-                                    entry_price = decision.get('entry_price') or current_price
-                                    executed_amount = investment_amount
-                                    
-                                    if not paper_trading:
-                                        try:
-                                            # Calculate quantity based on price
-                                            raw_quantity = executed_amount / entry_price
-                                            
-                                            # Determine side based on action
-                                            side = 'buy' if decision['action'] == 'BUY' else 'sell'
-                                            
-                                            # Execute Order (with precision adjustment inside BinanceAgent)
-                                            await self.binance.create_order(symbol, 'market', side, raw_quantity)
-                                            self.log("INFO", f"Real Order Executed on Binance: {side} {raw_quantity}")
-                                            
-                                        except Exception as e:
-                                            self.log("ERROR", f"Order execution failed: {e}")
-                                            # If execution failed, DO NOT create trade record
-                                            continue
-
-                                    # Create trade record
-                                    trade = Trade(
-                                        symbol=symbol,
-                                        market_type=market_type,
-                                        timeframe=timeframe,
-                                        action=decision['action'],
-                                        amount=investment_amount,
-                                        entry_price=entry_price,
-                                        entry_time=datetime.utcnow(),
-                                        status='OPEN',
-                                        gemini_decision_id=gemini_decision.id,
-                                        is_simulation=paper_trading
-                                    )
-                                    db.add(trade)
-                                    gemini_decision.executed = True
-                                    db.commit()
-                                    self.log("INFO", f"Trade #{trade.id} created ({mode_str})")
-                            finally:
-                                db.close()
-                        except json.JSONDecodeError as e:
-                            self.log("ERROR", f"Failed to parse Gemini response: {e}")
-                    else:
-                        self.log("WARNING", "Gemini analysis failed (returned None). Check API Key or logs.")
-                    
-                except Exception as e:
-                    self.log("ERROR", f"Error in trading loop: {e}")
-                
-                await asyncio.sleep(self.check_interval)
-        finally:
-            self.is_running = False
-            self.log("INFO", "Trading loop stopped.")
-
-    def stop(self):
-        self.is_running = False
-        self.log("INFO", "Stopping trading loop...")
+import asyncio
+import functools
+import json
+from app.core.accounts import DEFAULT_ACCOUNT, ExecutionAccount, account_filter, account_name, account_value, load_accounts
+from app.core.candles import Candles
+from app.agents.binance_agent import BinanceAgent
+from app.agents.gemini_agent import GeminiAgent, summarize_usage
+from app.core.database import SessionLocal
+from app.core.clock import clock
+from app.core.config import settings
+from app.core.config_service import config_service
+from app.core import warm_state
+from app.core.llm_budget import llm_budget
+from app.core.microstructure import record_snapshot
+from app.core.scanner import market_scanner
+from app.core.scheduler import CandleScheduler, IntervalScheduler
+from app.agents.user_stream import UserDataStream
+from app.core.reconciler import PositionReconciler, close_trade, trade_quantity
+from sqlalchemy import or_, func
+from app.core.telemetry import span, TICK_LATENCY, TICK_ERRORS, OPEN_POSITIONS, SPECULATION_RESULTS, SPECULATION_SAVED, LLM_BUDGET_SKIPS, SCANNER_SKIPS
+from app.models.database import GeminiDecision, Trade, SystemLog
+from datetime import datetime
+
+# Configuration keys a running loop applies between ticks (others take effect on the next start)
+LIVE_CONFIG_KEYS = ("max_open_positions", "investment_amount", "check_interval", "strategy", "leverage")
+# Higher timeframes added to the analysis of each base timeframe
+HIGHER_TIMEFRAMES = {
+    '1m': ['5m', '15m'],
+    '5m': ['15m', '1h'],
+    '15m': ['1h', '4h'],
+    '1h': ['4h', '1d'],
+    '4h': ['1d', '1w'],
+    '1d': ['1w', '1M']
+}
+CANDLE_WINDOW = 100  # Candles kept per timeframe
+UNMATCHED_UPDATES = 256  # Order updates kept for trades not committed yet (see on_order_update)
+
+class TradingOrchestrator:
+    def __init__(self):
+        self.binance = None # Initialized on start (market data; the first execution account's client)
+        self.accounts = {}  # Execution accounts by name: one decision is placed on each of them
+        self.released_accounts = {}  # Accounts of the last finished loop, closed by the next start
+        self.gemini = None
+        self.is_running = False
+        self.symbol = None
+        self.market_type = None
+        self.timeframe = None
+        self.investment_amount = None
+        self.leverage = None
+        self.scheduler = None
+        self.run_id = 0  # Bumped on every start, so a stopped loop still sleeping never resumes
+        self.positions_lock = asyncio.Lock()  # The analysis tick and the monitor both manage positions
+        self.speculation = None  # Pre-close analysis for the upcoming candle (see start_speculation)
+        self.speculation_stats = {"hits": 0, "misses": 0, "failed": 0, "latency_saved_seconds": 0.0}
+        self.pending_config = {}  # Saved configuration changes not yet applied by the loop
+        self.candles = {}  # Candle windows by timeframe, refreshed incrementally (see fetch_candles)
+        self.start_params = {}  # Start arguments without keys, for warm restart snapshots
+        self.completed_close = None  # Close of the last candle whose tick finished
+        self.last_decision = None
+        self.warm_start = None  # What the last start restored from its snapshot
+        self.use_scanner = False  # Analyze only while the symbol ranks in the market scanner's top K
+        self.unmatched_updates = {}  # (account, order id) -> user stream update that matched no trade yet
+
+    def log(self, level: str, message: str, details: dict = None):
+        """Save log to database and print"""
+        print(f"[{level}] {message}")
+        try:
+            db = SessionLocal()
+            log_entry = SystemLog(
+                level=level,
+                component="Orchestrator",
+                message=message,
+                details=json.dumps(details) if details else None
+            )
+            db.add(log_entry)
+            db.commit()
+            db.close()
+        except Exception as e:
+            print(f"Failed to save log: {e}")
+
+    async def manage_open_positions(self, symbol: str, current_price: float, paper_trading: bool, verbose: bool = True):
+        """
+        Check ALL open positions for the symbol (on every execution account) and handle SL/TP.
+        Returns the number of positions that remain OPEN, per account.
+        """
+        open_counts = dict.fromkeys(self.accounts, 0)
+        db = SessionLocal()
+        try:
+            # Find ALL open trades for this symbol
+            trades = db.query(Trade).filter(
+                Trade.symbol == symbol, 
+                Trade.status == 'OPEN',
+                or_(*(account_filter(Trade.account, name) for name in self.accounts))
+            ).all()
+            
+            if not trades:
+                return open_counts
+            
+            # Exchange-side closes (fills, liquidations) are applied by the user data stream
+            # (on_order_update) and the periodic PositionReconciler, not here
+
+            # Iterate over each open trade to check SL/TP
+            for trade in trades:
+                account = self.accounts[account_name(trade.account)]
+                if verbose:
+                    self.log("INFO", f"Monitoring Trade #{trade.id} ({trade.action}) | Entry: {trade.entry_price} | Current: {current_price}")
+                
+                if not trade.gemini_decision:
+                    open_counts[account.name] += 1
+                    continue
+
+                # Levels with a resting exchange order are enforced by the exchange, not by polling
+                stop_loss = None if trade.stop_order_id else trade.gemini_decision.stop_loss
+                take_profit = None if trade.take_profit_order_id else trade.gemini_decision.take_profit
+                
+                close_action = None
+                reason = None
+                
+                # Check SL/TP
+                if trade.action == 'BUY': # LONG
+                    if stop_loss and current_price <= stop_loss:
+                        close_action = 'SELL'
+                        reason = f"Stop Loss hit ({current_price} <= {stop_loss})"
+                    elif take_profit and current_price >= take_profit:
+                        close_action = 'SELL'
+                        reason = f"Take Profit hit ({current_price} >= {take_profit})"
+                elif trade.action == 'SELL': # SHORT
+                    if stop_loss and current_price >= stop_loss:
+                        close_action = 'BUY'
+                        reason = f"Stop Loss hit ({current_price} >= {stop_loss})"
+                    elif take_profit and current_price <= take_profit:
+                        close_action = 'BUY'
+                        reason = f"Take Profit hit ({current_price} <= {take_profit})"
+                
+                if close_action:
+                    self.log("INFO", f"Closing Trade #{trade.id}: {reason}")
+                    
+                    # Execute Close
+                    exit_price, exit_fee, exit_order_id = current_price, 0.0, None
+                    if not paper_trading:
+                        try:
+                            # Real Execution
+                            quantity = trade_quantity(trade)
+                            close_order = await account.binance.create_order(symbol, 'market', close_action.lower(), quantity)
+                            exit_price = close_order.get('average') or current_price
+                            exit_fee = (close_order.get('fee') or {}).get('cost') or 0.0
+                            exit_order_id = str(close_order['id'])
+                            self.log("INFO", f"Real Close Order Executed: {close_action} {quantity}")
+                        except Exception as e:
+                            self.log("ERROR", f"Failed to close trade on Binance: {e}")
+                            # If real close fails, keep open in DB
+                            open_counts[account.name] += 1
+                            continue 
+                    
+                    # Update DB (P/L from the fill price and commissions when known)
+                    close_trade(trade, exit_price, exit_fee, datetime.utcnow(), exit_order_id)
+                    db.commit()
+                    await self.cancel_brackets(trade)
+                    self.log("INFO", f"Trade #{trade.id} Closed. P/L: {trade.profit_loss:.2f} USDT")
+                else:
+                    open_counts[account.name] += 1
+            
+            return open_counts
+
+        except Exception as e:
+            self.log("ERROR", f"Error managing open positions: {e}")
+            return dict.fromkeys(self.accounts, 1) # Assume at least one is open on error to prevent spamming new trades
+        finally:
+            db.close()
+
+    async def start_trading_loop(self, symbol: str, market_type: str, timeframe: str, 
+                               investment_amount: float, leverage: int,
+                               binance_api_key: str = None, binance_secret_key: str = None, 
+                               gemini_api_key: str = None, paper_trading: bool = False,
+                               max_open_positions: int = 1, strategy: str = "IA Driven",
+                               check_interval: int = 60, model="gemini-2.5-flash", llm_policy: str = "first_valid",
+                               llm_quorum: int = None, speculative_lead: float = None, accounts: list = None,
+                               scanner: bool = False):
+        # A superseded loop still sleeping may have left its pre-close analysis behind
+        self.cancel_speculation()
+        self.is_running = True
+        self.run_id += 1
+        run_id = self.run_id
+        self.symbol = symbol
+        self.market_type = market_type
+        self.timeframe = timeframe
+        self.investment_amount = investment_amount
+        self.leverage = leverage
+        self.max_open_positions = max_open_positions
+        self.check_interval = check_interval
+        self.strategy = strategy
+        self.paper_trading = paper_trading
+        self.use_scanner = scanner
+        self.candles = {}
+        self.completed_close = None
+        self.last_decision = None
+        self.warm_start = None
+        
+        accounts = list(dict.fromkeys(accounts or [DEFAULT_ACCOUNT]))
+        self.start_params = {
+            "market_type": market_type, "timeframe": timeframe, "investment_amount": investment_amount, "leverage": leverage,
+            "paper_trading": paper_trading, "max_open_positions": max_open_positions, "strategy": strategy,
+            "check_interval": check_interval, "model": model, "llm_policy": llm_policy, "llm_quorum": llm_quorum,
+            "speculative_lead": speculative_lead, "accounts": accounts, "scanner": scanner
+        }
+        mode_str = "PAPER TRADING" if paper_trading else "REAL TRADING"
+        self.mode_str = mode_str
+        self.log("INFO", f"Starting {mode_str} loop for {symbol} ({market_type}, {timeframe})", {
+            "investment": investment_amount,
+            "leverage": leverage,
+            "paper_trading": paper_trading,
+            "max_open_positions": max_open_positions,
+            "strategy": strategy,
+            "check_interval": check_interval,
+            "model": model,
+            "llm_policy": llm_policy,
+            "speculative_lead": speculative_lead,
+            "accounts": accounts,
+            "scanner": scanner
+        })
+        
+        # Debug: Check keys (masked)
+        b_key_masked = f"{binance_api_key[:4]}..." if binance_api_key else "None"
+        g_key_masked = f"{gemini_api_key[:4]}..." if gemini_api_key else "None"
+        self.log("INFO", f"Keys received - Binance: {b_key_masked}, Gemini: {g_key_masked}")
+
+        # Initialize Agents with provided keys
+        # The finished loop's clients served market data meanwhile (self.binance); a superseded one closes its own
+        stale, self.released_accounts = self.released_accounts, {}
+        self.binance, self.accounts = None, {}
+        await self.close_accounts(stale)
+        try:
+            rows = load_accounts(accounts)
+            for name in accounts:
+                if name == DEFAULT_ACCOUNT:
+                    agent = BinanceAgent(api_key=binance_api_key, secret_key=binance_secret_key, market_type=market_type)
+                    self.accounts[name] = ExecutionAccount(name, agent)
+                else:
+                    agent = BinanceAgent(api_key=rows[name].api_key, secret_key=rows[name].secret_key, market_type=market_type, env_keys=False)
+                    self.accounts[name] = ExecutionAccount(name, agent, rows[name].investment_amount)
+            cached_markets = await self.load_markets(market_type)
+            # Candles, prices and the clock come from one client: data cost doesn't grow with accounts
+            self.binance = next(iter(self.accounts.values())).binance
+            # This run's own clients: a later start replaces the attributes before this loop wakes up to exit
+            binance, run_accounts = self.binance, self.accounts
+            self.gemini = GeminiAgent(api_key=gemini_api_key, model_name=model, policy=llm_policy, quorum=llm_quorum)
+            self.log("INFO", "Agents initialized successfully")
+        except Exception as e:
+            self.log("ERROR", f"Failed to initialize agents: {str(e)}")
+            await self.close_accounts(self.accounts)
+            self.accounts, self.binance = {}, None
+            self.is_running = False
+            return
+        
+        self.scheduler = CandleScheduler(self.binance, timeframe, check_interval)
+        loop = asyncio.get_running_loop()
+        self.pending_config = {}
+        # POST /config runs in a worker thread: hand changes over to the event loop
+        unsubscribe = config_service.subscribe(lambda changes: loop.call_soon_threadsafe(self.pending_config.update, changes))
+        monitor = asyncio.create_task(self.monitor_positions(run_id))
+        reconcile = None
+        if not paper_trading and market_type == 'future':
+            # Net positions only exist on futures (spot has no fetch_positions)
+            reconcile = asyncio.create_task(self.reconcile_positions(run_id, symbol, run_accounts))
+            for account in run_accounts.values():
+                account.user_stream = UserDataStream(account.binance, functools.partial(self.on_order_update, account=account.name))
+                account.user_stream.start()
+        if settings.MICROSTRUCTURE_ENABLED:
+            binance.start_microstructure([symbol])
+        snapshot = warm_state.load_snapshot(symbol) if settings.WARM_RESTART_ENABLED else None
+        resume = self.restore_state(snapshot, cached_markets) if snapshot else None
+        self.log("INFO", f"Analysis aligned to {self.scheduler.period}s candle closes, monitoring every {settings.MONITOR_INTERVAL_SECONDS}s")
+        # The pre-close analysis must see the candle it speculates on, so it can't start before that candle opens
+        lead = settings.SPECULATIVE_LEAD_SECONDS if speculative_lead is None else speculative_lead
+        lead = min(lead, self.scheduler.tf_seconds / 2)
+        if lead > 0:
+            self.log("INFO", f"Speculative analysis starts {lead}s before each close")
+        
+        try:
+            while self.is_active(run_id):
+                if resume is not None:
+                    # The previous process stopped before analyzing this close: do it now
+                    close, resume = await self.scheduler.wait_for_close(resume), None
+                elif lead > 0:
+                    close = await self.scheduler.wait_before_close(lead)
+                    if not self.is_active(run_id):
+                        break
+                    self.start_speculation(close)
+                    await self.scheduler.wait_for_close(close)
+                else:
+                    close = await self.scheduler.wait_for_close()
+                if not self.is_active(run_id):
+                    break  # Stopped (or restarted) while waiting: the loop's state may be another run's now
+                
+                # Retry within the same candle if market data couldn't be fetched
+                delay = 0
+                while delay is not None and self.is_active(run_id):
+                    try:
+                        with TICK_LATENCY.time(symbol=symbol), span("tick", symbol=symbol):
+                            delay = await self.run_tick()
+                    except Exception as e:
+                        TICK_ERRORS.inc(error=type(e).__name__)
+                        self.log("ERROR", f"Error in trading loop: {e}")
+                        delay = None
+                    if delay and self.scheduler.server_now() + delay < close + self.scheduler.period:
+                        await clock.sleep(delay)
+                    else:
+                        delay = None
+                if not self.is_active(run_id):
+                    break
+                self.completed_close = close
+                self.cancel_speculation()
+                self.apply_config_changes()
+                self.save_state()
+        finally:
+            if self.run_id == run_id:
+                # Stopped on request (not resumed on the next boot) or interrupted, e.g. by a reload (resumed)
+                self.save_state(running=self.is_running)
+            unsubscribe()
+            self.cancel_speculation(run_id)
+            monitor.cancel()
+            if reconcile:
+                reconcile.cancel()
+            await binance.stop_microstructure()
+            for account in run_accounts.values():
+                if account.user_stream:
+                    await account.user_stream.stop()
+                    account.user_stream = None
+            if self.run_id == run_id:
+                self.is_running = False
+                self.released_accounts = run_accounts
+            else:
+                await self.close_accounts(run_accounts)
+            self.log("INFO", "Trading loop stopped.")
+
+    async def close_accounts(self, accounts: dict):
+        for account in accounts.values():
+            try:
+                await account.binance.close()
+            except Exception as e:
+                print(f"Failed to close exchange client of account {account.name}: {e}")
+
+    async def load_markets(self, market_type: str) -> bool:
+        """Markets on every account's client, from the warm restart cache if recent; True if cached"""
+        cached = warm_state.load_markets(market_type) if settings.WARM_RESTART_ENABLED else None
+        if cached:
+            for account in self.accounts.values():
+                account.binance.restore_markets(*cached)
+            return True
+        await asyncio.gather(*(account.binance.load_markets() for account in self.accounts.values()))
+        if settings.WARM_RESTART_ENABLED:
+            exchange = next(iter(self.accounts.values())).binance.exchange
+            warm_state.save_markets(market_type, exchange.markets, getattr(exchange, 'currencies', None))
+        return False
+
+    def save_state(self, running: bool = True):
+        """Warm restart snapshot of the loop (see app.core.warm_state); small enough to write every tick"""
+        if not settings.WARM_RESTART_ENABLED or self.scheduler is None:
+            return
+        book = self.binance.microstructure.get(self.symbol)
+        warm_state.save_snapshot(self.symbol, {
+            "running": running,
+            "params": {**self.start_params, **{key: getattr(self, key) for key in LIVE_CONFIG_KEYS}},
+            "schedule": {"offset": self.scheduler.offset, "last_sync": self.scheduler.last_sync, "last_close": self.completed_close},
+            "last_decision": self.last_decision,
+            "weight_used": self.binance.weight_used
+        }, self.candles, book.state() if book else None)
+
+    def restore_state(self, snapshot: dict, cached_markets: bool = False) -> float:
+        """
+        Pick up where this symbol's previous loop left off: candle windows (only the delta is
+        fetched next), exchange clock offset, last decision, rate-limit usage and microstructure
+        buffers. Returns the close to analyze right away if that loop was running and missed the
+        latest close less than half a period ago; None to wait for the next one as usual.
+        """
+        meta = snapshot["meta"]
+        params, schedule = meta["params"], meta["schedule"]
+        restored = ["markets"] if cached_markets else []
+        if params["market_type"] == self.market_type:
+            wanted = [self.timeframe] + HIGHER_TIMEFRAMES.get(self.timeframe, [])
+            self.candles = {tf: c for tf, c in snapshot["candles"].items() if tf in wanted}
+            restored.append(f"{len(self.candles)} candle windows")
+        if schedule["last_sync"] is not None:
+            self.scheduler.offset = schedule["offset"]
+            self.scheduler.last_sync = min(schedule["last_sync"], clock.time())
+            restored.append("clock offset")
+        if meta.get("last_decision"):
+            self.last_decision = meta["last_decision"]
+            restored.append("last decision")
+        if meta.get("weight_used"):
+            self.binance.restore_rate_limit(*meta["weight_used"])
+        book = self.binance.microstructure.get(self.symbol)
+        if book and snapshot["microstructure"] and book.restore(snapshot["microstructure"]):
+            restored.append("microstructure")
+
+        resume = None
+        last_close = schedule["last_close"]
+        if meta["running"] and last_close is not None:
+            latest = self.scheduler.next_close() - self.scheduler.period
+            if latest > last_close and self.scheduler.server_now() - latest < self.scheduler.period / 2:
+                self.scheduler.last_close = last_close  # Closes missed while down are counted
+                resume = latest
+        age = clock.time() - meta["saved_at"]
+        self.warm_start = {"snapshot_age_seconds": round(age, 1), "restored": restored, "resumed_close": resume}
+        self.log("INFO", f"Warm start from a {age:.0f}s old snapshot: {', '.join(restored) or 'nothing reusable'}"
+                         f"{'; analyzing the missed close now' if resume else ''}")
+        return resume
+
+    async def on_order_update(self, update: dict, account: str = DEFAULT_ACCOUNT):
+        """Close the Trade whose SL/TP order filled on the exchange (the account's user data stream)"""
+        order_id, status = update['order_id'], update['status']
+        if status not in ('FILLED', 'CANCELED', 'EXPIRED'):
+            return
+
+        sibling = None
+        async with self.positions_lock:
+            db = SessionLocal()
+            try:
+                trade = db.query(Trade).filter(
+                    Trade.status == 'OPEN',
+                    account_filter(Trade.account, account),
+                    or_(Trade.stop_order_id == order_id, Trade.take_profit_order_id == order_id)
+                ).first()
+                if trade is None:
+                    # A bracket can fill (or be rejected) before its Trade row is committed: keep the
+                    # update for execute_decision to replay
+                    self.unmatched_updates[(account, order_id)] = update
+                    if len(self.unmatched_updates) > UNMATCHED_UPDATES:
+                        self.unmatched_updates.pop(next(iter(self.unmatched_updates)))
+                    return
+                is_stop = trade.stop_order_id == order_id
+
+                if status != 'FILLED':
+                    # Exit order is gone without filling: fall back to enforcing that level locally
+                    self.log("WARNING", f"{'Stop Loss' if is_stop else 'Take Profit'} order {order_id} for Trade #{trade.id} {status}")
+                    if is_stop:
+                        trade.stop_order_id = None
+                    else:
+                        trade.take_profit_order_id = None
+                    db.commit()
+                    return
+
+                exit_price = update['avg_price']
+                exit_time = datetime.utcfromtimestamp(update['time'] / 1000) if update['time'] else datetime.utcnow()
+                close_trade(trade, exit_price, update['commission'], exit_time, order_id)
+                sibling = trade.take_profit_order_id if is_stop else trade.stop_order_id
+                symbol = trade.symbol
+                db.commit()
+                self.log("INFO", f"Trade #{trade.id} closed by exchange {'Stop Loss' if is_stop else 'Take Profit'} at {exit_price}. P/L: {trade.profit_loss:.2f} USDT")
+            finally:
+                db.close()
+
+        if sibling:
+            try:
+                await self.accounts[account].binance.cancel_order(sibling, symbol)
+            except Exception as e:
+                self.log("ERROR", f"Failed to cancel remaining exit order {sibling}: {e}")
+
+    async def cancel_brackets(self, trade: Trade):
+        """Cancel resting exit orders of a trade that was closed by other means"""
+        binance = self.accounts[account_name(trade.account)].binance
+        for order_id in (trade.stop_order_id, trade.take_profit_order_id):
+            if not order_id:
+                continue
+            try:
+                await binance.cancel_order(order_id, trade.symbol)
+            except Exception as e:
+                self.log("ERROR", f"Failed to cancel exit order {order_id} of Trade #{trade.id}: {e}")
+
+    async def reconcile_positions(self, run_id: int, symbol: str, accounts: dict):
+        """
+        Run the PositionReconciler at start (catches fills missed while down) and then every
+        RECONCILE_INTERVAL_SECONDS, for the loop's symbol only: the loop trading a symbol owns its trades
+        """
+        reconcilers = [PositionReconciler(a.binance, log=self.log, account=a.name, symbols=[symbol]) for a in accounts.values()]
+        schedule = IntervalScheduler(settings.RECONCILE_INTERVAL_SECONDS, "reconcile")
+        while self.is_active(run_id):
+            for reconciler in reconcilers:
+                try:
+                    async with self.positions_lock:
+                        with span("reconcile", account=reconciler.account):
+                            await reconciler.reconcile()
+                except Exception as e:
+                    self.log("ERROR", f"Position reconciliation failed ({reconciler.account}): {e}")
+            await schedule.wait()
+
+    def is_active(self, run_id: int) -> bool:
+        return self.is_running and self.run_id == run_id
+
+    async def monitor_positions(self, run_id: int):
+        """Check SL/TP on the latest price at MONITOR_INTERVAL_SECONDS, between candle-close analyses"""
+        ticker = IntervalScheduler(settings.MONITOR_INTERVAL_SECONDS, "monitor")
+        while self.is_active(run_id):
+            await ticker.wait()
+            try:
+                with span("monitor", symbol=self.symbol):
+                    price = await self.binance.fetch_price(self.symbol)
+                    async with self.positions_lock:
+                        open_counts = await self.manage_open_positions(self.symbol, price, self.paper_trading, verbose=False)
+                OPEN_POSITIONS.set(sum(open_counts.values()), symbol=self.symbol)
+            except Exception as e:
+                self.log("ERROR", f"Position monitoring failed: {e}")
+
+    def apply_config_changes(self):
+        """Apply configuration saved since the last tick (see LIVE_CONFIG_KEYS)"""
+        changes, self.pending_config = self.pending_config, {}
+        applied = {key: value for key, value in changes.items() if key in LIVE_CONFIG_KEYS and value is not None}
+        for key, value in applied.items():
+            setattr(self, key, value)
+        if "check_interval" in applied:
+            self.scheduler.set_interval(applied["check_interval"])
+        if applied:
+            self.log("INFO", f"Applied configuration changes: {', '.join(sorted(applied))}", applied)
+        deferred = sorted(set(changes) - set(applied))
+        if deferred:
+            self.log("INFO", f"Configuration changes apply on next start: {', '.join(deferred)}")
+
+    def start_speculation(self, close: float):
+        """Start analyzing the still-forming candle that closes at `close`"""
+        self.cancel_speculation()
+        self.speculation = {"run_id": self.run_id, "close": close, "candle": None, "skipped": False, "analysis_seconds": None, "usage": []}
+        self.speculation["task"] = asyncio.create_task(self.speculate(self.speculation))
+
+    def cancel_speculation(self, run_id: int = None):
+        """Cancel the pending pre-close analysis (only if `run_id` started it, when given)"""
+        if self.speculation and (run_id is None or self.speculation["run_id"] == run_id):
+            self.speculation["task"].cancel()
+            llm_budget.record(self.symbol, summarize_usage(self.speculation["usage"]), saved=False)
+            self.speculation = None
+
+    async def speculate(self, speculation: dict):
+        db = SessionLocal()
+        try:
+            open_counts = dict(db.query(Trade.account, func.count(Trade.id)).filter(
+                Trade.symbol == self.symbol, Trade.status == 'OPEN').group_by(Trade.account).all())
+        finally:
+            db.close()
+        if all(open_counts.get(account_value(name), 0) >= self.max_open_positions for name in self.accounts):
+            speculation["skipped"] = True  # No analysis at this close unless a position exits meanwhile
+            return None
+        if llm_budget.tier() != "normal":
+            speculation["skipped"] = True  # Misses cost a second analysis: not while the budget is short
+            return None
+        if self.use_scanner and not await self.scanner_allows():
+            speculation["skipped"] = True
+            return None
+
+        data_dict = await self.fetch_market_data(speculation["close"])
+        if data_dict is None or data_dict[self.timeframe].empty:
+            return None
+        speculation["candle"] = data_dict[self.timeframe].row(-1)
+        started = clock.time()
+        decision = await self.gemini.analyze_market(self.symbol, data_dict, self.timeframe, self.strategy, usage=speculation["usage"],
+                                                    microstructure=self.binance.microstructure_features(self.symbol))
+        speculation["analysis_seconds"] = clock.time() - started
+        return decision
+
+    async def scanner_allows(self) -> bool:
+        """Whether the symbol ranks in the scanner's top SCANNER_TOP_K for the loop's strategy (if the scanner fails, yes)"""
+        try:
+            rank = await market_scanner.rank_of(self.symbol, self.market_type, self.timeframe, self.strategy)
+        except Exception as e:
+            self.log("WARNING", f"Market scanner unavailable, analyzing anyway: {e}")
+            return True
+        return rank is not None and rank <= settings.SCANNER_TOP_K
+
+    @staticmethod
+    def candle_matches(early, final) -> bool:
+        """Whether the closed candle is within tolerance of the forming candle an early decision saw"""
+        if early['timestamp'] != final['timestamp']:
+            return False
+        price_tolerance = settings.SPECULATIVE_PRICE_TOLERANCE * final['close']
+        if any(abs(final[k] - early[k]) > price_tolerance for k in ('open', 'high', 'low', 'close')):
+            return False
+        return abs(final['volume'] - early['volume']) <= settings.SPECULATIVE_VOLUME_TOLERANCE * final['volume']
+
+    async def resolve_speculation(self, speculation: dict, base_ohlcv: Candles):
+        """The pre-close decision if the closed candle still matches the one it was made on, else None"""
+        task, stats = speculation["task"], self.speculation_stats
+        if speculation["candle"] is not None and not self.candle_matches(speculation["candle"], base_ohlcv.row(-1)):
+            task.cancel()
+            decision, outcome = None, "miss"
+        else:
+            waiting = clock.time()
+            try:
+                decision = await task
+            except Exception as e:
+                self.log("WARNING", f"Speculative analysis failed: {e}")
+                decision = None
+            waited = clock.time() - waiting
+            if speculation["skipped"]:
+                return None
+            if decision is None:
+                outcome = "failed"
+            elif not self.candle_matches(speculation["candle"], base_ohlcv.row(-1)):
+                decision, outcome = None, "miss"
+            else:
+                outcome = "hit"
+                saved = max(0.0, speculation["analysis_seconds"] - waited)
+                stats["latency_saved_seconds"] += saved
+                SPECULATION_SAVED.inc(saved)
+
+        stats[{"hit": "hits", "miss": "misses", "failed": "failed"}[outcome]] += 1
+        SPECULATION_RESULTS.inc(outcome=outcome)
+        if outcome == "hit":
+            self.log("INFO", f"Using pre-close decision ({saved:.1f}s saved)")
+        else:
+            self.log("INFO", f"Pre-close decision discarded ({outcome}), re-analyzing the closed candle")
+        return decision
+
+    async def fetch_candles(self, timeframe: str) -> Candles:
+        """
+        The last CANDLE_WINDOW candles of the loop's symbol. A cached window is updated with only
+        the candles from its last (possibly still forming) one on, a request of a few rows;
+        after a gap longer than the window the whole window is fetched again.
+        """
+        cached = self.candles.get(timeframe)
+        if cached is not None and len(cached):
+            since = int(cached.timestamp[-1])
+            missing = (self.binance.exchange.milliseconds() - since) // (self.binance.exchange.parse_timeframe(timeframe) * 1000)
+            if 0 <= missing < CANDLE_WINDOW - 2:
+                fresh = await self.binance.fetch_ohlcv(self.symbol, timeframe=timeframe, since=since, limit=missing + 2)
+                if fresh is not None and len(fresh):
+                    self.candles[timeframe] = Candles.concat([cached.before(since), fresh]).tail(CANDLE_WINDOW)
+                return self.candles[timeframe]
+        candles = await self.binance.fetch_ohlcv(self.symbol, timeframe=timeframe, limit=CANDLE_WINDOW)
+        if candles is not None:
+            self.candles[timeframe] = candles
+        return candles
+
+    async def fetch_market_data(self, close: float = None):
+        """
+        Base and higher timeframe candles for the analysis, keyed by timeframe; None if the base
+        timeframe couldn't be fetched. Base candles opening at or after `close` are dropped.
+        """
+        timeframe = self.timeframe
+        higher_tfs = HIGHER_TIMEFRAMES.get(timeframe, [])
+        data_dict = {}
+        
+        with span("fetch_data", timeframes=[timeframe] + higher_tfs):
+            # Fetch Base Timeframe
+            base_ohlcv = await self.fetch_candles(timeframe)
+            if base_ohlcv is None:
+                return None
+            if close:
+                # Only candles up to `close`, not the one that opened after it
+                base_ohlcv = base_ohlcv.before(int(close * 1000))
+            data_dict[timeframe] = base_ohlcv
+            
+            # Fetch Higher Timeframes
+            for tf in higher_tfs:
+                try:
+                    df = await self.fetch_candles(tf)
+                    if df is not None:
+                        data_dict[tf] = df
+                except Exception as e:
+                    self.log("WARNING", f"Failed to fetch {tf} data: {e}")
+        return data_dict
+
+    async def run_tick(self):
+        """
+        One iteration of the trading loop: fetch data, manage SL/TP, analyze and execute.
+        Returns a delay (seconds) to wait instead of check_interval, or None.
+        """
+        symbol, timeframe, strategy, paper_trading = self.symbol, self.timeframe, self.strategy, self.paper_trading
+
+        # 1. Fetch Data (Multi-Timeframe)
+        self.log("INFO", "Fetching market data...")
+        data_dict = await self.fetch_market_data(self.scheduler.last_close if self.scheduler else None)
+        if data_dict is None:
+            self.log("WARNING", "Failed to fetch base data. Retrying in 10s...")
+            return 10
+        current_price = float(data_dict[timeframe].close[-1])
+
+        # 2. Check Open Positions & Manage SL/TP
+        with span("manage_positions"):
+            async with self.positions_lock:
+                open_counts = await self.manage_open_positions(symbol, current_price, paper_trading)
+        OPEN_POSITIONS.set(sum(open_counts.values()), symbol=symbol)
+        # One analysis serves every account: run it while any account has a free slot
+        open_trades_count = min(open_counts.values(), default=0)
+        
+        if open_trades_count >= self.max_open_positions:
+            self.log("INFO", f"Max positions reached ({open_trades_count}/{self.max_open_positions}). Skipping new analysis.")
+            return None
+            
+        # 3. Analyze with Gemini (Only if slots available, among the scanner's candidates and the daily LLM budget allows)
+        if self.use_scanner and not await self.scanner_allows():
+            self.cancel_speculation()
+            SCANNER_SKIPS.inc()
+            self.log("INFO", f"{symbol} not in the market scanner's top {settings.SCANNER_TOP_K}. Skipping analysis.")
+            return None
+        tier = llm_budget.tier()
+        if not llm_budget.allow_analysis(symbol):
+            self.cancel_speculation()
+            LLM_BUDGET_SKIPS.inc(tier=tier)
+            self.log("INFO", f"LLM daily budget {tier} (${llm_budget.spent_today():.4f} of ${settings.LLM_DAILY_BUDGET_USD}). Skipping analysis.")
+            return None
+        economy = tier != "normal"
+        self.log("INFO", f"Analyzing market with Gemini (Open: {open_trades_count}/{self.max_open_positions}) | Strategy: {strategy}"
+                         f"{f' | Budget: {tier}' if economy else ''}...")
+        # Pass the entire data_dict to analyze_market
+        speculation, self.speculation = self.speculation, None
+        usage = []
+        microstructure = self.binance.microstructure_features(symbol)
+        if microstructure:
+            record_snapshot(symbol, microstructure)
+        with span("analyze", model=self.gemini.model_name, speculative=speculation is not None):
+            decision = await self.resolve_speculation(speculation, data_dict[timeframe]) if speculation else None
+            if decision is None:
+                if speculation:
+                    llm_budget.record(symbol, summarize_usage(speculation["usage"]), saved=False)
+                decision = await self.gemini.analyze_market(symbol, data_dict, timeframe, strategy, usage=usage, economy=economy,
+                                                            microstructure=microstructure)
+            else:
+                usage = speculation["usage"]
+        analysis = summarize_usage(usage) or {}
+        
+        if decision is None:
+            llm_budget.record(symbol, analysis, saved=False)
+            self.log("WARNING", "Gemini analysis failed (no valid decision). Check API Key or logs.")
+            return None
+        self.log("INFO", f"Gemini Decision: {decision.action} ({decision.confidence})", {**decision.to_dict(), "usage": analysis})
+        
+        # Save Gemini decision to database
+        db = SessionLocal()
+        try:
+            gemini_decision = GeminiDecision(
+                symbol=symbol,
+                action=decision.action,
+                confidence=decision.confidence,
+                entry_price=decision.entry_price,
+                stop_loss=decision.stop_loss,
+                take_profit=decision.take_profit,
+                reasoning=decision.reasoning,
+                market_data=data_dict[timeframe].tail(20).to_json(), # Save base TF data for reference
+                executed=False,
+                strategy=strategy,
+                model=analysis.get("model"),
+                prompt_tokens=analysis.get("prompt_tokens"),
+                output_tokens=analysis.get("output_tokens"),
+                cost_usd=analysis.get("cost_usd")
+            )
+            db.add(gemini_decision)
+            db.commit()
+            db.refresh(gemini_decision)
+            llm_budget.record(symbol, analysis, saved=True)
+            self.last_decision = {**decision.to_dict(), "id": gemini_decision.id, "close": self.scheduler.last_close if self.scheduler else None}
+            
+            # 4. Execute on every account with a free slot, concurrently
+            if decision.is_trade:
+                targets = [a for a in self.accounts.values() if open_counts[a.name] < self.max_open_positions]
+                results = await asyncio.gather(*(
+                    self.execute_decision(account, decision, gemini_decision.id, current_price) for account in targets
+                ), return_exceptions=True)
+                outcomes = {}
+                for account, result in zip(targets, results):
+                    if isinstance(result, Exception):
+                        # Order placed but not recorded, if it got that far: the reconciler reports the mismatch
+                        self.log("ERROR", f"Execution failed on account {account.name}: {result}")
+                        result = "error"
+                    outcomes[account.name] = result
+                executed = [name for name, result in outcomes.items() if isinstance(result, int)]
+                unfunded = [name for name, result in outcomes.items() if result == "insufficient_funds"]
+                gemini_decision.executed = bool(executed)
+                if unfunded:
+                    gemini_decision.reasoning += " [SKIPPED: Insufficient Funds]" if len(self.accounts) == 1 \
+                        else f" [SKIPPED: Insufficient Funds ({', '.join(unfunded)})]"
+                db.commit()
+                OPEN_POSITIONS.set(sum(open_counts.values()) + len(executed), symbol=symbol)
+                if len(self.accounts) > 1:
+                    self.log("INFO", f"Decision executed on {len(executed)}/{len(self.accounts)} accounts", outcomes)
+        finally:
+            db.close()
+
+    async def execute_decision(self, account: ExecutionAccount, decision, decision_id: int, current_price: float):
+        """
+        Size and place a decision on one account and record its Trade.
+        Returns the trade id, or why nothing was traded ('insufficient_funds', 'no_balance', 'order_failed').
+        """
+        symbol, market_type, timeframe, strategy = self.symbol, self.market_type, self.timeframe, self.strategy
+        paper_trading, mode_str, leverage = self.paper_trading, self.mode_str, self.leverage
+        investment_amount = account.investment_amount or self.investment_amount
+        prefix = "" if len(self.accounts) == 1 else f"[{account.name}] "
+
+        # Balance Check
+        if decision.action == 'BUY':
+            self.log("INFO", f"{prefix}Checking account balance...")
+            balance = await account.binance.get_balance()
+            
+            if balance:
+                quote_currency = 'USDT' 
+                free_balance = balance.get(quote_currency, {}).get('free', 0.0)
+                self.log("INFO", f"{prefix}Free Balance: {free_balance} {quote_currency}")
+                
+                if not paper_trading and free_balance < investment_amount:
+                    self.log("WARNING", f"{prefix}Insufficient funds. Required: {investment_amount}, Available: {free_balance}")
+                    return "insufficient_funds"
+                elif paper_trading:
+                    self.log("INFO", f"{prefix}Paper Trading: Skipping balance check (Virtual Balance assumed)")
+            else:
+                if not paper_trading:
+                    self.log("WARNING", f"{prefix}Failed to fetch balance. Skipping trade.")
+                    return "no_balance"
+                else:
+                    self.log("WARNING", f"{prefix}Failed to fetch balance, but proceeding in Paper Mode.")
+
+        self.log("INFO", f"{prefix}Executing {decision.action} order ({mode_str})...", {
+            "amount": investment_amount,
+            "leverage": leverage
+        })
+        
+        # Execution Logic
+        entry_price = decision.entry_price or current_price
+        order = None
+        
+        if not paper_trading:
+            try:
+                # Calculate quantity based on price
+                raw_quantity = investment_amount / entry_price
+                
+                # Determine side based on action
+                side = 'buy' if decision.action == 'BUY' else 'sell'
+                
+                # Execute Order (with precision adjustment inside BinanceAgent).
+                # Futures entries carry exchange-side reduce-only SL/TP orders.
+                brackets = {}
+                if market_type == 'future':
+                    brackets = {"stop_loss": decision.stop_loss, "take_profit": decision.take_profit}
+                with span("execute", side=side, account=account.name):
+                    order = await account.binance.create_order(symbol, 'market', side, raw_quantity, **brackets)
+                if order.get('average'):
+                    entry_price = order['average']
+                self.log("INFO", f"{prefix}Real Order Executed on Binance: {side} {raw_quantity}", {
+                    "order_id": order.get('id'),
+                    "brackets": {k: v.get('id') for k, v in order.get('brackets', {}).items()}
+                })
+                
+            except Exception as e:
+                self.log("ERROR", f"{prefix}Order execution failed: {e}")
+                # If execution failed, DO NOT create trade record
+                return "order_failed"
+
+        # Create trade record
+        placed = order.get('brackets', {}) if order else {}
+        db = SessionLocal()
+        try:
+            trade = Trade(
+                symbol=symbol,
+                market_type=market_type,
+                timeframe=timeframe,
+                strategy=strategy,
+                action=decision.action,
+                amount=investment_amount,
+                entry_price=entry_price,
+                entry_time=datetime.utcnow(),
+                status='OPEN',
+                gemini_decision_id=decision_id,
+                is_simulation=paper_trading,
+                entry_order_id=str(order['id']) if order else None,
+                quantity=float(order['filled']) if order and order.get('filled') else None,
+                fees=(order.get('fee') or {}).get('cost') if order else None,
+                stop_order_id=str(placed['stop_loss']['id']) if 'stop_loss' in placed else None,
+                take_profit_order_id=str(placed['take_profit']['id']) if 'take_profit' in placed else None,
+                account=account_value(account.name)
+            )
+            db.add(trade)
+            db.commit()
+            trade_id = trade.id
+            self.log("INFO", f"{prefix}Trade #{trade.id} created ({mode_str})")
+        finally:
+            db.close()
+
+        # Bracket updates the user stream delivered before the commit above
+        for bracket in placed.values():
+            update = self.unmatched_updates.pop((account.name, str(bracket['id'])), None)
+            if update:
+                await self.on_order_update(update, account=account.name)
+        return trade_id
+
+    def status(self) -> dict:
+        """What GET /status shows for the loop (persisted by trading workers with each heartbeat)"""
+        stats = self.speculation_stats
+        resolved = stats["hits"] + stats["misses"] + stats["failed"]
+        return {
+            "running": self.is_running,
+            "symbol": self.symbol,
+            "accounts": list(self.accounts),
+            "last_decision": self.last_decision,
+            "warm_start": self.warm_start,
+            "microstructure": self.binance.microstructure_features(self.symbol) if self.binance and self.is_running else None,
+            "speculation": {**stats, "hit_rate": stats["hits"] / resolved if resolved else None}
+        }
+
+    def stop(self):
+        was_running, self.is_running = self.is_running, False
+        if was_running:
+            # The loop may sleep until the next close: don't leave a snapshot that would resume it meanwhile
+            self.save_state(running=False)
+        self.log("INFO", "Stopping trading loop...")
@@ -0,0 +1,144 @@
+import numpy as np
+
+_TF_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000}
+SECONDS_PER_YEAR = 365 * 86400
+
+def timeframe_seconds(timeframe: str) -> int:
+    return int(timeframe[:-1]) * _TF_SECONDS[timeframe[-1]]
+
+def mark_to_market(close: np.ndarray, initial_capital: float, entry_idx: np.ndarray, exit_idx: np.ndarray,
+                   side: np.ndarray, qty: np.ndarray, entry_price: np.ndarray, pnl: np.ndarray):
+    """
+    Per-bar mark-to-market equity and open-position count from a trade list.
+    Trades still open use exit_idx == len(close). Realized P/L is booked on the exit bar.
+    """
+    n = close.size
+    signed = side * qty
+    d_qty = np.zeros(n + 1)
+    d_basis = np.zeros(n + 1)
+    d_realized = np.zeros(n + 1)
+    d_open = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(d_qty, entry_idx, signed)
+    np.add.at(d_qty, exit_idx, -signed)
+    np.add.at(d_basis, entry_idx, signed * entry_price)
+    np.add.at(d_basis, exit_idx, -signed * entry_price)
+    np.add.at(d_realized, exit_idx, pnl)
+    np.add.at(d_open, entry_idx, 1)
+    np.add.at(d_open, exit_idx, -1)
+
+    equity = initial_capital + np.cumsum(d_realized[:n]) + np.cumsum(d_qty[:n]) * close - np.cumsum(d_basis[:n])
+    return equity, np.cumsum(d_open[:n])
+
+def equity_metrics(equity: np.ndarray, periods_per_year: float) -> dict:
+    """Return, drawdown and risk-adjusted ratios of an equity series sampled at a fixed period."""
+    if equity.size < 2:
+        return {"total_return": 0.0, "max_drawdown": 0.0, "sharpe": None, "sortino": None}
+    prev = equity[:-1]
+    returns = np.divide(np.diff(equity), prev, out=np.zeros(prev.size), where=prev > 0)
+    peaks = np.maximum.accumulate(equity)
+    drawdown = np.divide(peaks - equity, peaks, out=np.zeros(equity.size), where=peaks > 0)
+
+    mean = returns.mean()
+    std = returns.std()
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    scale = np.sqrt(periods_per_year)
+    return {
+        "total_return": float(equity[-1] / equity[0] - 1) * 100,
+        "max_drawdown": float(drawdown.max()) * 100,
+        "sharpe": float(mean / std * scale) if std > 0 else None,
+        "sortino": float(mean / downside * scale) if downside > 0 else None
+    }
+
+def trade_metrics(pnl: np.ndarray, hold_seconds: np.ndarray, strategies: np.ndarray) -> dict:
+    """Win rate, profit factor, hold time and a per-strategy breakdown of closed trades."""
+    if pnl.size == 0:
+        return {"win_rate": 0.0, "profit_factor": None, "avg_hold_hours": None, "expectancy": None, "by_strategy": {}}
+
+    wins = pnl > 0
+    gains = np.where(wins, pnl, 0.0)
+    losses = np.where(pnl < 0, -pnl, 0.0)
+
+    names, group = np.unique(strategies, return_inverse=True)
+    count = np.bincount(group)
+    group_pnl = np.bincount(group, weights=pnl)
+    group_wins = np.bincount(group, weights=wins)
+    group_gains = np.bincount(group, weights=gains)
+    group_losses = np.bincount(group, weights=losses)
+    group_hold = np.bincount(group, weights=hold_seconds)
+
+    by_strategy = {
+        str(name): {
+            "trades": int(count[k]),
+            "total_pnl": float(group_pnl[k]),
+            "win_rate": float(group_wins[k] / count[k]) * 100,
+            "profit_factor": float(group_gains[k] / group_losses[k]) if group_losses[k] > 0 else None,
+            "avg_hold_hours": float(group_hold[k] / count[k]) / 3600
+        }
+        for k, name in enumerate(names)
+    }
+
+    gross_loss = losses.sum()
+    return {
+        "win_rate": float(wins.mean()) * 100,
+        "profit_factor": float(gains.sum() / gross_loss) if gross_loss > 0 else None,
+        "avg_hold_hours": float(hold_seconds.mean()) / 3600,
+        "expectancy": float(pnl.mean()),
+        "by_strategy": by_strategy
+    }
+
+def backtest_metrics(close: np.ndarray, timestamps: np.ndarray, trades: list, initial_capital: float, timeframe: str,
+                     start_index: int = 0, open_position: dict = None):
+    """
+    Metrics for one simulated candle window.
+    `timestamps` are int64 ms; trades carry entry/exit bar indices into `close`.
+    Returns (metrics, per-bar equity array from start_index).
+    """
+    n = close.size
+    legs = trades + ([{"entry_index": open_position['index'], "exit_index": n, "type": open_position['type'],
+                       "qty": open_position['amount'], "entry_price": open_position['entry_price'], "pnl": 0.0}]
+                     if open_position else [])
+
+    entry_idx = np.array([t["entry_index"] for t in legs], dtype=np.int64)
+    exit_idx = np.array([t["exit_index"] for t in legs], dtype=np.int64)
+    side = np.array([1.0 if t["type"] == 'BUY' else -1.0 for t in legs])
+    qty = np.array([t["qty"] for t in legs], dtype=np.float64)
+    entry_price = np.array([t["entry_price"] for t in legs], dtype=np.float64)
+    pnl = np.array([t["pnl"] for t in legs], dtype=np.float64)
+
+    equity, open_count = mark_to_market(close, initial_capital, entry_idx, exit_idx, side, qty, entry_price, pnl)
+    equity = equity[start_index:]
+    open_count = open_count[start_index:]
+
+    closed = len(trades)
+    hold = (timestamps[exit_idx[:closed]] - timestamps[entry_idx[:closed]]) / 1000.0
+    strategies = np.array([t.get("strategy", "unknown") for t in trades], dtype=object)
+
+    metrics = equity_metrics(equity, SECONDS_PER_YEAR / timeframe_seconds(timeframe))
+    metrics.update(trade_metrics(pnl[:closed], hold, strategies))
+    metrics["exposure"] = float((open_count > 0).mean()) * 100 if open_count.size else 0.0
+    return metrics, equity
+
+def live_metrics(rows: list, initial_capital: float) -> dict:
+    """
+    Metrics for closed live trades, `rows` being (entry_time, exit_time, profit_loss, strategy) tuples.
+    Realized equity is sampled daily so Sharpe/Sortino annualize like the backtest's per-bar series.
+    """
+    if not rows:
+        return {"total_trades": 0, **equity_metrics(np.array([initial_capital]), 365), **trade_metrics(np.array([]), np.array([]), np.array([]))}
+
+    entry, exit_, pnl, strategies = zip(*rows)
+    entry_s = np.array(entry, dtype='datetime64[s]').astype(np.int64)
+    exit_s = np.array(exit_, dtype='datetime64[s]').astype(np.int64)
+    pnl = np.array(pnl, dtype=np.float64)
+
+    day = exit_s // 86400
+    daily_pnl = np.bincount(day - day.min(), weights=pnl)
+    equity = initial_capital + np.concatenate([[0.0], np.cumsum(daily_pnl)])
+
+    span = max(exit_s.max() - entry_s.min(), 1)
+    metrics = {"total_trades": int(pnl.size), "total_pnl": float(pnl.sum())}
+    metrics.update(equity_metrics(equity, 365))
+    metrics.update(trade_metrics(pnl, (exit_s - entry_s).astype(np.float64), np.array([s or "unknown" for s in strategies], dtype=object)))
+    # Gross exposure: summed holding time over the traded span (exceeds 100% when positions overlap)
+    metrics["exposure"] = float((exit_s - entry_s).sum() / span) * 100
+    return metrics
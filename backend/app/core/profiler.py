@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+class SamplingProfiler:
+    """
+    Statistical CPU profiler for the running process.
+    A background thread samples every thread's Python stack each `interval` seconds;
+    the result is in collapsed-stack format ("root;caller;callee count"), which
+    flamegraph.pl, speedscope and inferno read directly.
+    """
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.samples.clear()
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.time() - self.started_at if self.started_at else 0.0
+        return self.collapsed()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+class MemoryTracker:
+    """tracemalloc baseline snapshot and diffs against it, to spot allocations that keep growing"""
+    def __init__(self):
+        self.baseline = None
+        self.started_at = None
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10):
+        tracemalloc.start(frames)
+        self.baseline = tracemalloc.take_snapshot()
+        self.started_at = time.time()
+
+    def diff(self, limit: int = 25, group_by: str = "lineno") -> dict:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.compare_to(self.baseline, group_by)
+        return {
+            "since": self.started_at,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {
+                    "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                    "count": stat.count
+                }
+                for stat in stats[:limit]
+            ]
+        }
+
+    def stop(self):
+        tracemalloc.stop()
+        self.baseline = None
+        self.started_at = None
+
+cpu_profiler = SamplingProfiler()
+memory_tracker = MemoryTracker()
@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from app.core.accounts import DEFAULT_ACCOUNT, account_filter, account_value
+from app.core.database import SessionLocal
+from app.models.database import Trade, OrderFill
+
+QTY_TOLERANCE = 0.01  # Relative difference still treated as "in sync" (exchange step rounding)
+FILL_LOOKBACK = timedelta(minutes=5)  # Entry fills are stamped slightly before Trade.entry_time
+
+def trade_quantity(trade: Trade) -> float:
+    """Filled base quantity, or the quantity implied by the invested amount for older rows"""
+    return trade.quantity or trade.amount / trade.entry_price
+
+def _vwap(fills: list) -> tuple:
+    qty = sum(f.quantity for f in fills)
+    return qty, (sum(f.price * f.quantity for f in fills) / qty if qty else 0.0)
+
+def close_trade(trade: Trade, price: float, exit_fee: float, exit_time: datetime, order_id: str):
+    """Close a trade at an exchange fill price; P/L net of entry and exit commissions"""
+    direction = 1 if trade.action == 'BUY' else -1
+    trade.fees = (trade.fees or 0.0) + exit_fee
+    trade.status = 'CLOSED'
+    trade.exit_price = price
+    trade.exit_time = exit_time
+    trade.exit_order_id = order_id
+    trade.profit_loss = direction * (price - trade.entry_price) * trade_quantity(trade) - trade.fees
+    trade.profit_loss_pct = direction * (price - trade.entry_price) / trade.entry_price
+
+class PositionReconciler:
+    """
+    Brings OPEN real trades in line with the exchange.
+
+    One fetch_positions() call covers every symbol; fills are only fetched for symbols whose net
+    exchange position differs from the sum of their open trades. Fills are recorded in the
+    OrderFill ledger and attributed by order id (entry / SL / TP); exits placed by other means
+    (manual closes, liquidations) are matched FIFO to the oldest open trades. A trade whose
+    position is gone but has no fill to price it is closed with profit_loss left empty rather
+    than a made-up zero.
+    Each exchange account has its own reconciler; it only sees that account's trades and fills.
+    With `symbols`, only trades of those symbols are reconciled: each trading loop reconciles its own
+    symbol, so loops in different workers never fetch fills for, or close, the same trades.
+    """
+    def __init__(self, binance, log=None, account: str = DEFAULT_ACCOUNT, symbols: list = None):
+        self.binance = binance
+        self.account = account
+        self.symbols = symbols
+        self.log = log or (lambda level, message, details=None: print(f"[{level}] {message}"))
+
+    async def reconcile(self) -> dict:
+        summary = {"symbols": 0, "mismatched": [], "closed": 0}
+        db = SessionLocal()
+        try:
+            open_trades = defaultdict(list)
+            query = db.query(Trade).filter(Trade.status == 'OPEN', Trade.is_simulation == False,
+                                           account_filter(Trade.account, self.account))
+            if self.symbols is not None:
+                query = query.filter(Trade.symbol.in_(self.symbols))
+            for trade in query.order_by(Trade.entry_time).all():
+                open_trades[trade.symbol].append(trade)
+            summary["symbols"] = len(open_trades)
+            if not open_trades:
+                return summary
+
+            net = await self.binance.fetch_net_positions()
+            for symbol, trades in open_trades.items():
+                expected = sum(trade_quantity(t) * (1 if t.action == 'BUY' else -1) for t in trades)
+                actual = net.get(symbol, 0.0)
+                if abs(expected - actual) <= QTY_TOLERANCE * max(abs(expected), abs(actual)):
+                    continue
+
+                summary["mismatched"].append(symbol)
+                since = min(t.entry_time for t in trades) - FILL_LOOKBACK
+                fills = await self.binance.fetch_fills(symbol, since=int((since - datetime(1970, 1, 1)).total_seconds() * 1000))
+                self.record_fills(db, symbol, fills, trades)
+                closed = self.apply_fills(db, symbol, trades, actual, since)
+                summary["closed"] += closed
+                db.commit()
+                self.log("INFO", f"Reconciled {symbol}{'' if self.account == DEFAULT_ACCOUNT else f' ({self.account})'}: local {expected:.6f} vs exchange {actual:.6f}, closed {closed} trades")
+            return summary
+        finally:
+            db.close()
+
+    def record_fills(self, db, symbol: str, fills: list, trades: list):
+        """Insert fills not yet in the ledger, attributing them to trades by order id"""
+        if not fills:
+            return
+        known = {row[0] for row in db.query(OrderFill.fill_id).filter(OrderFill.fill_id.in_([str(f['id']) for f in fills]))}
+        owner = {}
+        for trade in trades:
+            for order_id in (trade.entry_order_id, trade.stop_order_id, trade.take_profit_order_id, trade.exit_order_id):
+                if order_id:
+                    owner[order_id] = trade.id
+        for fill in fills:
+            if str(fill['id']) in known:
+                continue
+            order_id = str(fill['order'])
+            db.add(OrderFill(
+                fill_id=str(fill['id']),
+                order_id=order_id,
+                trade_id=owner.get(order_id),
+                symbol=symbol,
+                side=fill['side'],
+                price=float(fill['price']),
+                quantity=float(fill['amount']),
+                fee=float((fill.get('fee') or {}).get('cost') or 0.0),
+                realized_pnl=float(fill['info']['realizedPnl']) if fill.get('info', {}).get('realizedPnl') is not None else None,
+                account=account_value(self.account),
+                timestamp=datetime.utcfromtimestamp(fill['timestamp'] / 1000)
+            ))
+        db.flush()
+
+    def apply_fills(self, db, symbol: str, trades: list, actual: float, since: datetime) -> int:
+        """Update entries and close trades from the ledger; returns the number of trades closed"""
+        ledger = db.query(OrderFill).filter(OrderFill.symbol == symbol, OrderFill.timestamp >= since,
+                                            account_filter(OrderFill.account, self.account)) \
+            .order_by(OrderFill.timestamp).all()
+        by_order = defaultdict(list)
+        for fill in ledger:
+            by_order[fill.order_id].append(fill)
+        closed = 0
+
+        for trade in trades:
+            # Exact entry from its fills
+            entry_fills = by_order.get(trade.entry_order_id) if trade.entry_order_id else None
+            if entry_fills and trade.quantity is None:
+                trade.quantity, trade.entry_price = _vwap(entry_fills)
+                trade.fees = sum(f.fee or 0.0 for f in entry_fills)
+
+            for order_id in (trade.stop_order_id, trade.take_profit_order_id):
+                exit_fills = by_order.get(order_id) if order_id else None
+                if exit_fills:
+                    _, price = _vwap(exit_fills)
+                    close_trade(trade, price, sum(f.fee or 0.0 for f in exit_fills), exit_fills[-1].timestamp, order_id)
+                    closed += 1
+                    break
+
+        # Exits we didn't place (manual close, liquidation): match whole orders FIFO to the oldest trades.
+        # Orders belonging to any known trade (including already closed ones) are not candidates.
+        known_orders = set()
+        for row in db.query(Trade.entry_order_id, Trade.stop_order_id, Trade.take_profit_order_id, Trade.exit_order_id) \
+                .filter(Trade.symbol == symbol, Trade.entry_time >= since, account_filter(Trade.account, self.account)):
+            known_orders.update(order_id for order_id in row if order_id)
+        remaining = [t for t in trades if t.status == 'OPEN']
+        for order_id, fills in by_order.items():
+            if order_id in known_orders or any(f.trade_id is not None for f in fills):
+                continue
+            qty, price = _vwap(fills)
+            fee = sum(f.fee or 0.0 for f in fills)
+            left = qty
+            for trade in list(remaining):
+                closes_trade = (trade.action == 'BUY') == (fills[0].side == 'sell')
+                if not closes_trade or trade.entry_time > fills[0].timestamp:
+                    continue
+                needed = trade_quantity(trade)
+                if left < needed * (1 - QTY_TOLERANCE):
+                    break
+                close_trade(trade, price, fee * needed / qty, fills[-1].timestamp, order_id)
+                for fill in fills:
+                    fill.trade_id = fill.trade_id or trade.id
+                remaining.remove(trade)
+                closed += 1
+                left -= needed
+
+        if actual == 0:
+            for trade in remaining:
+                # Position is gone but no fill explains it: don't invent an exit price or P/L
+                trade.status = 'CLOSED'
+                trade.exit_time = datetime.utcnow()
+                trade.exit_price = None
+                trade.profit_loss = None
+                trade.profit_loss_pct = None
+                closed += 1
+                self.log("WARNING", f"Trade #{trade.id} has no position on the exchange and no matching fill; closed without P/L")
+        return closed
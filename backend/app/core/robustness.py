@@ -0,0 +1,181 @@
+import asyncio
+import numpy as np
+from app.core.candles import format_time
+from app.core.performance import equity_metrics, trade_metrics, timeframe_seconds, SECONDS_PER_YEAR
+
+WARMUP_CANDLES = 20  # BacktestEngine.simulate uses the first 20 candles as context only
+
+def walk_forward_windows(n_candles: int, train_size: int, test_size: int, step: int = None):
+    """
+    Rolling (train, test) index windows over `n_candles`.
+    Each window is [start, end) and includes WARMUP_CANDLES of context before the evaluated range.
+    """
+    step = step or test_size
+    windows = []
+    start = 0
+    while True:
+        train = (start, start + WARMUP_CANDLES + train_size)
+        test = (train[1] - WARMUP_CANDLES, train[1] + test_size)
+        if test[1] > n_candles:
+            break
+        windows.append({"train": train, "test": test})
+        start += step
+    return windows
+
+async def run_walk_forward(binance, gemini, symbol: str, timeframe: str, strategies: list, initial_capital: float = 1000.0,
+                           candles: int = 1500, train_size: int = 200, test_size: int = 100, max_parallel: int = 3,
+                           on_progress=None, completed_folds: list = None, on_fold=None):
+    """
+    Walk-forward analysis: for each fold pick the strategy with the best in-sample P/L on the
+    train window, then score it out-of-sample on the following test window. Folds run
+    concurrently (bounded by `max_parallel`). With a single strategy the train step is skipped.
+
+    `completed_folds` (from a checkpoint) are reused instead of re-run; `on_fold(folds, total)` is
+    awaited after every finished fold.
+    """
+    from app.core.backtest_engine import BacktestEngine  # Only backtest workers load the engine
+
+    async def log(msg):
+        if on_progress:
+            await on_progress(msg)
+        print(msg)
+
+    await log(f"Fetching {candles} candles of {symbol} ({timeframe}) for walk-forward...")
+    df = await binance.fetch_ohlcv_history(symbol, timeframe=timeframe, total=candles)
+    windows = walk_forward_windows(len(df), train_size, test_size)
+    if not windows:
+        return {"error": f"Not enough data for a single fold ({len(df)} candles)"}
+    await log(f"Walk-forward over {len(df)} candles: {len(windows)} folds, strategies: {', '.join(strategies)}")
+
+    folds = {f["fold"]: f for f in (completed_folds or [])}
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def simulate(n, window, strategy):
+        async def progress(msg):
+            # Also keeps the job visibly alive between folds, which can be minutes apart
+            if on_progress:
+                await on_progress(f"[Fold {n + 1}, {strategy}] {msg}")
+
+        async with semaphore:
+            engine = BacktestEngine(binance, gemini)
+            start, end = window
+            return await engine.simulate(df[start:end], symbol, timeframe, strategy, initial_capital, on_progress=progress)
+
+    async def run_fold(n, window):
+        if n in folds:
+            return
+        train_scores = {}
+        if len(strategies) > 1:
+            results = await asyncio.gather(*[simulate(n, window["train"], s) for s in strategies])
+            train_scores = {s: r["total_pnl"] for s, r in zip(strategies, results)}
+            chosen = max(train_scores, key=train_scores.get)
+        else:
+            chosen = strategies[0]
+
+        test = await simulate(n, window["test"], chosen)
+        folds[n] = {
+            "fold": n,
+            "test_start": format_time(df.timestamp[window["test"][0] + WARMUP_CANDLES]),
+            "test_end": format_time(df.timestamp[window["test"][1] - 1]),
+            "strategy": chosen,
+            "train_pnl": train_scores,
+            "test_pnl": test["total_pnl"],
+            "test_trades": test["trades"],
+            "test_equity": test["equity_curve"],
+            "wins": test["wins"],
+            "losses": test["losses"]
+        }
+        await log(f"Fold {n + 1}/{len(windows)} done: {chosen} -> OOS P/L {test['total_pnl']:.2f}")
+        if on_fold:
+            await on_fold(list(folds.values()), len(windows))
+
+    await asyncio.gather(*[run_fold(n, w) for n, w in enumerate(windows)])
+
+    # Stitch the out-of-sample folds into one trade list and per-bar equity curve,
+    # carrying each fold's P/L forward into the next
+    ordered = [folds[n] for n in sorted(folds)]
+    trades = [t for f in ordered for t in f["test_trades"]]
+    equity_curve = []
+    carried = 0.0
+    for f in ordered:
+        equity_curve.extend({"time": p["time"], "equity": p["equity"] + carried} for p in f["test_equity"])
+        carried += f["test_pnl"]
+
+    equity = np.array([p["equity"] for p in equity_curve], dtype=np.float64)
+    hold = (np.array([t["exit_time"] for t in trades], dtype='datetime64[s]') -
+            np.array([t["entry_time"] for t in trades], dtype='datetime64[s]')).astype(np.float64)
+    metrics = equity_metrics(equity, SECONDS_PER_YEAR / timeframe_seconds(timeframe))
+    metrics.update(trade_metrics(np.array([t["pnl"] for t in trades], dtype=np.float64), hold,
+                                 np.array([t["strategy"] for t in trades], dtype=object)))
+
+    await log("Walk-forward completed.")
+    return {
+        "total_trades": len(trades),
+        "wins": sum(f["wins"] for f in ordered),
+        "losses": sum(f["losses"] for f in ordered),
+        "total_pnl": carried,
+        "total_return": metrics["total_return"],
+        "win_rate": metrics["win_rate"],
+        "max_drawdown": metrics["max_drawdown"],
+        "metrics": metrics,
+        "folds": [{k: v for k, v in f.items() if k not in ("test_trades", "test_equity")} for f in ordered],
+        "equity_curve": equity_curve,
+        "trades": trades
+    }
+
+MONTE_CARLO_METHODS = ("bootstrap", "shuffle")
+
+def monte_carlo(trade_pnls, initial_capital: float = 1000.0, n_paths: int = 5000, n_trades: int = None,
+                ruin_threshold: float = 0.5, method: str = "bootstrap", seed: int = None) -> dict:
+    """
+    Resample a trade P/L sequence into `n_paths` alternative histories (all paths at once as a
+    (n_paths, n_trades) matrix) and report the distribution of outcomes.
+
+    method: 'bootstrap' draws trades with replacement, 'shuffle' permutes the original order.
+    Ruin is equity falling to `initial_capital * (1 - ruin_threshold)` at any point of the path.
+    """
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of: {', '.join(MONTE_CARLO_METHODS)}")
+    if not 0 < ruin_threshold < 1:
+        raise ValueError("ruin_threshold must be between 0 and 1 (exclusive)")
+    if n_paths < 1:
+        raise ValueError("n_paths must be positive")
+    pnls = np.asarray(trade_pnls, dtype=np.float64)
+    if pnls.size == 0:
+        return {"error": "No trades to resample"}
+
+    rng = np.random.default_rng(seed)
+    if method == "shuffle":
+        paths = rng.permuted(np.broadcast_to(pnls, (n_paths, pnls.size)), axis=1)
+    else:
+        paths = rng.choice(pnls, size=(n_paths, n_trades or pnls.size), replace=True)
+
+    equity = initial_capital + np.cumsum(paths, axis=1)
+    equity = np.hstack([np.full((n_paths, 1), initial_capital), equity])
+
+    peaks = np.maximum.accumulate(equity, axis=1)
+    max_drawdown = ((peaks - equity) / peaks).max(axis=1)
+
+    # Per-trade returns relative to equity before the trade
+    before = equity[:, :-1]
+    returns = np.divide(paths, before, out=np.zeros_like(paths), where=before > 0)
+    std = returns.std(axis=1)
+    sharpe = np.divide(returns.mean(axis=1), std, out=np.zeros(n_paths), where=std > 0) * np.sqrt(returns.shape[1])
+
+    ruined = (equity.min(axis=1) <= initial_capital * (1 - ruin_threshold))
+
+    def distribution(values):
+        p5, p25, p50, p75, p95 = np.percentile(values, [5, 25, 50, 75, 95])
+        return {"mean": float(values.mean()), "p5": float(p5), "p25": float(p25), "p50": float(p50),
+                "p75": float(p75), "p95": float(p95)}
+
+    return {
+        "paths": n_paths,
+        "trades_per_path": int(paths.shape[1]),
+        "method": method,
+        "final_equity": distribution(equity[:, -1]),
+        "max_drawdown_pct": distribution(max_drawdown * 100),
+        "sharpe": distribution(sharpe),
+        "ruin_threshold_pct": ruin_threshold * 100,
+        "ruin_probability": float(ruined.mean())
+    }
@@ -0,0 +1,219 @@
+import asyncio
+import time
+import numpy as np
+from app.agents.binance_agent import BinanceAgent
+from app.core.clock import clock
+from app.core.config import settings
+from app.core.telemetry import SCANNER_LATENCY, SCANNER_SYMBOLS
+
+# Weights of the cross-sectional z-scores summed into a pair's score
+WEIGHTS = {"volatility": 1.0, "trend": 1.0, "volume": 1.0, "setup": 1.5}
+
+def _smooth(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponential smoothing along time (axis 1) for every pair at once"""
+    out = np.empty_like(x)
+    out[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        out[:, t] = alpha * x[:, t] + (1 - alpha) * out[:, t - 1]
+    return out
+
+def _ema(x: np.ndarray, span: int) -> np.ndarray:
+    return _smooth(x, 2 / (span + 1))
+
+def _rsi(close: np.ndarray, n: int = 14) -> np.ndarray:
+    diff = np.diff(close, axis=1)
+    gain = _smooth(np.maximum(diff, 0), 1 / n)[:, -1]
+    loss = _smooth(np.maximum(-diff, 0), 1 / n)[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(loss > 0, 100 - 100 / (1 + gain / loss), 100.0)
+
+def _range_position(c: dict) -> np.ndarray:
+    """Last close within the window's high-low range: 0 at the low, 1 at the high"""
+    high, low = c["high"].max(axis=1), c["low"].min(axis=1)
+    return np.where(high > low, (c["close"][:, -1] - low) / np.where(high > low, high - low, 1), 0.5)
+
+def _atr(c: dict, n: int = 14) -> np.ndarray:
+    prev = c["close"][:, :-1]
+    true_range = np.maximum(c["high"][:, 1:], prev) - np.minimum(c["low"][:, 1:], prev)
+    return _smooth(true_range, 1 / n)[:, -1]
+
+def _setup_rsi(c):
+    return np.abs(_rsi(c["close"]) - 50) / 50  # Over-bought/sold zones, where divergences matter
+
+def _setup_macd(c):
+    macd = _ema(c["close"], 12) - _ema(c["close"], 26)
+    hist = macd - _ema(macd, 9)
+    return np.exp(-np.abs(hist[:, -1]) / (hist.std(axis=1) + 1e-12))  # 1 at a crossover
+
+def _setup_bollinger(c):
+    window = c["close"][:, -20:]
+    deviation = (c["close"][:, -1] - window.mean(axis=1)) / (2 * window.std(axis=1) + 1e-12)
+    return np.minimum(np.abs(deviation), 2.0)  # >= 1 outside the bands
+
+def _setup_ema_cross(c):
+    gap = np.abs(_ema(c["close"], 20)[:, -1] - _ema(c["close"], 50)[:, -1])
+    return np.exp(-gap / (_atr(c) + 1e-12))  # 1 when the EMAs meet
+
+def _setup_fibonacci(c):
+    position = _range_position(c)
+    distance = np.min(np.abs(position[:, None] - np.array([0.382, 0.5, 0.618])), axis=1)
+    return np.clip(1 - distance / 0.25, 0, 1)  # In a retracement zone of the window's swing
+
+def _setup_extremes(c):
+    return np.abs(2 * _range_position(c) - 1)  # Testing the range high/low: S/R, liquidity, phase edges
+
+def _setup_vsa(c):
+    spread = (c["high"][:, -1] - c["low"][:, -1]) / (_atr(c) + 1e-12)
+    volume = c["volume"][:, -1] / (c["volume"][:, :-1].mean(axis=1) + 1e-12)
+    return np.log1p(spread * volume)  # Wide or narrow bars on unusual volume
+
+# Cheap pre-conditions of each strategy (GeminiAgent.build_prompt); higher = closer to a setup
+SETUPS = {
+    "RSI Divergence": _setup_rsi,
+    "MACD Crossover": _setup_macd,
+    "Bollinger Bands Breakout": _setup_bollinger,
+    "EMA Golden Cross": _setup_ema_cross,
+    "Fibonacci Retracement": _setup_fibonacci,
+    "Ichimoku Cloud": _setup_extremes,
+    "Price Action (S/R)": _setup_extremes,
+    "Volume Spread Analysis (VSA)": _setup_vsa,
+    "Elliott Wave Theory": _setup_extremes,
+    "Wyckoff Method": _setup_extremes,
+    "Smart Money Concepts (SMC)": _setup_extremes,
+}
+
+def _zscore(x: np.ndarray) -> np.ndarray:
+    x = np.nan_to_num(x.astype(np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+    std = x.std()
+    return (x - x.mean()) / std if std > 0 else np.zeros_like(x)
+
+def score(candles: dict, strategy: str) -> tuple:
+    """
+    Scores of every pair from stacked (pairs x candles) arrays, with the features behind them.
+    Features are z-scored across the universe, so the score ranks pairs against each other.
+    """
+    log_close = np.log(candles["close"])
+    returns = np.diff(log_close, axis=1)
+    volatility = returns.std(axis=1)
+    momentum = log_close[:, -1] - log_close[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trend = np.abs(momentum) / (volatility * np.sqrt(returns.shape[1]))  # Move relative to its noise
+        volume = np.log(candles["volume"][:, -3:].mean(axis=1) / candles["volume"][:, :-3].mean(axis=1))
+    setup = SETUPS[strategy](candles) if strategy in SETUPS else np.zeros(len(volatility))
+    features = {"volatility": volatility, "momentum": momentum, "trend": trend, "volume": volume, "setup": setup}
+    total = sum(weight * _zscore(features[name]) for name, weight in WEIGHTS.items())
+    # Halted pairs (no volume, flat price) give inf/nan features: report them as 0 like their z-scores
+    return total, {name: np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0) for name, values in features.items()}
+
+def _key(symbol: str) -> str:
+    return symbol.split(':')[0]  # BTC/USDT:USDT (ccxt swap) and BTC/USDT name the same pair
+
+class MarketScanner:
+    """
+    Ranks a universe of pairs so that only the most promising ones are sent to the model.
+
+    Each refresh (at most every SCANNER_REFRESH_SECONDS per market type and timeframe) takes
+    the SCANNER_UNIVERSE most traded pairs from one all-symbol tickers request, fetches their
+    last SCANNER_CANDLES closed candles concurrently and stacks them into (pairs x candles) arrays, so
+    every feature is computed for the whole universe in a few vectorized operations. Rankings per
+    strategy are scored from the cached arrays.
+    """
+    def __init__(self):
+        self.clients = {}  # market_type -> BinanceAgent (public market data only)
+        self.snapshots = {}  # (market_type, timeframe) -> {"time", "symbols", "candles", "rankings" by strategy}
+        self.locks = {}
+
+    async def _client(self, market_type: str) -> BinanceAgent:
+        if market_type not in self.clients:
+            agent = BinanceAgent(market_type=market_type)
+            await agent.load_markets()
+            self.clients[market_type] = agent
+        return self.clients[market_type]
+
+    async def _universe(self, client: BinanceAgent, market_type: str) -> list:
+        markets = client.exchange.markets
+        kind = 'swap' if market_type == 'future' else 'spot'
+        tickers = await client.fetch_tickers()
+        volumes = {
+            symbol: ticker.get('quoteVolume') or 0.0 for symbol, ticker in tickers.items()
+            if markets.get(symbol, {}).get('quote') == settings.SCANNER_QUOTE
+            and markets[symbol].get('type', kind) == kind and markets[symbol].get('active', True)
+        }
+        return sorted(volumes, key=volumes.get, reverse=True)[:settings.SCANNER_UNIVERSE]
+
+    async def _refresh(self, market_type: str, timeframe: str) -> dict:
+        started = time.perf_counter()
+        client = await self._client(market_type)
+        symbols = await self._universe(client, market_type)
+        semaphore = asyncio.Semaphore(settings.SCANNER_CONCURRENCY)
+
+        async def fetch(symbol):
+            async with semaphore:
+                try:
+                    # One more than scored: the last candle is still forming (partial volume)
+                    return await client.fetch_ohlcv(symbol, timeframe=timeframe, limit=settings.SCANNER_CANDLES + 1)
+                except Exception:
+                    return None  # Skipped this round; logged by BinanceAgent
+
+        windows = await asyncio.gather(*(fetch(s) for s in symbols))
+        # Pairs with a full window only (new listings have less history)
+        kept = [(s, w[:-1]) for s, w in zip(symbols, windows) if w is not None and len(w) == settings.SCANNER_CANDLES + 1]
+        candles = {field: np.stack([getattr(w, field) for _, w in kept]).astype(np.float64) if kept else np.zeros((0, 0))
+                   for field in ("high", "low", "close", "volume")}
+        snapshot = {"time": clock.time(), "symbols": [s for s, _ in kept], "candles": candles, "rankings": {}}
+        SCANNER_LATENCY.observe(time.perf_counter() - started)
+        SCANNER_SYMBOLS.set(len(kept), market_type=market_type, timeframe=timeframe)
+        return snapshot
+
+    async def _snapshot(self, market_type: str, timeframe: str, refresh: bool = False) -> dict:
+        key = (market_type, timeframe)
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        async with lock:  # Loops asking at the same time share one refresh
+            snapshot = self.snapshots.get(key)
+            if refresh or snapshot is None or clock.time() - snapshot["time"] >= settings.SCANNER_REFRESH_SECONDS:
+                try:
+                    snapshot = self.snapshots[key] = await self._refresh(market_type, timeframe)
+                except Exception as e:
+                    if snapshot is None:
+                        raise
+                    print(f"Market scanner refresh failed, keeping the ranking from {clock.time() - snapshot['time']:.0f}s ago: {e}")
+        return snapshot
+
+    async def ranking(self, market_type: str, timeframe: str, strategy: str, refresh: bool = False) -> dict:
+        """Pairs by descending score, with their features and whether they're in the top SCANNER_TOP_K"""
+        snapshot = await self._snapshot(market_type, timeframe, refresh)
+        cached = snapshot["rankings"].get(strategy)
+        if cached is not None:
+            return cached
+        symbols = snapshot["symbols"]
+        ranked = []
+        if symbols:
+            total, features = score(snapshot["candles"], strategy)
+            for rank, i in enumerate(np.argsort(-total, kind="stable")):
+                ranked.append({
+                    "rank": rank + 1,
+                    "symbol": symbols[i],
+                    "score": round(float(total[i]), 4),
+                    "selected": rank < settings.SCANNER_TOP_K,
+                    **{name: round(float(values[i]), 6) for name, values in features.items()}
+                })
+        result = snapshot["rankings"][strategy] = {
+            "market_type": market_type,
+            "timeframe": timeframe,
+            "strategy": strategy,
+            "generated_at": snapshot["time"],
+            "universe": len(symbols),
+            "top_k": settings.SCANNER_TOP_K,
+            "ranking": ranked
+        }
+        return result
+
+    async def rank_of(self, symbol: str, market_type: str, timeframe: str, strategy: str) -> int:
+        """1-based rank of the pair, or None if it isn't in the scanned universe"""
+        result = await self.ranking(market_type, timeframe, strategy)
+        for entry in result["ranking"]:
+            if _key(entry["symbol"]) == _key(symbol):
+                return entry["rank"]
+        return None
+
+market_scanner = MarketScanner()
@@ -0,0 +1,95 @@
+import math
+from app.core.clock import clock
+from app.core.config import settings
+from app.core.telemetry import SCHEDULER_JITTER, SCHEDULER_MISSED, CLOCK_OFFSET, CLOCK_DRIFT
+
+class CandleScheduler:
+    """
+    Wakes the trading loop just after each candle close, measured on the exchange's clock.
+
+    The analysis period is the timeframe, or a whole multiple of it when check_interval is longer
+    (e.g. 1m candles with check_interval=300 analyze every 5th close). Deadlines are absolute,
+    so a tick's own runtime doesn't push later ticks back; if a tick overruns the next close,
+    the missed boundaries are skipped and counted.
+    """
+    def __init__(self, binance, timeframe: str, check_interval: float = 0,
+                 close_delay: float = None, resync_every: float = None):
+        self.binance = binance
+        self.tf_seconds = binance.exchange.parse_timeframe(timeframe)
+        self.set_interval(check_interval)
+        self.close_delay = settings.CANDLE_CLOSE_DELAY_SECONDS if close_delay is None else close_delay
+        self.resync_every = settings.CLOCK_RESYNC_SECONDS if resync_every is None else resync_every
+        self.offset = 0.0  # Server time minus local time (seconds)
+        self.last_sync = None
+        self.last_close = None  # Epoch seconds of the candle close the current tick belongs to
+
+    def set_interval(self, check_interval: float):
+        self.period = self.tf_seconds * max(1, round(check_interval / self.tf_seconds))
+
+    async def sync_time(self):
+        """Estimate the server clock offset, assuming the reply was stamped mid round-trip"""
+        sent = clock.time()
+        server = await self.binance.fetch_server_time() / 1000
+        received = clock.time()
+        offset = server - (sent + received) / 2
+        if self.last_sync is not None and received > self.last_sync:
+            CLOCK_DRIFT.set((offset - self.offset) * 1000 / ((received - self.last_sync) / 3600))
+        self.offset, self.last_sync = offset, received
+        CLOCK_OFFSET.set(offset)
+
+    def server_now(self) -> float:
+        return clock.time() + self.offset
+
+    def next_close(self, now: float = None) -> float:
+        now = self.server_now() if now is None else now
+        return (math.floor(now / self.period) + 1) * self.period
+
+    async def _maybe_sync(self):
+        if self.last_sync is None or clock.time() - self.last_sync >= self.resync_every:
+            try:
+                await self.sync_time()
+            except Exception as e:
+                print(f"Failed to sync exchange time, keeping offset {self.offset:.3f}s: {e}")
+
+    async def wait_before_close(self, lead: float) -> float:
+        """Sleep until `lead` seconds before the next close; returns that close time"""
+        await self._maybe_sync()
+        close = self.next_close()
+        await clock.sleep(max(0.0, close - lead - self.server_now()))
+        return close
+
+    async def wait_for_close(self, close: float = None) -> float:
+        """
+        Sleep until the next close, or the given one (+ settle delay); returns that close time
+        (server epoch seconds)
+        """
+        if close is None:
+            await self._maybe_sync()
+            close = self.next_close()
+        if self.last_close is not None and close - self.last_close > self.period:
+            SCHEDULER_MISSED.inc(round((close - self.last_close) / self.period) - 1, loop="analysis")
+        target = close + self.close_delay
+        await clock.sleep(max(0.0, target - self.server_now()))
+        SCHEDULER_JITTER.observe(max(0.0, self.server_now() - target), loop="analysis")
+        self.last_close = close
+        return close
+
+class IntervalScheduler:
+    """Fixed-rate loop on absolute deadlines (no drift from the work done between waits)"""
+    def __init__(self, interval: float, name: str):
+        self.interval = interval
+        self.name = name
+        self.next_at = None
+
+    async def wait(self):
+        now = clock.time()
+        if self.next_at is None:
+            self.next_at = now + self.interval
+        elif self.next_at <= now:
+            # Overran: skip the missed slots rather than firing them back to back
+            missed = math.floor((now - self.next_at) / self.interval) + 1
+            SCHEDULER_MISSED.inc(missed, loop=self.name)
+            self.next_at += missed * self.interval
+        await clock.sleep(max(0.0, self.next_at - now))
+        SCHEDULER_JITTER.observe(max(0.0, clock.time() - self.next_at), loop=self.name)
+        self.next_at += self.interval
@@ -0,0 +1,27 @@
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+from app.core.telemetry import STARTUP_SECONDS
+
+PHASES = {}  # Phase name -> seconds, in the order they ran
+
+@contextmanager
+def phase(name: str):
+    """Time an import or init step for the startup report"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASES[name] = time.perf_counter() - started
+        STARTUP_SECONDS.set(PHASES[name], phase=name)
+
+def lazy_import(module: str):
+    """Import a heavy SDK on first use instead of at startup; the first import is timed"""
+    if module in sys.modules:
+        return sys.modules[module]
+    with phase(f"lazy import {module}"):
+        return importlib.import_module(module)
+
+def report() -> str:
+    return ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in PHASES.items())
@@ -0,0 +1,296 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from app.core.config import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{str(v).replace(chr(34), chr(39))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def snapshot(self) -> list:
+        """[[label values, value], ...] as JSON-friendly lists (see Registry.snapshot)"""
+        with self._lock:
+            return [[list(key), value if not isinstance(value, dict) else {**value, "counts": list(value["counts"])}]
+                    for key, value in self._values.items()]
+
+    def render(self, remote: dict = None) -> list:
+        """Own series, then those of other processes' snapshots ({process: Registry.snapshot()}) with a worker label"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.extend(self._render_value(self.label_names, key, value))
+        names = self.label_names + ("worker",)
+        for worker, metrics in sorted((remote or {}).items()):
+            for key, value in metrics.get(self.name, []):
+                lines.extend(self._render_value(names, tuple(key) + (worker,), value))
+        return lines
+
+    def _render_value(self, names, key, value) -> list:
+        return [f"{self.name}{_format_labels(names, key)} {value}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def state(self, **labels) -> dict:
+        """Copy of the bucket counts, sum and count (to diff or merge them across processes)"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            return {"counts": list(state["counts"]), "sum": state["sum"], "count": state["count"]}
+
+    def merge(self, state: dict, **labels):
+        """Add observations made elsewhere, given as a state() difference"""
+        key = self._key(labels)
+        with self._lock:
+            current = self._values.get(key)
+            if current is None:
+                current = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, count in enumerate(state["counts"]):
+                current["counts"][i] += count
+            current["sum"] += state["sum"]
+            current["count"] += state["count"]
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_value(self, names, key, state) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            le = 'le="%s"' % bound
+            lines.append(f"{self.name}_bucket{_format_labels(names, key, le)} {cumulative}")
+        le = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{_format_labels(names, key, le)} {state['count']}")
+        lines.append(f"{self.name}_sum{_format_labels(names, key)} {state['sum']}")
+        lines.append(f"{self.name}_count{_format_labels(names, key)} {state['count']}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def snapshot(self) -> dict:
+        """Values of every metric by name, for a process whose registry isn't scraped (trading workers)"""
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def render(self, remote: dict = None) -> str:
+        """Prometheus text exposition format (0.0.4), with the series of `remote` snapshots by process"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(remote))
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# --- Exchange ---
+EXCHANGE_LATENCY = REGISTRY.histogram("exchange_request_seconds", "Latency of exchange API calls", ("method",))
+EXCHANGE_ERRORS = REGISTRY.counter("exchange_errors_total", "Failed exchange API calls", ("method", "error"))
+EXCHANGE_WEIGHT_USED = REGISTRY.gauge("exchange_rate_limit_weight_used", "Request weight used in the current minute (X-MBX-USED-WEIGHT-1M)")
+EXCHANGE_WEIGHT_REMAINING = REGISTRY.gauge("exchange_rate_limit_weight_remaining", "Request weight left in the current minute")
+
+# --- LLM ---
+LLM_LATENCY = REGISTRY.histogram("llm_request_seconds", "Latency of model calls", ("model",),
+                                 buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0))
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "Failed model calls", ("model", "error"))
+LLM_CANCELLED = REGISTRY.counter("llm_requests_cancelled_total", "Hedged/ensemble model calls cancelled once a decision was reached")
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens consumed by model calls (kind: prompt, output)", ("model", "kind"))
+LLM_COST = REGISTRY.counter("llm_cost_usd_total", "Estimated cost of model calls at list prices", ("model",))
+LLM_BUDGET_SKIPS = REGISTRY.counter("llm_budget_skipped_total", "Live analyses skipped by the daily budget (tier)", ("tier",))
+LLM_PARSE_RESULTS = REGISTRY.counter("llm_decision_parse_total", "Model responses by parse outcome (ok, repaired, failed, empty)", ("outcome",))
+SPECULATION_RESULTS = REGISTRY.counter("llm_speculation_total", "Pre-close analyses by outcome (hit, miss, failed)", ("outcome",))
+SPECULATION_SAVED = REGISTRY.counter("llm_speculation_saved_seconds_total", "Decision latency saved by pre-close analyses that were used")
+
+# --- Orchestrator ---
+TICK_LATENCY = REGISTRY.histogram("tick_seconds", "Duration of one trading loop iteration", ("symbol",),
+                                  buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+TICK_ERRORS = REGISTRY.counter("tick_errors_total", "Trading loop iterations that raised", ("error",))
+STAGE_LATENCY = REGISTRY.histogram("stage_seconds", "Duration of traced stages", ("stage",))
+OPEN_POSITIONS = REGISTRY.gauge("open_positions", "Open trades per symbol", ("symbol",))
+EVENT_LOOP_LAG = REGISTRY.histogram("event_loop_lag_seconds", "Delay of the event loop in waking a sleeping task",
+                                    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+# --- Market scanner ---
+SCANNER_LATENCY = REGISTRY.histogram("scanner_refresh_seconds", "Duration of a market scanner refresh (fetch and stack)",
+                                     buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+SCANNER_SYMBOLS = REGISTRY.gauge("scanner_universe_symbols", "Pairs scored by the last scanner refresh", ("market_type", "timeframe"))
+SCANNER_SKIPS = REGISTRY.counter("scanner_skipped_analyses_total", "Analyses skipped because the symbol was outside the scanner's top K")
+
+# --- Scheduler ---
+SCHEDULER_JITTER = REGISTRY.histogram("scheduler_wake_lateness_seconds", "How late a scheduled wake-up fired", ("loop",),
+                                      buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+SCHEDULER_MISSED = REGISTRY.counter("scheduler_missed_boundaries_total", "Candle closes skipped because a tick overran", ("loop",))
+CLOCK_OFFSET = REGISTRY.gauge("exchange_clock_offset_seconds", "Exchange server time minus local time")
+CLOCK_DRIFT = REGISTRY.gauge("exchange_clock_drift_ms_per_hour", "Change of the server time offset between syncs")
+
+# --- Database ---
+DB_COMMIT_LATENCY = REGISTRY.histogram("db_commit_seconds", "Duration of database commits",
+                                       buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0))
+
+# --- Backtests ---
+BACKTEST_CANDLES = REGISTRY.counter("backtest_candles_total", "Candles simulated by backtests")
+BACKTEST_LATENCY = REGISTRY.histogram("backtest_run_seconds", "Duration of backtest simulations",
+                                      buckets=(1, 5, 15, 60, 300, 900, 3600))
+BACKTEST_SPECULATION = REGISTRY.counter("backtest_speculative_decisions_total",
+                                        "Speculatively requested backtest decisions by outcome (used, discarded)", ("outcome",))
+
+# Backtests run in worker processes: each job stores what it added to these metrics and the API
+# process, which is the one scraped, merges the stored counts (backtest_jobs.import_job_telemetry)
+def backtest_counts() -> dict:
+    return {
+        "candles": BACKTEST_CANDLES.value(),
+        "speculation": {outcome: BACKTEST_SPECULATION.value(outcome=outcome) for outcome in ("used", "discarded")},
+        "runs": BACKTEST_LATENCY.state()
+    }
+
+def backtest_counts_since(before: dict) -> dict:
+    after = backtest_counts()
+    return {
+        "candles": after["candles"] - before["candles"],
+        "speculation": {k: v - before["speculation"][k] for k, v in after["speculation"].items()},
+        "runs": {
+            "counts": [a - b for a, b in zip(after["runs"]["counts"], before["runs"]["counts"])],
+            "sum": after["runs"]["sum"] - before["runs"]["sum"],
+            "count": after["runs"]["count"] - before["runs"]["count"]
+        }
+    }
+
+def merge_backtest_counts(counts: dict):
+    BACKTEST_CANDLES.inc(counts["candles"])
+    for outcome, amount in counts["speculation"].items():
+        BACKTEST_SPECULATION.inc(amount, outcome=outcome)
+    BACKTEST_LATENCY.merge(counts["runs"])
+
+@contextmanager
+def instrument(histogram: Histogram, errors: Counter, **labels):
+    """Time a call and count its failures by exception type"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        errors.inc(error=type(e).__name__, **labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+# --- Startup ---
+STARTUP_SECONDS = REGISTRY.gauge("startup_phase_seconds", "Time spent importing and initializing, by phase", ("phase",))
+
+# --- Tracing ---
+_current_span = contextvars.ContextVar("current_span", default=None)
+TRACES = deque(maxlen=100)  # Most recent root spans (e.g. one per tick)
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a stage into `stage_seconds`. With TRACING_ENABLED the stage is also recorded as a
+    span nested under the enclosing one; finished root spans are kept in TRACES.
+    """
+    start = time.perf_counter()
+    node = token = None
+    parent = _current_span.get()
+    if settings.TRACING_ENABLED:
+        node = {"name": name, "start": time.time(), "attrs": attrs, "children": []}
+        if parent is not None:
+            parent["children"].append(node)
+        token = _current_span.set(node)
+    try:
+        yield node
+    except Exception as e:
+        if node is not None:
+            node["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_LATENCY.observe(duration, stage=name)
+        if node is not None:
+            node["duration_ms"] = duration * 1000
+            _current_span.reset(token)
+            if parent is None:
+                TRACES.append(node)
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Background task: how late the loop wakes us up is the time other work blocked it"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
@@ -0,0 +1,149 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import TradingSession, TradingWorker
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.TRADING_LEASE_SECONDS)
+
+def is_live(session: TradingSession) -> bool:
+    """Running and heartbeating"""
+    return session.status == 'running' and session.heartbeat_at is not None and session.heartbeat_at >= _stale_before()
+
+def start_session(db, symbol: str, params: dict) -> str:
+    """
+    Ask the workers to trade `symbol`: 'started', 'already_running', or 'stopping' while the worker
+    of a stopped session still holds it (it releases the row on its next heartbeat)
+    """
+    session = db.query(TradingSession).filter(TradingSession.symbol == symbol).first()
+    if session and session.desired_state == 'running' and session.status in ('pending', 'running'):
+        return 'already_running'
+    if session and is_live(session):
+        # Resetting the row now would let a second worker claim it while the owner's loop still trades
+        return 'stopping'
+    if not session:
+        session = TradingSession(symbol=symbol)
+        db.add(session)
+    session.params = json.dumps(params)
+    session.desired_state = 'running'
+    session.status = 'pending'
+    session.error = None
+    db.commit()
+    return 'started'
+
+def stop_sessions(db, symbol: str = None) -> int:
+    """Ask the workers to stop one symbol (or all); they notice on their next heartbeat"""
+    query = db.query(TradingSession).filter(TradingSession.desired_state == 'running')
+    if symbol:
+        query = query.filter(TradingSession.symbol == symbol)
+    stopped = query.update({"desired_state": 'stopped'}, synchronize_session=False)
+    db.commit()
+    return stopped
+
+def list_sessions(db) -> list:
+    return [{
+        "symbol": s.symbol,
+        "desired_state": s.desired_state,
+        "status": s.status,
+        "live": is_live(s),
+        "worker_id": s.worker_id,
+        "heartbeat_at": s.heartbeat_at.isoformat() if s.heartbeat_at else None,
+        "error": s.error,
+        "state": json.loads(s.state) if s.state else None
+    } for s in db.query(TradingSession).order_by(TradingSession.symbol).all()]
+
+def claim_sessions(worker_id: str, limit: int) -> list:
+    """
+    Atomically claim up to `limit` sessions that should run and have no live worker
+    (never claimed, or their worker stopped heartbeating). Returns [(symbol, params)].
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        claimable = and_(
+            TradingSession.desired_state == 'running',
+            or_(
+                TradingSession.status == 'pending',
+                and_(TradingSession.status == 'running', TradingSession.heartbeat_at < _stale_before())
+            )
+        )
+        claimed = []
+        for (symbol,) in db.query(TradingSession.symbol).filter(claimable).order_by(TradingSession.created_at).limit(limit).all():
+            # Conditional update: only one worker can win the row
+            won = db.query(TradingSession).filter(TradingSession.symbol == symbol, claimable).update(
+                {"status": 'running', "worker_id": worker_id, "heartbeat_at": now, "error": None},
+                synchronize_session=False
+            )
+            db.commit()
+            if won:
+                session = db.query(TradingSession).filter(TradingSession.symbol == symbol).first()
+                claimed.append((symbol, json.loads(session.params)))
+        return claimed
+    finally:
+        db.close()
+
+def renew_leases(worker_id: str, states: dict) -> set:
+    """
+    Heartbeat our sessions and store each loop's state ({symbol: TradingOrchestrator.status()}) for
+    GET /status; returns the symbols we still hold and should keep running
+    """
+    if not states:
+        return set()
+    db = SessionLocal()
+    try:
+        held = TradingSession.symbol.in_(list(states)), TradingSession.worker_id == worker_id, TradingSession.status == 'running'
+        keep = {symbol for (symbol,) in db.query(TradingSession.symbol).filter(*held, TradingSession.desired_state == 'running')}
+        now = datetime.utcnow()
+        for symbol in keep:
+            db.query(TradingSession).filter(TradingSession.symbol == symbol, TradingSession.worker_id == worker_id) \
+                .update({"heartbeat_at": now, "state": json.dumps(states[symbol], default=str)}, synchronize_session=False)
+        db.commit()
+        return keep
+    finally:
+        db.close()
+
+def release_session(symbol: str, worker_id: str, error: str = None):
+    """Mark our running session stopped (or failed); a session taken over or restarted since is left alone"""
+    db = SessionLocal()
+    try:
+        db.query(TradingSession).filter(TradingSession.symbol == symbol, TradingSession.worker_id == worker_id,
+                                        TradingSession.status == 'running').update(
+            {"status": 'failed' if error else 'stopped', "error": error, "heartbeat_at": None},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def publish_worker(worker_id: str, metrics: dict, traces: list):
+    """Store the worker's metrics and traces for the API's /metrics and /api/traces; drop dead workers' rows"""
+    db = SessionLocal()
+    try:
+        worker = db.query(TradingWorker).filter(TradingWorker.worker_id == worker_id).first()
+        if not worker:
+            worker = TradingWorker(worker_id=worker_id)
+            db.add(worker)
+        worker.heartbeat_at = datetime.utcnow()
+        worker.metrics = json.dumps(metrics)
+        worker.traces = json.dumps(traces, default=str)
+        db.query(TradingWorker).filter(TradingWorker.heartbeat_at < _stale_before()).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def worker_metrics(db) -> dict:
+    """{worker_id: Registry.snapshot()} of the live trading workers"""
+    rows = db.query(TradingWorker.worker_id, TradingWorker.metrics).filter(TradingWorker.heartbeat_at >= _stale_before()).all()
+    return {worker_id: json.loads(metrics) for worker_id, metrics in rows if metrics}
+
+def worker_traces(db) -> list:
+    """Root spans published by the live trading workers, each with its worker id"""
+    rows = db.query(TradingWorker.worker_id, TradingWorker.traces).filter(TradingWorker.heartbeat_at >= _stale_before()).all()
+    return [{**trace, "worker": worker_id} for worker_id, traces in rows if traces for trace in json.loads(traces)]
+
+def session_state(db, symbol: str) -> dict:
+    """Loop state last persisted by the worker trading `symbol` (TradingOrchestrator.status()), or None"""
+    session = db.query(TradingSession).filter(TradingSession.symbol == symbol).first()
+    return json.loads(session.state) if session and session.state and is_live(session) else None
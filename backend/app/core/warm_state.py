@@ -0,0 +1,110 @@
+import json
+import os
+import zlib
+import numpy as np
+from app.core.candles import Candles
+from app.core.clock import clock
+from app.core.config import settings
+
+VERSION = 1  # Snapshots of another version are ignored (cold start)
+
+def _file(name: str) -> str:
+    return os.path.join(settings.WARM_STATE_DIR, name)
+
+def snapshot_path(symbol: str) -> str:
+    return _file(symbol.replace('/', '_').replace(':', '_') + ".npz")
+
+def _write(path: str, write):
+    """Write through a temporary file, so a crash mid-write never leaves a truncated snapshot"""
+    os.makedirs(settings.WARM_STATE_DIR, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+def _fresh(saved_at: float, max_age: float) -> bool:
+    # A snapshot from the future (e.g. another SIM_SPEED run) is as unusable as a stale one
+    return 0 <= clock.time() - saved_at <= max_age
+
+def save_snapshot(symbol: str, meta: dict, candles: dict, microstructure: dict = None):
+    """
+    One compressed .npz per symbol: a JSON header (start parameters, schedule, last decision,
+    rate-limit usage) plus candle windows and microstructure buffers as raw arrays.
+    """
+    arrays = {}
+    for timeframe, window in candles.items():
+        for field in Candles.__slots__:
+            arrays[f"candles.{timeframe}.{field}"] = getattr(window, field)
+    for key, value in (microstructure or {}).items():
+        arrays[f"microstructure.{key}"] = value
+    header = {**meta, "symbol": symbol, "version": VERSION, "saved_at": clock.time(), "timeframes": list(candles),
+              "microstructure": microstructure is not None}
+    arrays["meta"] = np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)
+    try:
+        _write(snapshot_path(symbol), lambda f: np.savez_compressed(f, **arrays))
+    except Exception as e:
+        print(f"Failed to save warm restart snapshot for {symbol}: {e}")
+
+def _read_meta(npz) -> dict:
+    return json.loads(npz["meta"].tobytes())
+
+def load_snapshot(symbol: str) -> dict:
+    """{"meta", "candles": {timeframe: Candles}, "microstructure": arrays or None}, or None if missing/stale"""
+    path = snapshot_path(symbol)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as npz:
+            meta = _read_meta(npz)
+            if meta.get("version") != VERSION or not _fresh(meta["saved_at"], settings.WARM_STATE_MAX_AGE_SECONDS):
+                return None
+            candles = {tf: Candles(*(npz[f"candles.{tf}.{field}"] for field in Candles.__slots__)) for tf in meta["timeframes"]}
+            microstructure = None
+            if meta["microstructure"]:
+                prefix = "microstructure."
+                microstructure = {k[len(prefix):]: npz[k] for k in npz.files if k.startswith(prefix)}
+    except Exception as e:
+        print(f"Ignoring unreadable warm restart snapshot {path}: {e}")
+        return None
+    return {"meta": meta, "candles": candles, "microstructure": microstructure}
+
+def running_snapshot() -> dict:
+    """Header of the most recent fresh snapshot whose loop was still running when written, if any"""
+    if not os.path.isdir(settings.WARM_STATE_DIR):
+        return None
+    latest = None
+    for name in os.listdir(settings.WARM_STATE_DIR):
+        if not name.endswith(".npz"):
+            continue
+        try:
+            with np.load(_file(name)) as npz:  # Members are read lazily: only the header here
+                meta = _read_meta(npz)
+        except Exception:
+            continue
+        if meta.get("version") == VERSION and meta.get("running") and _fresh(meta["saved_at"], settings.WARM_STATE_MAX_AGE_SECONDS) \
+                and (latest is None or meta["saved_at"] > latest["saved_at"]):
+            latest = meta
+    return latest
+
+def save_markets(market_type: str, markets: dict, currencies: dict = None):
+    """Markets as loaded from the exchange (zlib JSON); they rarely change, so they're cached apart"""
+    payload = json.dumps({"saved_at": clock.time(), "markets": markets, "currencies": currencies}, default=str).encode()
+    try:
+        _write(_file(f"markets-{market_type}.json.z"), lambda f: f.write(zlib.compress(payload)))
+    except Exception as e:
+        print(f"Failed to cache {market_type} markets: {e}")
+
+def load_markets(market_type: str) -> tuple:
+    """(markets, currencies) cached within WARM_MARKETS_MAX_AGE_SECONDS, or None"""
+    path = _file(f"markets-{market_type}.json.z")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = json.loads(zlib.decompress(f.read()))
+    except Exception as e:
+        print(f"Ignoring unreadable market cache {path}: {e}")
+        return None
+    if not data.get("markets") or not _fresh(data["saved_at"], settings.WARM_MARKETS_MAX_AGE_SECONDS):
+        return None
+    return data["markets"], data.get("currencies")
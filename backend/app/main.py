@@ -1,21 +1,60 @@
-from fastapi import FastAPI
-from app.core.config import settings
-from app.api.routes import router
-from app.api.history import router as history_router
-from app.core.database import init_db
-
-app = FastAPI(title="Agentic Trading System", version="0.1.0")
-
-# Initialize database
-init_db()
-
-app.include_router(router, prefix="/api")
-app.include_router(history_router, prefix="/api/history")
-
-@app.get("/")
-async def root():
-    return {"message": "Agentic Trading System API is running"}
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from app.core.startup import phase, report
+from app.core.config import settings
+from app.core.telemetry import REGISTRY, monitor_event_loop_lag
+
+# Exchange/LLM SDKs, pandas and the backtest engine are imported on first use, not here
+with phase("import routes"):
+    from app.api.routes import router
+    from app.api.history import router as history_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with phase("init_db"):
+        from app.core.database import init_db
+        init_db()
+    from app.api.routes import resume_trading
+    # Loop the previous process was running, restored from its snapshot. It isn't stopped on shutdown
+    # (only interrupted), so its snapshot stays resumable across restarts and reloads.
+    resume_trading()
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    print(f"Startup: {report()}")
+    yield
+    lag_monitor.cancel()
+
+app = FastAPI(title="Agentic Trading System", version="0.1.0", lifespan=lifespan)
+
+app.include_router(router, prefix="/api")
+app.include_router(history_router, prefix="/api/history")
+
+if settings.ENABLE_PROFILING:
+    from app.api.admin import router as admin_router
+    app.include_router(admin_router, prefix="/api/admin")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    from app.core.backtest_jobs import import_job_telemetry
+    import_job_telemetry()  # Backtest metrics are counted in the worker processes
+    remote = None
+    if settings.TRADING_WORKERS:
+        # Live loops run in the trading workers: their series are served here, labelled by worker
+        from app.core.database import SessionLocal
+        from app.core.trading_sessions import worker_metrics
+        db = SessionLocal()
+        try:
+            remote = worker_metrics(db)
+        finally:
+            db.close()
+    return PlainTextResponse(REGISTRY.render(remote), media_type="text/plain; version=0.0.4")
+
+@app.get("/")
+async def root():
+    return {"message": "Agentic Trading System API is running"}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
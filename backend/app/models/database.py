@@ -1,62 +1,173 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
-from datetime import datetime
-from app.core.database import Base
-
-class Trade(Base):
-    __tablename__ = "trades"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, nullable=False, index=True)
-    market_type = Column(String)
-    timeframe = Column(String)
-    action = Column(String)  # 'BUY' or 'SELL'
-    amount = Column(Float)   # Investment amount in USDT
-    entry_price = Column(Float)
-    entry_time = Column(DateTime, default=datetime.utcnow)
-    exit_price = Column(Float, nullable=True)
-    exit_time = Column(DateTime, nullable=True)
-    profit_loss = Column(Float, nullable=True)
-    profit_loss_pct = Column(Float, nullable=True)
-    status = Column(String, default='OPEN')  # 'OPEN', 'CLOSED'
-    is_simulation = Column(Boolean, default=False)
-    gemini_decision_id = Column(Integer, ForeignKey('gemini_decisions.id'), nullable=True)
-    
-    # Relationship
-    gemini_decision = relationship("GeminiDecision", back_populates="trade")
-
-class GeminiDecision(Base):
-    __tablename__ = "gemini_decisions"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
-    symbol = Column(String, nullable=False)
-    action = Column(String)  # 'BUY', 'SELL', 'HOLD'
-    confidence = Column(Float)
-    entry_price = Column(Float, nullable=True)
-    stop_loss = Column(Float, nullable=True)
-    take_profit = Column(Float, nullable=True)
-    reasoning = Column(Text)
-    market_data = Column(Text)  # JSON string with OHLCV
-    executed = Column(Boolean, default=False)
-    
-    # Relationship
-    trade = relationship("Trade", back_populates="gemini_decision", uselist=False)
-
-class Configuration(Base):
-    __tablename__ = "configurations"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    config_key = Column(String, unique=True, nullable=False, index=True)
-    config_value = Column(Text)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-class SystemLog(Base):
-    __tablename__ = "system_logs"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
-    level = Column(String)  # 'INFO', 'WARNING', 'ERROR'
-    component = Column(String)  # 'Orchestrator', 'BinanceAgent', 'GeminiAgent'
-    message = Column(Text)
-    details = Column(Text, nullable=True)  # JSON string for extra data
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, LargeBinary
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.core.database import Base
+
+class Trade(Base):
+    __tablename__ = "trades"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String, nullable=False, index=True)
+    market_type = Column(String)
+    timeframe = Column(String)
+    strategy = Column(String, nullable=True)
+    action = Column(String)  # 'BUY' or 'SELL'
+    amount = Column(Float)   # Investment amount in USDT
+    entry_price = Column(Float)
+    entry_time = Column(DateTime, default=datetime.utcnow)
+    exit_price = Column(Float, nullable=True)
+    exit_time = Column(DateTime, nullable=True)
+    profit_loss = Column(Float, nullable=True)
+    profit_loss_pct = Column(Float, nullable=True)
+    status = Column(String, default='OPEN')  # 'OPEN', 'CLOSED'
+    is_simulation = Column(Boolean, default=False)
+    gemini_decision_id = Column(Integer, ForeignKey('gemini_decisions.id'), nullable=True)
+    # Exchange order ids (real futures trading): the entry and its reduce-only SL/TP exits
+    entry_order_id = Column(String, nullable=True)
+    stop_order_id = Column(String, nullable=True, index=True)
+    take_profit_order_id = Column(String, nullable=True, index=True)
+    exit_order_id = Column(String, nullable=True)  # Order that actually closed the trade
+    quantity = Column(Float, nullable=True)  # Filled base quantity
+    fees = Column(Float, nullable=True)  # Commissions paid on entry and exit fills (USDT)
+    account = Column(String, nullable=True, index=True)  # TradingAccount name; empty for the configured (default) keys
+    
+    # Relationship
+    gemini_decision = relationship("GeminiDecision", back_populates="trades")
+
+class GeminiDecision(Base):
+    __tablename__ = "gemini_decisions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    symbol = Column(String, nullable=False)
+    action = Column(String)  # 'BUY', 'SELL', 'HOLD'
+    confidence = Column(Float)
+    entry_price = Column(Float, nullable=True)
+    stop_loss = Column(Float, nullable=True)
+    take_profit = Column(Float, nullable=True)
+    reasoning = Column(Text)
+    market_data = Column(Text)  # JSON string with OHLCV
+    executed = Column(Boolean, default=False)
+    strategy = Column(String, nullable=True)
+    # Model usage of the analysis (all models queried for ensembles)
+    model = Column(String, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    cost_usd = Column(Float, nullable=True)
+    
+    # Relationship (one trade per execution account)
+    trades = relationship("Trade", back_populates="gemini_decision")
+
+class Configuration(Base):
+    __tablename__ = "configurations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    config_key = Column(String, unique=True, nullable=False, index=True)
+    config_value = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SystemLog(Base):
+    __tablename__ = "system_logs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    level = Column(String)  # 'INFO', 'WARNING', 'ERROR'
+    component = Column(String)  # 'Orchestrator', 'BinanceAgent', 'GeminiAgent'
+    message = Column(Text)
+    details = Column(Text, nullable=True)  # JSON string for extra data
+
+class BacktestJob(Base):
+    __tablename__ = "backtest_jobs"
+    
+    id = Column(String, primary_key=True)  # UUID
+    status = Column(String, default='queued', index=True)  # 'queued', 'running', 'completed', 'failed'
+    params = Column(Text)  # JSON BacktestRequest
+    progress = Column(Float, default=0.0)
+    logs = Column(Text, nullable=True)  # JSON list with the last progress messages
+    checkpoint = Column(LargeBinary, nullable=True)  # zlib JSON engine state, cleared on completion
+    summary = Column(Text, nullable=True)  # JSON totals (trades/equity are stored separately)
+    equity_curve = Column(LargeBinary, nullable=True)  # zlib JSON {"time": [...], "equity": [...]}
+    error = Column(Text, nullable=True)
+    telemetry = Column(Text, nullable=True)  # JSON metric counts added by the worker (see telemetry.backtest_counts)
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
+
+class BacktestTrade(Base):
+    __tablename__ = "backtest_trades"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey('backtest_jobs.id'), nullable=False, index=True)
+    seq = Column(Integer)  # Order of the trade within the run
+    type = Column(String)  # 'BUY' or 'SELL'
+    entry_time = Column(String)
+    exit_time = Column(String)
+    entry_price = Column(Float)
+    exit_price = Column(Float)
+    pnl = Column(Float)
+    reason = Column(String)
+    strategy = Column(String, nullable=True)
+
+class OrderFill(Base):
+    """Ledger of exchange fills, attributed to the Trade they opened or closed"""
+    __tablename__ = "order_fills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    fill_id = Column(String, nullable=False, unique=True, index=True)  # Exchange trade id (dedupes re-fetches)
+    order_id = Column(String, nullable=False, index=True)
+    trade_id = Column(Integer, ForeignKey('trades.id'), nullable=True, index=True)
+    symbol = Column(String, nullable=False, index=True)
+    side = Column(String)  # 'buy' or 'sell'
+    price = Column(Float)
+    quantity = Column(Float)
+    fee = Column(Float, default=0.0)
+    realized_pnl = Column(Float, nullable=True)  # As reported by the exchange (net position basis)
+    account = Column(String, nullable=True, index=True)  # Same as Trade.account
+    timestamp = Column(DateTime, index=True)
+
+class TradingSession(Base):
+    """One live trading loop per symbol, leased by a trading worker process"""
+    __tablename__ = "trading_sessions"
+    
+    symbol = Column(String, primary_key=True)  # One row per symbol: never traded by two workers
+    params = Column(Text)  # JSON start parameters (API keys are read from the configuration table)
+    desired_state = Column(String, default='running')  # 'running' or 'stopped', set by the API
+    status = Column(String, default='pending', index=True)  # 'pending', 'running', 'stopped', 'failed'
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    state = Column(Text, nullable=True)  # JSON TradingOrchestrator.status() of the loop, written with each heartbeat
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class TradingWorker(Base):
+    """Observability of a trading worker process, whose metrics and traces the API serves"""
+    __tablename__ = "trading_workers"
+
+    worker_id = Column(String, primary_key=True)
+    heartbeat_at = Column(DateTime, nullable=True, index=True)
+    metrics = Column(Text, nullable=True)  # JSON telemetry.REGISTRY.snapshot()
+    traces = Column(Text, nullable=True)  # JSON most recent root spans (telemetry.TRACES)
+
+class TradingAccount(Base):
+    """Additional Binance (sub-)account a trading loop can execute its decisions on"""
+    __tablename__ = "trading_accounts"
+
+    name = Column(String, primary_key=True)
+    api_key = Column(String)
+    secret_key = Column(String)
+    investment_amount = Column(Float, nullable=True)  # USDT per trade; the loop's amount if empty
+    enabled = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MicrostructureSnapshot(Base):
+    """Order book / trade flow features as of a live analysis (replayed by backtests)"""
+    __tablename__ = "microstructure_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String, nullable=False, index=True)
+    timestamp = Column(DateTime, index=True)
+    features = Column(Text)  # JSON from MicrostructureBook.features()
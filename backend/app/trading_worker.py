@@ -0,0 +1,124 @@
+"""
+Trading worker.
+
+Claims symbol sessions from the `trading_sessions` table (written by POST /api/start when
+TRADING_WORKERS is enabled) and runs one trading loop per symbol, outside the API process.
+Leases are renewed by heartbeat, which also stores each loop's status, the process's metrics
+and traces for the API and applies configuration saved through the API to the running loops. A worker that dies has its symbols taken over by another
+one after TRADING_LEASE_SECONDS, and a worker that can't reach the database stops trading
+before that happens, so a symbol is never traded twice.
+
+    python -m app.trading_worker --workers 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+from app.core.config import settings
+from app.core.config_service import config_service
+from app.core.database import init_db
+from app.core.orchestrator import TradingOrchestrator
+from app.core.telemetry import REGISTRY, TRACES, monitor_event_loop_lag
+from app.core.trading_sessions import claim_sessions, renew_leases, release_session, publish_worker
+
+TRACES_PUBLISHED = 50  # Most recent root spans stored with each heartbeat for GET /api/traces
+
+async def _stop(orchestrator: TradingOrchestrator, task: asyncio.Task):
+    orchestrator.stop()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    # The loop leaves its clients to the next start; this orchestrator has none
+    await orchestrator.close_accounts(orchestrator.released_accounts)
+
+def _start(symbol: str, params: dict) -> tuple:
+    config_service.invalidate()  # Pick up keys saved since the last claim
+    orchestrator = TradingOrchestrator()
+    task = asyncio.create_task(orchestrator.start_trading_loop(
+        symbol=symbol,
+        binance_api_key=config_service.get('binance_api_key'),
+        binance_secret_key=config_service.get('binance_secret_key'),
+        gemini_api_key=config_service.get('gemini_api_key'),
+        **params
+    ))
+    return orchestrator, task
+
+async def worker_loop(worker_id: str, max_symbols: int):
+    print(f"[{worker_id}] Trading worker started (up to {max_symbols} symbols).")
+    heartbeat = settings.TRADING_LEASE_SECONDS / 3
+    running = {}  # symbol -> (orchestrator, task)
+    last_renewal = time.monotonic()
+    asyncio.create_task(monitor_event_loop_lag())
+    while True:
+        # Loops that ended on their own (e.g. agents failed to initialize)
+        for symbol in [s for s, (_, task) in running.items() if task.done()]:
+            running.pop(symbol)
+            release_session(symbol, worker_id, error="Trading loop exited")
+            print(f"[{worker_id}] {symbol} loop exited.")
+
+        try:
+            keep = renew_leases(worker_id, {symbol: orchestrator.status() for symbol, (orchestrator, _) in running.items()})
+            last_renewal = time.monotonic()
+        except Exception as e:
+            print(f"[{worker_id}] Failed to renew leases: {e}")
+            if time.monotonic() - last_renewal >= settings.TRADING_LEASE_SECONDS - heartbeat:
+                # Our leases are about to be claimable by others: stop trading first
+                keep = set()
+            else:
+                keep = set(running)
+
+        for symbol in set(running) - keep:
+            orchestrator, task = running.pop(symbol)
+            await _stop(orchestrator, task)
+            try:
+                release_session(symbol, worker_id)
+            except Exception as e:
+                print(f"[{worker_id}] Failed to release {symbol}: {e}")
+            print(f"[{worker_id}] Stopped {symbol}.")
+
+        if len(running) < max_symbols:
+            try:
+                for symbol, params in claim_sessions(worker_id, max_symbols - len(running)):
+                    running[symbol] = _start(symbol, params)
+                    print(f"[{worker_id}] Claimed {symbol}.")
+            except Exception as e:
+                print(f"[{worker_id}] Failed to claim sessions: {e}")
+
+        try:
+            # This process isn't scraped: the API serves its metrics and traces from here
+            publish_worker(worker_id, REGISTRY.snapshot(), list(TRACES)[-TRACES_PUBLISHED:])
+        except Exception as e:
+            print(f"[{worker_id}] Failed to publish metrics: {e}")
+
+        try:
+            # POST /config only notifies loops in the API process: pick up its writes here
+            config_service.refresh()
+        except Exception as e:
+            print(f"[{worker_id}] Failed to refresh the configuration: {e}")
+
+        await asyncio.sleep(heartbeat)
+
+def worker_main(index: int, max_symbols: int):
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    asyncio.run(worker_loop(worker_id, max_symbols))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run trading worker processes")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-symbols", type=int, default=settings.TRADING_WORKER_MAX_SYMBOLS)
+    args = parser.parse_args()
+
+    init_db()
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=worker_main, args=(n, args.max_symbols), daemon=True) for n in range(args.workers)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+End-to-end benchmarks for the trading loop, backtester, prompt builder and history API.
+
+Runs offline against the mock exchange/LLM and a throwaway SQLite database:
+
+    python -m benchmarks.run                                   # print results as JSON
+    python -m benchmarks.run --output results.json             # also write them to a file
+    python -m benchmarks.run --baseline benchmarks/baseline.json  # exit 1 on regressions
+    python -m benchmarks.run --update-baseline                 # record this machine as baseline
+    python -m benchmarks.run --scale 0.1                       # 100k logs / 10k trades (quick run)
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Must be set before any app module is imported
+_TMP_DIR = tempfile.mkdtemp(prefix="tradingbot-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/bench.db"
+os.environ["EXCHANGE_BACKEND"] = "mock"
+os.environ["LLM_BACKEND"] = "mock"
+os.environ["SIM_SPEED"] = "1"
+os.environ["MOCK_LLM_LATENCY_MS"] = "0"
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+FULL_LOGS = 1_000_000
+FULL_TRADES = 100_000
+SEED_CHUNK = 50_000
+# Seeded history uses other symbols so the tick benchmark (BTC/USDT) only manages its own positions
+SEED_SYMBOLS = ["ETH/USDT", "SOL/USDT", "XRP/USDT"]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def latency_stats(prefix: str, seconds: list) -> dict:
+    ms = [s * 1000 for s in seconds]
+    return {
+        f"{prefix}_p50_ms": percentile(ms, 50),
+        f"{prefix}_p95_ms": percentile(ms, 95),
+        f"{prefix}_per_sec": len(ms) / (sum(ms) / 1000)
+    }
+
+@contextlib.contextmanager
+def quiet():
+    """The app prints on every log call; keep benchmark output readable"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+async def bench_tick(ticks: int) -> dict:
+    from app.agents.binance_agent import BinanceAgent
+    from app.agents.gemini_agent import GeminiAgent
+    from app.core.orchestrator import TradingOrchestrator
+    from app.core.accounts import DEFAULT_ACCOUNT, ExecutionAccount
+
+    orchestrator = TradingOrchestrator()
+    orchestrator.symbol, orchestrator.market_type, orchestrator.timeframe = "BTC/USDT", "future", "1m"
+    orchestrator.strategy, orchestrator.paper_trading, orchestrator.mode_str = "IA Driven", True, "PAPER TRADING"
+    orchestrator.investment_amount, orchestrator.leverage = 100.0, 1
+    orchestrator.max_open_positions, orchestrator.check_interval = 5, 60
+    orchestrator.binance = BinanceAgent()
+    await orchestrator.binance.load_markets()
+    orchestrator.accounts = {DEFAULT_ACCOUNT: ExecutionAccount(DEFAULT_ACCOUNT, orchestrator.binance)}
+    orchestrator.gemini = GeminiAgent()
+
+    durations = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        await orchestrator.run_tick()
+        durations.append(time.perf_counter() - start)
+    return latency_stats("tick", durations)
+
+async def bench_backtest() -> dict:
+    from app.agents.binance_agent import BinanceAgent
+    from app.agents.gemini_agent import GeminiAgent
+    from app.core.backtest_engine import BacktestEngine
+
+    binance = BinanceAgent()
+    await binance.load_markets()
+    engine = BacktestEngine(binance, GeminiAgent())
+    start = time.perf_counter()
+    results = await engine.run("BTC/USDT", "1h", "IA Driven")
+    elapsed = time.perf_counter() - start
+    candles = len(results["equity_curve"])
+    return {"backtest_candles_per_sec": candles / elapsed, "backtest_total_ms": elapsed * 1000}
+
+async def bench_prompt(iterations: int) -> dict:
+    from app.agents.binance_agent import BinanceAgent
+    from app.agents.gemini_agent import GeminiAgent
+
+    binance = BinanceAgent()
+    data_dict = {tf: await binance.fetch_ohlcv("BTC/USDT", timeframe=tf) for tf in ["1m", "5m", "15m"]}
+    gemini = GeminiAgent()
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        prompt = gemini.build_prompt("BTC/USDT", data_dict, "1m", "IA Driven")
+        durations.append(time.perf_counter() - start)
+    return {
+        "prompt_build_p50_ms": percentile([d * 1000 for d in durations], 50),
+        "prompt_chars": len(prompt),
+        "prompt_tokens_est": len(prompt) // 4
+    }
+
+def seed_database(logs: int, trades: int):
+    from app.core.database import engine, init_db, SessionLocal
+    from app.models.database import SystemLog, Trade, GeminiDecision, Configuration
+
+    init_db()
+    start_time = datetime.utcnow() - timedelta(days=365)
+    with engine.begin() as conn:
+        for offset in range(0, logs, SEED_CHUNK):
+            conn.execute(SystemLog.__table__.insert(), [
+                {"timestamp": start_time + timedelta(seconds=n * 30), "level": "INFO", "component": "Orchestrator",
+                 "message": f"Benchmark log line {n}", "details": None}
+                for n in range(offset, min(offset + SEED_CHUNK, logs))
+            ])
+        for offset in range(0, trades, SEED_CHUNK):
+            ids = range(offset + 1, min(offset + SEED_CHUNK, trades) + 1)
+            conn.execute(GeminiDecision.__table__.insert(), [
+                {"id": n, "timestamp": start_time + timedelta(minutes=n), "symbol": SEED_SYMBOLS[n % 3], "action": "BUY",
+                 "confidence": 0.8, "entry_price": 60000.0, "stop_loss": 58800.0, "take_profit": 62400.0,
+                 "reasoning": "benchmark", "market_data": None, "executed": True}
+                for n in ids
+            ])
+            conn.execute(Trade.__table__.insert(), [
+                {"id": n, "symbol": SEED_SYMBOLS[n % 3], "market_type": "future", "timeframe": "1h", "strategy": "IA Driven",
+                 "action": "BUY", "amount": 100.0, "entry_price": 60000.0, "entry_time": start_time + timedelta(minutes=n),
+                 "exit_price": 60000.0 + (n % 7 - 3) * 100, "exit_time": start_time + timedelta(minutes=n + 30),
+                 "profit_loss": (n % 7 - 3) * 100 / 600, "status": "CLOSED" if n % 50 else "OPEN",
+                 "is_simulation": True, "gemini_decision_id": n}
+                for n in ids
+            ])
+    db = SessionLocal()
+    db.add_all([Configuration(config_key="max_open_positions", config_value="3"),
+                Configuration(config_key="investment_amount", config_value="100")])
+    db.commit()
+    db.close()
+
+def bench_api(requests: int) -> dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    results = {}
+    for name, path in [("api_stats", "/api/history/stats"), ("api_trades", "/api/history/trades?limit=50"),
+                       ("api_logs", "/api/logs?limit=50")]:
+        for _ in range(3):
+            client.get(path)  # Warm-up
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(path)
+            durations.append(time.perf_counter() - start)
+            response.raise_for_status()
+        results.update(latency_stats(name, durations))
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics ending in _per_sec are higher-is-better; everything else lower-is-better."""
+    regressions = []
+    for name, base in baseline["metrics"].items():
+        current = results["metrics"].get(name)
+        if current is None or not base:
+            continue
+        higher_is_better = name.endswith("_per_sec")
+        change = (current - base) / base
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append({"metric": name, "baseline": base, "current": current, "change_pct": change * 100})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run trading system benchmarks")
+    parser.add_argument("--scale", type=float, default=1.0, help="Fraction of the 1M logs / 100k trades table sizes")
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON and exit 1 on regressions")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Write results to {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    logs, trades = int(FULL_LOGS * args.scale), int(FULL_TRADES * args.scale)
+    metrics = {}
+    with quiet():
+        seed_start = time.perf_counter()
+        seed_database(logs, trades)
+        seed_seconds = time.perf_counter() - seed_start
+        metrics.update(asyncio.run(bench_prompt(200)))
+        metrics.update(asyncio.run(bench_backtest()))
+        metrics.update(bench_api(args.requests))
+        # Last: the ticks add trades/logs on top of the seeded tables
+        metrics.update(asyncio.run(bench_tick(args.ticks)))
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scale": args.scale,
+            "logs": logs,
+            "trades": trades,
+            "seed_seconds": seed_seconds
+        },
+        "metrics": metrics
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != args.scale:
+            print(f"Warning: baseline was recorded at scale {baseline['meta'].get('scale')}, running at {args.scale}", file=sys.stderr)
+        results["regressions"] = compare(results, baseline, args.tolerance)
+        status = 1 if results["regressions"] else 0
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if args.update_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            f.write(json.dumps({"meta": results["meta"], "metrics": metrics}, indent=2) + "\n")
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
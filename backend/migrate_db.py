@@ -1,9 +1,34 @@
-from app.core.database import engine
-from sqlalchemy import text
-
-with engine.connect() as conn:
-    try:
-        conn.execute(text("ALTER TABLE trades ADD COLUMN amount FLOAT"))
-        print("Column 'amount' added successfully.")
-    except Exception as e:
-        print(f"Error (column might exist): {e}")
+from app.core.database import engine
+from sqlalchemy import text
+
+# Columns added after the tables were first created (create_all does not alter existing tables)
+NEW_COLUMNS = [
+    ("trades", "amount", "FLOAT"),
+    ("trades", "strategy", "VARCHAR"),
+    ("backtest_trades", "strategy", "VARCHAR"),
+    ("trades", "entry_order_id", "VARCHAR"),
+    ("trades", "stop_order_id", "VARCHAR"),
+    ("trades", "take_profit_order_id", "VARCHAR"),
+    ("trades", "exit_order_id", "VARCHAR"),
+    ("trades", "quantity", "FLOAT"),
+    ("trades", "fees", "FLOAT"),
+    ("gemini_decisions", "strategy", "VARCHAR"),
+    ("gemini_decisions", "model", "VARCHAR"),
+    ("gemini_decisions", "prompt_tokens", "INTEGER"),
+    ("gemini_decisions", "output_tokens", "INTEGER"),
+    ("gemini_decisions", "cost_usd", "FLOAT"),
+    ("trades", "account", "VARCHAR"),
+    ("order_fills", "account", "VARCHAR"),
+    ("trading_sessions", "state", "TEXT"),
+    ("backtest_jobs", "telemetry", "TEXT"),
+]
+
+with engine.connect() as conn:
+    for table, column, col_type in NEW_COLUMNS:
+        try:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}"))
+            conn.commit()
+            print(f"Column '{table}.{column}' added successfully.")
+        except Exception as e:
+            conn.rollback()
+            print(f"Error (column might exist): {e}")
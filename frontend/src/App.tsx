@@ -1,12 +1,12 @@
-import Dashboard from './components/Dashboard'
-
-
-function App() {
-    return (
-        <div className="min-h-screen bg-gray-900 text-white">
-            <Dashboard />
-        </div>
-    )
-}
-
-export default App
+import Dashboard from './components/Dashboard'
+
+
+function App() {
+    return (
+        <div className="min-h-screen bg-gray-900 text-white">
+            <Dashboard />
+        </div>
+    )
+}
+
+export default App
@@ -1,15 +1,15 @@
-import { defineConfig } from 'vite'
-import react from '@vitejs/plugin-react'
-
-// https://vitejs.dev/config/
-export default defineConfig({
-    plugins: [react()],
-    server: {
-        proxy: {
-            '/api': {
-                target: process.env.BACKEND_URL || 'http://localhost:8000',
-                changeOrigin: true,
-            },
-        },
-    },
-})
+import { defineConfig } from 'vite'
+import react from '@vitejs/plugin-react'
+
+// https://vitejs.dev/config/
+export default defineConfig({
+    plugins: [react()],
+    server: {
+        proxy: {
+            '/api': {
+                target: process.env.BACKEND_URL || 'http://localhost:8000',
+                changeOrigin: true,
+            },
+        },
+    },
+})